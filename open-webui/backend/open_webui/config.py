@@ -4,6 +4,8 @@ import os
 import shutil
 import base64
 import redis
+import threading
+import time
 
 from datetime import datetime
 from pathlib import Path
@@ -21,6 +23,7 @@ from open_webui.env import (
     DATABASE_URL,
     ENV,
     REDIS_URL,
+    REDIS_CONFIG_REFRESH_INTERVAL,
     REDIS_KEY_PREFIX,
     REDIS_SENTINEL_HOSTS,
     REDIS_SENTINEL_PORT,
@@ -222,9 +225,20 @@ class PersistentConfig(Generic[T]):
 
 
 class AppConfig:
+    """
+    Values of the registered PersistentConfigs.
+
+    With Redis, values set by any worker are stored in Redis and the key is
+    published on the config channel. Reads are served from the local values,
+    which a background thread keeps up to date from the published keys, and
+    by reloading all values every REDIS_CONFIG_REFRESH_INTERVAL seconds in
+    case a message was missed.
+    """
+
     _state: dict[str, PersistentConfig]
     _redis: Union[redis.Redis, redis.cluster.RedisCluster] = None
     _redis_key_prefix: str
+    _listener: Optional[threading.Thread] = None
 
     def __init__(
         self,
@@ -232,9 +246,12 @@ class AppConfig:
         redis_sentinels: Optional[list] = [],
         redis_cluster: Optional[bool] = False,
         redis_key_prefix: str = "open-webui",
+        refresh_interval: float = REDIS_CONFIG_REFRESH_INTERVAL,
     ):
         super().__setattr__("_state", {})
         super().__setattr__("_redis_key_prefix", redis_key_prefix)
+        super().__setattr__("_refresh_interval", refresh_interval)
+        super().__setattr__("_listener_lock", threading.Lock())
         if redis_url:
             super().__setattr__(
                 "_redis",
@@ -256,29 +273,90 @@ class AppConfig:
             if self._redis:
                 redis_key = f"{self._redis_key_prefix}:config:{key}"
                 self._redis.set(redis_key, json.dumps(self._state[key].value))
+                try:
+                    self._redis.publish(self._get_channel(), key)
+                except Exception as e:
+                    log.error(f"Failed to publish the update of {key}: {e}")
 
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
-        if self._redis:
-            redis_key = f"{self._redis_key_prefix}:config:{key}"
-            redis_value = self._redis.get(redis_key)
+        if self._redis and self._listener is None:
+            self._start_listener()
 
-            if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
+        return self._state[key].value
 
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
+    ####################
+    # Redis sync
+    ####################
 
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+    def _get_channel(self) -> str:
+        return f"{self._redis_key_prefix}:config:updates"
 
-        return self._state[key].value
+    def _apply_value(self, key: str, redis_value: Optional[str]):
+        if redis_value is None or key not in self._state:
+            return
+        try:
+            decoded_value = json.loads(redis_value)
+        except json.JSONDecodeError:
+            log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+            return
+
+        # Update the in-memory value if different
+        if self._state[key].value != decoded_value:
+            self._state[key].value = decoded_value
+            log.info(f"Updated {key} from Redis: {decoded_value}")
+
+    def _refresh(self, keys: Optional[list] = None):
+        """Load the values of `keys` (all by default) from Redis."""
+        keys = list(self._state.keys()) if keys is None else keys
+        pipe = self._redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(f"{self._redis_key_prefix}:config:{key}")
+        for key, redis_value in zip(keys, pipe.execute()):
+            self._apply_value(key, redis_value)
+
+    def _start_listener(self):
+        with self._listener_lock:
+            if self._listener is not None:
+                return
+            # Load once on the first read, values published afterwards are
+            # picked up by the listener
+            try:
+                self._refresh()
+            except Exception as e:
+                log.error(f"Failed to load the config from Redis: {e}")
+
+            listener = threading.Thread(
+                target=self._listen, name="config_listener", daemon=True
+            )
+            super().__setattr__("_listener", listener)
+            listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                pubsub.subscribe(self._get_channel())
+                # Changes made while (re)subscribing were not received
+                self._refresh()
+                refreshed_at = time.monotonic()
+
+                while True:
+                    message = pubsub.get_message(
+                        ignore_subscribe_messages=True,
+                        timeout=max(self._refresh_interval, 0.1),
+                    )
+                    if message and message.get("type") == "message":
+                        self._refresh([message["data"]])
+
+                    if time.monotonic() - refreshed_at >= self._refresh_interval:
+                        self._refresh()
+                        refreshed_at = time.monotonic()
+            except Exception as e:
+                log.error(f"Config listener failed, reconnecting: {e}")
+                time.sleep(max(self._refresh_interval, 1))
 
 
 ####################################
@@ -1918,6 +1996,13 @@ Ensure that the tools are effectively utilized to achieve the highest-quality an
 
 VECTOR_DB = os.environ.get("VECTOR_DB", "chroma")
 
+# Maximum number of concurrent vector DB calls made by the async API, shared
+# by all requests of a worker
+try:
+    VECTOR_DB_MAX_CONCURRENCY = int(os.environ.get("VECTOR_DB_MAX_CONCURRENCY", "16"))
+except ValueError:
+    VECTOR_DB_MAX_CONCURRENCY = 16
+
 # Chroma
 CHROMA_DATA_PATH = f"{DATA_DIR}/vector_db"
 
@@ -2044,6 +2129,55 @@ else:
     except Exception:
         PGVECTOR_POOL_RECYCLE = 3600
 
+# Vector index: "ivfflat" (legacy), "hnsw" or "none" (exact search only)
+PGVECTOR_INDEX_METHOD = os.environ.get("PGVECTOR_INDEX_METHOD", "ivfflat").lower()
+if PGVECTOR_INDEX_METHOD not in ["ivfflat", "hnsw", "none"]:
+    PGVECTOR_INDEX_METHOD = "ivfflat"
+
+try:
+    PGVECTOR_IVFFLAT_LISTS = int(os.environ.get("PGVECTOR_IVFFLAT_LISTS", "100"))
+except ValueError:
+    PGVECTOR_IVFFLAT_LISTS = 100
+
+try:
+    PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+except ValueError:
+    PGVECTOR_HNSW_M = 16
+
+try:
+    PGVECTOR_HNSW_EF_CONSTRUCTION = int(
+        os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+    )
+except ValueError:
+    PGVECTOR_HNSW_EF_CONSTRUCTION = 64
+
+try:
+    PGVECTOR_HNSW_EF_SEARCH = int(os.environ.get("PGVECTOR_HNSW_EF_SEARCH", "40"))
+except ValueError:
+    PGVECTOR_HNSW_EF_SEARCH = 40
+
+# Requires pgvector >= 0.8: "off", "relaxed_order" or "strict_order"
+PGVECTOR_HNSW_ITERATIVE_SCAN = os.environ.get(
+    "PGVECTOR_HNSW_ITERATIVE_SCAN", "off"
+).lower()
+if PGVECTOR_HNSW_ITERATIVE_SCAN not in ["off", "relaxed_order", "strict_order"]:
+    PGVECTOR_HNSW_ITERATIVE_SCAN = "off"
+
+# List-partition document_chunk by collection_name, so that every collection
+# gets its own vector index. Existing tables are migrated by an index rebuild,
+# which blocks writes (not searches) while the table is copied and indexed.
+PGVECTOR_PARTITION_BY_COLLECTION = (
+    os.environ.get("PGVECTOR_PARTITION_BY_COLLECTION", "false").lower() == "true"
+)
+
+# Number of chunks written per INSERT statement by insert/upsert
+try:
+    PGVECTOR_INSERT_BATCH_SIZE = int(
+        os.environ.get("PGVECTOR_INSERT_BATCH_SIZE", "500")
+    )
+except ValueError:
+    PGVECTOR_INSERT_BATCH_SIZE = 500
+
 # Pinecone
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", None)
 PINECONE_ENVIRONMENT = os.environ.get("PINECONE_ENVIRONMENT", None)
@@ -2083,6 +2217,36 @@ log.info(f"VECTOR_DB: {VECTOR_DB}")
 S3_VECTOR_BUCKET_NAME = os.environ.get("S3_VECTOR_BUCKET_NAME", None)
 S3_VECTOR_REGION = os.environ.get("S3_VECTOR_REGION", None)
 
+# NumPy (embedded, memory-mapped files, single node)
+NUMPY_VECTOR_DATA_PATH = os.environ.get(
+    "NUMPY_VECTOR_DATA_PATH", f"{DATA_DIR}/vector_db_numpy"
+)
+# Storage precision of vectors, "float16" or "int8" (per-vector scaled)
+NUMPY_VECTOR_DTYPE = os.environ.get("NUMPY_VECTOR_DTYPE", "float16").lower()
+# "flat" (exact brute force) or "ivf" (inverted file, approximate)
+NUMPY_VECTOR_INDEX = os.environ.get("NUMPY_VECTOR_INDEX", "flat").lower()
+
+# Number of IVF lists, 0 picks sqrt(number of vectors)
+try:
+    NUMPY_VECTOR_IVF_LISTS = int(os.environ.get("NUMPY_VECTOR_IVF_LISTS", "0"))
+except ValueError:
+    NUMPY_VECTOR_IVF_LISTS = 0
+
+try:
+    NUMPY_VECTOR_IVF_PROBES = int(os.environ.get("NUMPY_VECTOR_IVF_PROBES", "8"))
+except ValueError:
+    NUMPY_VECTOR_IVF_PROBES = 8
+
+if VECTOR_DB == "numpy":
+    if NUMPY_VECTOR_DTYPE not in ["float16", "int8"]:
+        raise ValueError(
+            f"Invalid NUMPY_VECTOR_DTYPE: {NUMPY_VECTOR_DTYPE}, must be 'float16' or 'int8'."
+        )
+    if NUMPY_VECTOR_INDEX not in ["flat", "ivf"]:
+        raise ValueError(
+            f"Invalid NUMPY_VECTOR_INDEX: {NUMPY_VECTOR_INDEX}, must be 'flat' or 'ivf'."
+        )
+
 ####################################
 # Information Retrieval (RAG)
 ####################################
@@ -2331,6 +2495,14 @@ ENABLE_RAG_HYBRID_SEARCH = PersistentConfig(
     os.environ.get("ENABLE_RAG_HYBRID_SEARCH", "").lower() == "true",
 )
 
+# Persistent inverted index used for the BM25 side of hybrid search. Each node
+# keeps its own index file, with Redis configured the writes are versioned so
+# that a node rebuilds the collections other nodes wrote to
+ENABLE_RAG_BM25_INDEX = (
+    os.environ.get("ENABLE_RAG_BM25_INDEX", "True").lower() == "true"
+)
+RAG_BM25_INDEX_PATH = os.environ.get("RAG_BM25_INDEX_PATH", f"{DATA_DIR}/bm25/index.db")
+
 RAG_FULL_CONTEXT = PersistentConfig(
     "RAG_FULL_CONTEXT",
     "rag.full_context",
@@ -2400,6 +2572,25 @@ PDF_EXTRACT_IMAGES = PersistentConfig(
     os.environ.get("PDF_EXTRACT_IMAGES", "False").lower() == "true",
 )
 
+# Large PDF and PPTX files are extracted in page ranges by a process pool
+ENABLE_PARALLEL_DOCUMENT_EXTRACTION = (
+    os.environ.get("ENABLE_PARALLEL_DOCUMENT_EXTRACTION", "True").lower() == "true"
+)
+
+try:
+    DOCUMENT_EXTRACTION_WORKERS = int(
+        os.environ.get("DOCUMENT_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1)))
+    )
+except ValueError:
+    DOCUMENT_EXTRACTION_WORKERS = min(4, os.cpu_count() or 1)
+
+try:
+    DOCUMENT_EXTRACTION_PAGES_PER_TASK = int(
+        os.environ.get("DOCUMENT_EXTRACTION_PAGES_PER_TASK", "32")
+    )
+except ValueError:
+    DOCUMENT_EXTRACTION_PAGES_PER_TASK = 32
+
 RAG_EMBEDDING_MODEL = PersistentConfig(
     "RAG_EMBEDDING_MODEL",
     "rag.embedding_model",
@@ -2425,6 +2616,89 @@ RAG_EMBEDDING_BATCH_SIZE = PersistentConfig(
     ),
 )
 
+# Remote embedding engines (openai, ollama, azure_openai)
+try:
+    RAG_EMBEDDING_CONCURRENT_REQUESTS = int(
+        os.environ.get("RAG_EMBEDDING_CONCURRENT_REQUESTS", "4")
+    )
+except ValueError:
+    RAG_EMBEDDING_CONCURRENT_REQUESTS = 4
+
+try:
+    RAG_EMBEDDING_POOL_SIZE = int(os.environ.get("RAG_EMBEDDING_POOL_SIZE", "16"))
+except ValueError:
+    RAG_EMBEDDING_POOL_SIZE = 16
+
+try:
+    RAG_EMBEDDING_MAX_RETRIES = int(os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "5"))
+except ValueError:
+    RAG_EMBEDDING_MAX_RETRIES = 5
+
+# Split, embed and insert in bounded batches, which bounds the memory used by
+# chunks and vectors. Extraction is not streamed: the extracted text of a file
+# is still loaded in full, as it is stored with the file and hashed for the
+# duplicate check before any chunk is inserted.
+ENABLE_RAG_STREAMING_INGESTION = (
+    os.environ.get("ENABLE_RAG_STREAMING_INGESTION", "False").lower() == "true"
+)
+
+try:
+    RAG_STREAMING_INGESTION_BATCH_SIZE = int(
+        os.environ.get("RAG_STREAMING_INGESTION_BATCH_SIZE", "256")
+    )
+except ValueError:
+    RAG_STREAMING_INGESTION_BATCH_SIZE = 256
+
+try:
+    RAG_STREAMING_INGESTION_QUEUE_SIZE = int(
+        os.environ.get("RAG_STREAMING_INGESTION_QUEUE_SIZE", "2")
+    )
+except ValueError:
+    RAG_STREAMING_INGESTION_QUEUE_SIZE = 2
+
+# Re-embed only the changed chunks when a file is updated
+ENABLE_RAG_INCREMENTAL_UPDATES = (
+    os.environ.get("ENABLE_RAG_INCREMENTAL_UPDATES", "True").lower() == "true"
+)
+
+try:
+    RAG_REINDEX_WORKERS = int(os.environ.get("RAG_REINDEX_WORKERS", "4"))
+except ValueError:
+    RAG_REINDEX_WORKERS = 4
+
+# Upper bound on files started per minute by the reindex job, 0 = unlimited
+try:
+    RAG_REINDEX_FILES_PER_MINUTE = int(
+        os.environ.get("RAG_REINDEX_FILES_PER_MINUTE", "0")
+    )
+except ValueError:
+    RAG_REINDEX_FILES_PER_MINUTE = 0
+
+RAG_REINDEX_CHECKPOINT_PATH = os.environ.get(
+    "RAG_REINDEX_CHECKPOINT_PATH", f"{DATA_DIR}/reindex/checkpoint.json"
+)
+
+ENABLE_RAG_EMBEDDING_CACHE = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_CACHE", "True").lower() == "true"
+)
+RAG_EMBEDDING_CACHE_PATH = os.environ.get(
+    "RAG_EMBEDDING_CACHE_PATH", f"{CACHE_DIR}/embeddings/cache.db"
+)
+
+try:
+    RAG_EMBEDDING_CACHE_MAX_SIZE_MB = int(
+        os.environ.get("RAG_EMBEDDING_CACHE_MAX_SIZE_MB", "1024")
+    )
+except ValueError:
+    RAG_EMBEDDING_CACHE_MAX_SIZE_MB = 1024
+
+try:
+    RAG_EMBEDDING_CACHE_MEMORY_SIZE = int(
+        os.environ.get("RAG_EMBEDDING_CACHE_MEMORY_SIZE", "10000")
+    )
+except ValueError:
+    RAG_EMBEDDING_CACHE_MEMORY_SIZE = 10000
+
 RAG_EMBEDDING_QUERY_PREFIX = os.environ.get("RAG_EMBEDDING_QUERY_PREFIX", None)
 
 RAG_EMBEDDING_CONTENT_PREFIX = os.environ.get("RAG_EMBEDDING_CONTENT_PREFIX", None)
@@ -2457,6 +2731,36 @@ RAG_RERANKING_MODEL_TRUST_REMOTE_CODE = (
     os.environ.get("RAG_RERANKING_MODEL_TRUST_REMOTE_CODE", "True").lower() == "true"
 )
 
+# Number of (query, document) pairs scored per reranker call
+try:
+    RAG_RERANKING_BATCH_SIZE = int(os.environ.get("RAG_RERANKING_BATCH_SIZE", "64"))
+except ValueError:
+    RAG_RERANKING_BATCH_SIZE = 64
+
+# Number of (query, document) rerank scores kept in memory, 0 disables the cache
+try:
+    RAG_RERANKING_CACHE_SIZE = int(os.environ.get("RAG_RERANKING_CACHE_SIZE", "10000"))
+except ValueError:
+    RAG_RERANKING_CACHE_SIZE = 10000
+
+# Cache of vector/hybrid search results, invalidated by per-collection version
+# counters bumped on every write. Versions and results live in Redis when
+# REDIS_URL is set, which is required to stay consistent across workers.
+ENABLE_RAG_QUERY_CACHE = (
+    os.environ.get("ENABLE_RAG_QUERY_CACHE", "False").lower() == "true"
+)
+
+try:
+    RAG_QUERY_CACHE_TTL = int(os.environ.get("RAG_QUERY_CACHE_TTL", "600"))
+except ValueError:
+    RAG_QUERY_CACHE_TTL = 600
+
+# Number of results kept in memory when Redis is not configured
+try:
+    RAG_QUERY_CACHE_SIZE = int(os.environ.get("RAG_QUERY_CACHE_SIZE", "1000"))
+except ValueError:
+    RAG_QUERY_CACHE_SIZE = 1000
+
 RAG_EXTERNAL_RERANKER_URL = PersistentConfig(
     "RAG_EXTERNAL_RERANKER_URL",
     "rag.external_reranker_url",
@@ -2668,6 +2972,29 @@ WEB_SEARCH_TRUST_ENV = PersistentConfig(
     os.getenv("WEB_SEARCH_TRUST_ENV", "False").lower() == "true",
 )
 
+# Pages fetched for web search are cached on disk (shared between workers) and
+# reused for WEB_LOADER_CACHE_TTL seconds. Expired pages that carried an ETag or
+# Last-Modified header are revalidated with a conditional request instead of
+# being fetched again.
+ENABLE_WEB_LOADER_CACHE = (
+    os.environ.get("ENABLE_WEB_LOADER_CACHE", "True").lower() == "true"
+)
+WEB_LOADER_CACHE_PATH = os.environ.get(
+    "WEB_LOADER_CACHE_PATH", f"{CACHE_DIR}/web/pages.db"
+)
+
+try:
+    WEB_LOADER_CACHE_TTL = int(os.environ.get("WEB_LOADER_CACHE_TTL", "3600"))
+except ValueError:
+    WEB_LOADER_CACHE_TTL = 3600
+
+try:
+    WEB_LOADER_CACHE_MAX_SIZE_MB = int(
+        os.environ.get("WEB_LOADER_CACHE_MAX_SIZE_MB", "256")
+    )
+except ValueError:
+    WEB_LOADER_CACHE_MAX_SIZE_MB = 256
+
 
 SEARXNG_QUERY_URL = PersistentConfig(
     "SEARXNG_QUERY_URL",
@@ -376,6 +376,16 @@ REDIS_KEY_PREFIX = os.environ.get("REDIS_KEY_PREFIX", "open-webui")
 REDIS_SENTINEL_HOSTS = os.environ.get("REDIS_SENTINEL_HOSTS", "")
 REDIS_SENTINEL_PORT = os.environ.get("REDIS_SENTINEL_PORT", "26379")
 
+# Config changes are pushed to the other workers through pub/sub, every worker
+# also reloads all values from Redis at this interval (seconds) in case it
+# missed a change
+try:
+    REDIS_CONFIG_REFRESH_INTERVAL = float(
+        os.environ.get("REDIS_CONFIG_REFRESH_INTERVAL", "30")
+    )
+except ValueError:
+    REDIS_CONFIG_REFRESH_INTERVAL = 30.0
+
 # Maximum number of retries for Redis operations when using Sentinel fail-over
 REDIS_SENTINEL_MAX_RETRY_COUNT = os.environ.get("REDIS_SENTINEL_MAX_RETRY_COUNT", "2")
 try:
@@ -504,14 +514,18 @@ if LICENSE_PUBLIC_KEY:
 # MODELS
 ####################################
 
-MODELS_CACHE_TTL = os.environ.get("MODELS_CACHE_TTL", "1")
-if MODELS_CACHE_TTL == "":
-    MODELS_CACHE_TTL = None
-else:
-    try:
-        MODELS_CACHE_TTL = int(MODELS_CACHE_TTL)
-    except Exception:
-        MODELS_CACHE_TTL = 1
+if "MODELS_CACHE_TTL" in os.environ:
+    log.warning(
+        "MODELS_CACHE_TTL is deprecated and ignored, model lists are refreshed "
+        "every MODELS_REFRESH_INTERVAL seconds"
+    )
+
+# Model lists of the connections are refreshed in the background at this
+# interval (seconds), requests are served from the last good ones
+try:
+    MODELS_REFRESH_INTERVAL = float(os.environ.get("MODELS_REFRESH_INTERVAL", "30"))
+except ValueError:
+    MODELS_REFRESH_INTERVAL = 30.0
 
 
 ####################################
@@ -572,6 +586,32 @@ except ValueError:
 WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Seconds the session, user and usage pools serve reads from the local cache,
+# writes invalidate the other workers' caches right away through pub/sub
+try:
+    WEBSOCKET_POOL_CACHE_TTL = float(os.environ.get("WEBSOCKET_POOL_CACHE_TTL", "1.0"))
+except ValueError:
+    WEBSOCKET_POOL_CACHE_TTL = 1.0
+
+# Message updates carried by chat events are written to the database at most
+# every interval (seconds), or once this many characters of content are pending
+try:
+    CHAT_EVENT_FLUSH_INTERVAL = float(
+        os.environ.get("CHAT_EVENT_FLUSH_INTERVAL", "1.0")
+    )
+except ValueError:
+    CHAT_EVENT_FLUSH_INTERVAL = 1.0
+
+try:
+    CHAT_EVENT_FLUSH_SIZE = int(os.environ.get("CHAT_EVENT_FLUSH_SIZE", "16384"))
+except ValueError:
+    CHAT_EVENT_FLUSH_SIZE = 16384
+
+try:
+    YDOC_COMPACTION_THRESHOLD = int(os.environ.get("YDOC_COMPACTION_THRESHOLD", "100"))
+except ValueError:
+    YDOC_COMPACTION_THRESHOLD = 100
+
 
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
@@ -588,6 +628,50 @@ AIOHTTP_CLIENT_SESSION_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_SSL", "True").lower() == "true"
 )
 
+# Connection pools shared by the requests to each OpenAI / Ollama upstream
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT = int(os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT", "100"))
+except ValueError:
+    AIOHTTP_CLIENT_POOL_LIMIT = 100
+
+try:
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = float(
+        os.environ.get("AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT", "30")
+    )
+except ValueError:
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = 30.0
+
+try:
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = int(
+        os.environ.get("AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL", "300")
+    )
+except ValueError:
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = 300
+
+# Routing of requests among the Ollama backends serving a model: a backend is
+# ejected for a cooldown (seconds, doubled on repeated failures) after this
+# many consecutive failures, loaded models are refreshed at this interval
+try:
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD = int(
+        os.environ.get("OLLAMA_CIRCUIT_BREAKER_THRESHOLD", "5")
+    )
+except ValueError:
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD = 5
+
+try:
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN = float(
+        os.environ.get("OLLAMA_CIRCUIT_BREAKER_COOLDOWN", "30")
+    )
+except ValueError:
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN = 30.0
+
+try:
+    OLLAMA_LOADED_MODELS_REFRESH_INTERVAL = float(
+        os.environ.get("OLLAMA_LOADED_MODELS_REFRESH_INTERVAL", "10")
+    )
+except ValueError:
+    OLLAMA_LOADED_MODELS_REFRESH_INTERVAL = 10.0
+
 AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST = os.environ.get(
     "AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST",
     os.environ.get("AIOHTTP_CLIENT_TIMEOUT_OPENAI_MODEL_LIST", "10"),
@@ -60,6 +60,7 @@ from open_webui.socket.main import (
     get_event_emitter,
     get_models_in_use,
     get_active_user_ids,
+    MESSAGE_EVENT_BUFFER,
 )
 from open_webui.routers import (
     audio,
@@ -450,7 +451,7 @@ from open_webui.utils.chat import (
 )
 from open_webui.utils.embeddings import generate_embeddings
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import AccessIndex, principal_cache
 
 from open_webui.utils.auth import (
     get_license_data,
@@ -462,6 +463,8 @@ from open_webui.utils.auth import (
 from open_webui.utils.plugin import install_tool_and_function_dependencies
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
+from open_webui.utils.http_client import HTTP_CLIENT_POOL
+from open_webui.utils.model_registry import MODEL_REGISTRY
 from open_webui.utils.redis import get_redis_connection
 
 from open_webui.tasks import (
@@ -554,6 +557,7 @@ async def lifespan(app: FastAPI):
         limiter.total_tokens = THREAD_POOL_SIZE
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    app.state.model_registry_task = asyncio.create_task(MODEL_REGISTRY.run())
 
     if app.state.config.ENABLE_BASE_MODELS_CACHE:
         await get_all_models(
@@ -581,6 +585,11 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    app.state.model_registry_task.cancel()
+
+    await MESSAGE_EVENT_BUFFER.flush_all()
+    await HTTP_CLIENT_POOL.close()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -1159,6 +1168,13 @@ app.add_middleware(RedirectMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
 
 
+@app.middleware("http")
+async def scope_principal_cache(request: Request, call_next):
+    # Group memberships are looked up once per request and user
+    with principal_cache():
+        return await call_next(request)
+
+
 @app.middleware("http")
 async def commit_session_after_request(request: Request, call_next):
     response = await call_next(request)
@@ -1279,28 +1295,35 @@ async def get_models(
     request: Request, refresh: bool = False, user=Depends(get_verified_user)
 ):
     def get_filtered_models(models, user):
+        # Load the model infos at once and index who can read them, instead of
+        # querying and checking access model by model
+        model_infos = {
+            model_info.id: model_info for model_info in Models.get_all_models()
+        }
+
+        access_index = AccessIndex("read")
+        for model in models:
+            if model.get("arena"):
+                access_index.add(
+                    model["id"],
+                    model.get("info", {}).get("meta", {}).get("access_control", {}),
+                )
+            elif model["id"] in model_infos:
+                model_info = model_infos[model["id"]]
+                access_index.add(
+                    model["id"], model_info.access_control, model_info.user_id
+                )
+        accessible_ids = access_index.get_accessible_ids(user.id)
+
         filtered_models = []
         for model in models:
             if model.get("arena"):
-                if has_access(
-                    user.id,
-                    type="read",
-                    access_control=model.get("info", {})
-                    .get("meta", {})
-                    .get("access_control", {}),
-                ):
+                if model["id"] in accessible_ids:
                     filtered_models.append(model)
-                continue
-
-            model_info = Models.get_model_by_id(model["id"])
-            if model_info:
-                if (
-                    (user.role == "admin" and BYPASS_ADMIN_ACCESS_CONTROL)
-                    or user.id == model_info.user_id
-                    or has_access(
-                        user.id, type="read", access_control=model_info.access_control
-                    )
-                ):
+            elif model["id"] in model_infos:
+                if (user.role == "admin" and BYPASS_ADMIN_ACCESS_CONTROL) or model[
+                    "id"
+                ] in accessible_ids:
                     filtered_models.append(model)
 
         return filtered_models
@@ -1359,6 +1382,12 @@ async def get_base_models(request: Request, user=Depends(get_admin_user)):
     return {"data": models}
 
 
+@app.get("/api/models/registry")
+async def get_model_registry_state(user=Depends(get_admin_user)):
+    """Staleness and errors of the model lists of each connection."""
+    return MODEL_REGISTRY.stats()
+
+
 ##################################
 # Embeddings
 ##################################
@@ -1501,7 +1530,9 @@ async def chat_completion(
             response = await chat_completion_handler(request, form_data, user)
             if metadata.get("chat_id") and metadata.get("message_id"):
                 try:
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MESSAGE_EVENT_BUFFER.write(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1528,7 +1559,9 @@ async def chat_completion(
             if metadata.get("chat_id") and metadata.get("message_id"):
                 # Update the chat message with the error
                 try:
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MESSAGE_EVENT_BUFFER.write(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1840,6 +1873,12 @@ async def get_app_changelog():
     return {key: CHANGELOG[key] for idx, key in enumerate(CHANGELOG) if idx < 5}
 
 
+@app.get("/api/http/pools")
+async def get_http_client_pool_stats(user=Depends(get_admin_user)):
+    """Connection pool statistics of the OpenAI and Ollama upstreams."""
+    return HTTP_CLIENT_POOL.stats()
+
+
 @app.get("/api/usage")
 async def get_current_usage(user=Depends(get_verified_user)):
     """
@@ -1847,7 +1886,10 @@ async def get_current_usage(user=Depends(get_verified_user)):
     This is an experimental endpoint and subject to change.
     """
     try:
-        return {"model_ids": get_models_in_use(), "user_ids": get_active_user_ids()}
+        return {
+            "model_ids": await get_models_in_use(),
+            "user_ids": await get_active_user_ids(),
+        }
     except Exception as e:
         log.error(f"Error getting usage statistics: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -0,0 +1,426 @@
+"""
+Reproducible RAG latency benchmark.
+
+Generates a synthetic corpus, ingests it with `save_docs_to_vector_db` and
+times `query_collection`, `query_collection_with_hybrid_search` and
+`get_sources_from_items` against one or more vector backends. Embeddings come
+from a deterministic hashing embedder, so no model download or network access
+is needed. Results are written as JSON:
+
+    python -m open_webui.retrieval.benchmark --backends chroma,numpy \\
+        --documents 200 --queries 50 --output rag-benchmark.json
+
+The vector backend is chosen when `open_webui.config` is imported, so each
+backend runs in its own subprocess with a throwaway DATA_DIR and SQLite
+database. Database, Redis and vector DB settings of the calling environment
+are not passed on: backends that need a server are only run when their
+connection is given explicitly (--qdrant-uri, --pgvector-url).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import List, Optional
+
+import numpy as np
+
+
+####################
+# Corpus and embeddings
+####################
+
+
+def generate_corpus(
+    documents: int, words: int, topics: int = 20, seed: int = 0
+) -> List[str]:
+    """Documents mixing words of a few topics, so that queries have true neighbours."""
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "qu", "ba", "di"]
+    vocabulary = list(
+        dict.fromkeys(
+            "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+            for _ in range(5000)
+        )
+    )
+    topic_words = [rng.sample(vocabulary, 200) for _ in range(topics)]
+
+    corpus = []
+    for _ in range(documents):
+        doc_topics = rng.sample(range(topics), 2)
+        sentences, sentence = [], []
+        for _ in range(words):
+            if rng.random() < 0.7:
+                sentence.append(rng.choice(topic_words[rng.choice(doc_topics)]))
+            else:
+                sentence.append(rng.choice(vocabulary))
+            if len(sentence) >= rng.randint(8, 20):
+                sentences.append(" ".join(sentence).capitalize() + ".")
+                sentence = []
+        corpus.append(" ".join(sentences))
+    return corpus
+
+
+def generate_queries(chunks: List[str], queries: int, seed: int = 0) -> List[str]:
+    """Short spans of random chunks."""
+    rng = random.Random(seed + 1)
+    result = []
+    for chunk in rng.sample(chunks, min(queries, len(chunks))):
+        words = chunk.split()
+        start = rng.randint(0, max(0, len(words) - 8))
+        result.append(" ".join(words[start : start + 8]))
+    return result
+
+
+@lru_cache(maxsize=100000)
+def hash_token(token: str, dimensions: int):
+    digest = hashlib.md5(token.encode()).digest()
+    index = int.from_bytes(digest[:4], "little") % dimensions
+    return index, 1.0 if digest[4] & 1 else -1.0
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedder (feature hashing), standing in for a
+    SentenceTransformer model: texts sharing words get similar vectors.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            index, sign = hash_token(token, self.dimensions)
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, prompt: Optional[str] = None, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            return self._embed(sentences)
+        return np.stack([self._embed(text) for text in sentences])
+
+
+####################
+# Measurements
+####################
+
+
+def summarize(latencies: List[float]) -> dict:
+    if not latencies:
+        return {}
+    values = np.asarray(latencies) * 1000
+    return {
+        "count": len(latencies),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "mean_ms": float(values.mean()),
+        "throughput_per_s": len(latencies) / float(np.sum(latencies)),
+    }
+
+
+def get_max_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class BenchmarkConfig(SimpleNamespace):
+    # Settings not given explicitly are unset, like an empty PersistentConfig
+    def __getattr__(self, name):
+        return None
+
+
+def run_backend(args) -> dict:
+    """Run the benchmark against the vector backend of this process."""
+    from langchain_core.documents import Document
+
+    from open_webui.config import VECTOR_DB
+    from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+    from open_webui.retrieval.utils import (
+        get_embedding_function,
+        get_sources_from_items,
+        query_collection,
+        query_collection_with_hybrid_search,
+    )
+    from open_webui.routers.retrieval import save_docs_to_vector_db, split_docs
+
+    embedder = HashingEmbedder(args.dimensions)
+    config = BenchmarkConfig(
+        TEXT_SPLITTER="character",
+        CHUNK_SIZE=args.chunk_size,
+        CHUNK_OVERLAP=args.chunk_overlap,
+        RAG_EMBEDDING_ENGINE="",
+        RAG_EMBEDDING_MODEL=f"hashing-{args.dimensions}",
+        RAG_EMBEDDING_BATCH_SIZE=64,
+    )
+    request = SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(config=config, ef=embedder))
+    )
+    embedding_function = get_embedding_function(
+        "", config.RAG_EMBEDDING_MODEL, embedder, None, None, 64
+    )
+
+    collection_name = "benchmark-collection"
+    if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+
+    corpus = generate_corpus(args.documents, args.words, seed=args.seed)
+    rss_before = get_max_rss_mb()
+
+    # Ingestion, one file at a time like knowledge base uploads
+    ingest_latencies = []
+    chunks = 0
+    for idx, text in enumerate(corpus):
+        docs = [Document(page_content=text, metadata={"name": f"doc-{idx}.txt"})]
+        chunks += len(split_docs(request, docs))
+        start = time.perf_counter()
+        save_docs_to_vector_db(
+            request,
+            docs,
+            collection_name,
+            metadata={"file_id": f"doc-{idx}", "name": f"doc-{idx}.txt"},
+            add=True,
+        )
+        ingest_latencies.append(time.perf_counter() - start)
+    ingest_seconds = sum(ingest_latencies)
+
+    # Ground truth: exact cosine neighbours over every stored chunk
+    stored = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+    stored_texts = stored.documents[0]
+    stored_vectors = embedder.encode(stored_texts)
+    queries = generate_queries(stored_texts, args.queries, seed=args.seed)
+    query_vectors = embedder.encode(queries)
+    exact = np.argsort(-(query_vectors @ stored_vectors.T), axis=1)[:, : args.k]
+
+    vector_latencies, recalls = [], []
+    for query, truth in zip(queries, exact):
+        start = time.perf_counter()
+        result = query_collection(
+            collection_names=[collection_name],
+            queries=[query],
+            embedding_function=embedding_function,
+            k=args.k,
+        )
+        vector_latencies.append(time.perf_counter() - start)
+        expected = {stored_texts[i] for i in truth}
+        recalls.append(len(expected & set(result["documents"][0])) / len(expected))
+
+    hybrid_latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        query_collection_with_hybrid_search(
+            collection_names=[collection_name],
+            queries=[query],
+            embedding_function=embedding_function,
+            k=args.k,
+            reranking_function=None,
+            k_reranker=args.k,
+            r=0.0,
+            hybrid_bm25_weight=args.hybrid_bm25_weight,
+        )
+        hybrid_latencies.append(time.perf_counter() - start)
+
+    sources_latencies = []
+
+    async def run_sources():
+        for query in queries:
+            start = time.perf_counter()
+            await get_sources_from_items(
+                request=request,
+                items=[{"collection_name": collection_name}],
+                queries=[query],
+                embedding_function=embedding_function,
+                k=args.k,
+                reranking_function=None,
+                k_reranker=args.k,
+                r=0.0,
+                hybrid_bm25_weight=args.hybrid_bm25_weight,
+                hybrid_search=args.hybrid,
+            )
+            sources_latencies.append(time.perf_counter() - start)
+
+    asyncio.run(run_sources())
+
+    VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+
+    return {
+        "backend": VECTOR_DB,
+        "status": "ok",
+        "ingestion": {
+            **summarize(ingest_latencies),
+            "documents": len(corpus),
+            "chunks": chunks,
+            "stored_chunks": len(stored_texts),
+            "chunks_per_s": chunks / ingest_seconds if ingest_seconds else None,
+        },
+        "query_collection": {
+            **summarize(vector_latencies),
+            f"recall_at_{args.k}": float(np.mean(recalls)) if recalls else None,
+        },
+        "query_collection_with_hybrid_search": summarize(hybrid_latencies),
+        "get_sources_from_items": summarize(sources_latencies),
+        "memory": {
+            "max_rss_mb": get_max_rss_mb(),
+            "max_rss_growth_mb": get_max_rss_mb() - rss_before,
+        },
+    }
+
+
+####################
+# Driver
+####################
+
+
+# Settings that could point the subprocess at a live deployment
+ISOLATED_ENV_PREFIXES = (
+    "DATABASE_",
+    "REDIS_",
+    "WEBSOCKET_REDIS_",
+    "CHROMA_",
+    "ELASTICSEARCH_",
+    "ENABLE_QDRANT_",
+    "MILVUS_",
+    "OPENSEARCH_",
+    "ORACLE_",
+    "PGVECTOR_",
+    "PINECONE_",
+    "QDRANT_",
+    "S3_VECTOR_",
+)
+
+# Backends storing their data in DATA_DIR, which need no connection
+EMBEDDED_BACKENDS = ["chroma", "numpy"]
+
+
+def get_backend_env(backend: str, args, data_dir: str) -> Optional[dict]:
+    """Environment of the subprocess benchmarking `backend`, None if not runnable."""
+    env = {
+        **{
+            key: value
+            for key, value in os.environ.items()
+            if not key.startswith(ISOLATED_ENV_PREFIXES)
+        },
+        "VECTOR_DB": backend,
+        "DATA_DIR": data_dir,
+        "DATABASE_URL": f"sqlite:///{os.path.join(data_dir, 'webui.db')}",
+        # Measure the backends, not the caches in front of them
+        "ENABLE_RAG_EMBEDDING_CACHE": "False",
+        "ENABLE_RAG_QUERY_CACHE": "False",
+        "RAG_RERANKING_CACHE_SIZE": "0",
+    }
+    if backend == "qdrant":
+        if not args.qdrant_uri:
+            return None
+        env["QDRANT_URI"] = args.qdrant_uri
+        env["QDRANT_COLLECTION_PREFIX"] = f"benchmark-{os.getpid()}"
+    elif backend == "pgvector":
+        if not args.pgvector_url:
+            return None
+        env["PGVECTOR_DB_URL"] = args.pgvector_url
+        env["PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH"] = str(args.dimensions)
+    elif backend not in EMBEDDED_BACKENDS:
+        return None
+    return env
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--backends",
+        default="chroma,qdrant,pgvector",
+        help="comma separated VECTOR_DB values",
+    )
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--words", type=int, default=800, help="words per document")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--hybrid-bm25-weight", type=float, default=0.5)
+    parser.add_argument(
+        "--hybrid",
+        action="store_true",
+        help="use hybrid search in get_sources_from_items",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--qdrant-uri", default=None)
+    parser.add_argument("--pgvector-url", default=None)
+    parser.add_argument("--output", default=None, help="JSON file, stdout if unset")
+    parser.add_argument("--worker-output", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker_output:
+        with open(args.worker_output, "w") as f:
+            json.dump(run_backend(args), f)
+        return
+
+    results = []
+    for backend in [name.strip() for name in args.backends.split(",") if name.strip()]:
+        with tempfile.TemporaryDirectory(prefix=f"rag-benchmark-{backend}-") as tmp:
+            env = get_backend_env(backend, args, tmp)
+            if env is None:
+                results.append(
+                    {
+                        "backend": backend,
+                        "status": "skipped",
+                        "reason": "no connection given",
+                    }
+                )
+                continue
+
+            worker_output = os.path.join(tmp, "result.json")
+            process = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "open_webui.retrieval.benchmark",
+                    *(argv if argv is not None else sys.argv[1:]),
+                    "--worker-output",
+                    worker_output,
+                ],
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if process.returncode == 0 and os.path.exists(worker_output):
+                with open(worker_output) as f:
+                    results.append(json.load(f))
+            else:
+                results.append(
+                    {
+                        "backend": backend,
+                        "status": "failed",
+                        "error": process.stderr.strip().splitlines()[-20:],
+                    }
+                )
+
+    report = {
+        "parameters": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ["output", "worker_output", "pgvector_url", "qdrant_uri"]
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
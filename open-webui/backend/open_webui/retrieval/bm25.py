@@ -0,0 +1,589 @@
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from open_webui.config import ENABLE_RAG_BM25_INDEX, RAG_BM25_INDEX_PATH
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bm25_collection (
+    name TEXT PRIMARY KEY,
+    doc_count INTEGER NOT NULL DEFAULT 0,
+    total_length INTEGER NOT NULL DEFAULT 0,
+    version INTEGER
+);
+CREATE TABLE IF NOT EXISTS bm25_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS bm25_document (
+    rowid INTEGER PRIMARY KEY AUTOINCREMENT,
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    metadata TEXT,
+    length INTEGER NOT NULL,
+    UNIQUE (collection, id)
+);
+CREATE TABLE IF NOT EXISTS bm25_posting (
+    collection TEXT NOT NULL,
+    term TEXT NOT NULL,
+    doc_rowid INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (collection, term, doc_rowid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bm25_posting_doc ON bm25_posting (doc_rowid);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Persistent inverted index used for the sparse (BM25) side of hybrid search.
+
+    Every vector DB collection gets its own logical index inside a single SQLite
+    database. Postings are maintained incrementally on insert and delete, so a
+    query only reads the postings of its own terms instead of rebuilding the
+    index from the full collection.
+
+    Collections that are not tracked yet (e.g. created before the index existed)
+    are back-filled lazily on first search via `ensure_collection`.
+
+    Index errors are logged and never propagated to the write path; a broken
+    or missing index only causes the collection to be rebuilt on next search.
+
+    Every node keeps its own index file. When a Redis connection is given,
+    each write bumps a shared version of the collection, and a node whose
+    index does not hold the current version (i.e. another node wrote to the
+    collection meanwhile) rebuilds it on next search.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        enabled: bool = True,
+        k1: float = 1.5,
+        b: float = 0.75,
+        redis=None,
+        redis_key_prefix: str = "open-webui",
+    ):
+        self.path = path
+        self.enabled = enabled
+        self.k1 = k1
+        self.b = b
+        self.redis = redis
+        # Collection versions are fields of a single hash, the epoch (bumped
+        # on reset) uses the empty field name which no collection can have
+        self.versions_key = f"{redis_key_prefix}:rag:bm25:versions"
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        if self.enabled:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = self._get_conn()
+                conn.executescript(SCHEMA)
+                columns = [
+                    row[1] for row in conn.execute("PRAGMA table_info(bm25_collection)")
+                ]
+                if "version" not in columns:
+                    # Index files created before the versions were tracked
+                    conn.execute(
+                        "ALTER TABLE bm25_collection ADD COLUMN version INTEGER"
+                    )
+                    conn.commit()
+                versions = self._get_shared_versions("")
+                if versions is not None:
+                    # A new index file holds nothing from before the last reset
+                    with conn:
+                        conn.execute(
+                            "INSERT OR IGNORE INTO bm25_meta (key, value) VALUES ('epoch', ?)",
+                            (str(versions[0]),),
+                        )
+            except Exception as e:
+                log.exception(f"Failed to initialize BM25 index at {self.path}: {e}")
+                self.enabled = False
+
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    ####################
+    # Versions
+    ####################
+
+    def _bump(self, field: str) -> Optional[int]:
+        """Bump the shared version of a collection, None without Redis."""
+        if self.redis is None:
+            return None
+        try:
+            return int(self.redis.hincrby(self.versions_key, field, 1))
+        except Exception as e:
+            log.error(f"Failed to bump BM25 index version of {field}: {e}")
+            return None
+
+    def _get_shared_versions(self, collection_name: str) -> Optional[List[int]]:
+        """Shared epoch and collection version, None if unknown."""
+        if self.redis is None:
+            return None
+        try:
+            values = self.redis.hmget(self.versions_key, ["", collection_name])
+            return [int(value or 0) for value in values]
+        except Exception as e:
+            log.error(f"Failed to read BM25 index versions: {e}")
+            return None
+
+    def _set_version(
+        self,
+        conn: sqlite3.Connection,
+        collection_name: str,
+        previous: Optional[int],
+        version: Optional[int],
+    ) -> None:
+        # The index only holds `version` if the write was the only one since
+        # the version it held, otherwise it is marked for a rebuild
+        conn.execute(
+            "UPDATE bm25_collection SET version = ? WHERE name = ?",
+            (
+                (
+                    version
+                    if previous is not None
+                    and version is not None
+                    and version == previous + 1
+                    else None
+                ),
+                collection_name,
+            ),
+        )
+
+    def _get_version(
+        self, conn: sqlite3.Connection, collection_name: str
+    ) -> Optional[int]:
+        row = conn.execute(
+            "SELECT version FROM bm25_collection WHERE name = ?", (collection_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    ####################
+    # Helpers
+    ####################
+
+    def _update_stats(self, conn: sqlite3.Connection, collection_name: str) -> None:
+        conn.execute(
+            """
+            UPDATE bm25_collection SET
+                doc_count = (SELECT COUNT(*) FROM bm25_document WHERE collection = ?),
+                total_length = (
+                    SELECT COALESCE(SUM(length), 0) FROM bm25_document WHERE collection = ?
+                )
+            WHERE name = ?
+            """,
+            (collection_name, collection_name, collection_name),
+        )
+
+    def _delete_rowids(self, conn: sqlite3.Connection, rowids: List[int]) -> None:
+        for i in range(0, len(rowids), 500):
+            batch = rowids[i : i + 500]
+            placeholders = ",".join("?" * len(batch))
+            conn.execute(
+                f"DELETE FROM bm25_posting WHERE doc_rowid IN ({placeholders})", batch
+            )
+            conn.execute(
+                f"DELETE FROM bm25_document WHERE rowid IN ({placeholders})", batch
+            )
+
+    def _find_rowids(
+        self,
+        conn: sqlite3.Connection,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> List[int]:
+        rowids = []
+        if ids:
+            for i in range(0, len(ids), 500):
+                batch = ids[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rowids.extend(
+                    row[0]
+                    for row in conn.execute(
+                        f"SELECT rowid FROM bm25_document WHERE collection = ? AND id IN ({placeholders})",
+                        [collection_name, *batch],
+                    )
+                )
+        elif filter:
+            for rowid, metadata in conn.execute(
+                "SELECT rowid, metadata FROM bm25_document WHERE collection = ?",
+                (collection_name,),
+            ):
+                metadata = json.loads(metadata) if metadata else {}
+                if all(metadata.get(key) == value for key, value in filter.items()):
+                    rowids.append(rowid)
+        return rowids
+
+    def _add_items(
+        self, conn: sqlite3.Connection, collection_name: str, items: List[Dict]
+    ) -> None:
+        # Re-inserting an existing id replaces it, mirroring upsert semantics
+        existing = self._find_rowids(
+            conn, collection_name, ids=[item["id"] for item in items]
+        )
+        if existing:
+            self._delete_rowids(conn, existing)
+
+        for item in items:
+            tokens = tokenize(item["text"])
+            cursor = conn.execute(
+                "INSERT INTO bm25_document (collection, id, text, metadata, length) VALUES (?, ?, ?, ?, ?)",
+                (
+                    collection_name,
+                    item["id"],
+                    item["text"],
+                    json.dumps(item.get("metadata") or {}, default=str),
+                    len(tokens),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO bm25_posting (collection, term, doc_rowid, tf) VALUES (?, ?, ?, ?)",
+                [
+                    (collection_name, term, cursor.lastrowid, tf)
+                    for term, tf in Counter(tokens).items()
+                ],
+            )
+
+    ####################
+    # Public API
+    ####################
+
+    def has_collection(self, collection_name: str) -> bool:
+        if not self.enabled:
+            return False
+        try:
+            row = (
+                self._get_conn()
+                .execute(
+                    "SELECT 1 FROM bm25_collection WHERE name = ?", (collection_name,)
+                )
+                .fetchone()
+            )
+            return row is not None
+        except Exception as e:
+            log.exception(f"BM25 index lookup failed for {collection_name}: {e}")
+            return False
+
+    def create_collection(
+        self, collection_name: str, items: Optional[List[Dict]] = None
+    ) -> None:
+        """(Re)create the index for a collection, optionally seeding it with items."""
+        if not self.enabled:
+            return
+        version = self._bump(collection_name)
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                with conn:
+                    # Built from all items, the index holds exactly this version
+                    self._build_collection(conn, collection_name, items, version)
+        except Exception as e:
+            log.exception(f"Failed to create BM25 index for {collection_name}: {e}")
+
+    def _build_collection(
+        self,
+        conn: sqlite3.Connection,
+        collection_name: str,
+        items: Optional[List[Dict]],
+        version: Optional[int] = None,
+    ) -> None:
+        self._delete_collection(conn, collection_name)
+        conn.execute(
+            "INSERT INTO bm25_collection (name, version) VALUES (?, ?)",
+            (collection_name, version),
+        )
+        if items:
+            self._add_items(conn, collection_name, items)
+        self._update_stats(conn, collection_name)
+
+    def add(self, collection_name: str, items: List[Dict]) -> None:
+        """
+        Add items ({"id", "text", "metadata"}) to a tracked collection.
+        Untracked collections are left alone and back-filled on first search.
+        """
+        if not self.enabled or not items:
+            return
+        version = self._bump(collection_name)
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                with conn:
+                    if not conn.execute(
+                        "SELECT 1 FROM bm25_collection WHERE name = ?",
+                        (collection_name,),
+                    ).fetchone():
+                        return
+                    previous = self._get_version(conn, collection_name)
+                    self._add_items(conn, collection_name, items)
+                    self._update_stats(conn, collection_name)
+                    self._set_version(conn, collection_name, previous, version)
+        except Exception as e:
+            log.exception(f"Failed to update BM25 index for {collection_name}: {e}")
+            self.delete_collection(collection_name)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        if not ids and not filter:
+            self.delete_collection(collection_name)
+            return
+        version = self._bump(collection_name)
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                with conn:
+                    previous = self._get_version(conn, collection_name)
+                    rowids = self._find_rowids(conn, collection_name, ids, filter)
+                    if rowids:
+                        self._delete_rowids(conn, rowids)
+                        self._update_stats(conn, collection_name)
+                    self._set_version(conn, collection_name, previous, version)
+        except Exception as e:
+            log.exception(f"Failed to delete from BM25 index {collection_name}: {e}")
+            self.delete_collection(collection_name)
+
+    def _delete_collection(self, conn: sqlite3.Connection, collection_name: str):
+        conn.execute(
+            "DELETE FROM bm25_posting WHERE collection = ?", (collection_name,)
+        )
+        conn.execute(
+            "DELETE FROM bm25_document WHERE collection = ?", (collection_name,)
+        )
+        conn.execute("DELETE FROM bm25_collection WHERE name = ?", (collection_name,))
+
+    def delete_collection(self, collection_name: str) -> None:
+        if not self.enabled:
+            return
+        self._bump(collection_name)
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                with conn:
+                    self._delete_collection(conn, collection_name)
+        except Exception as e:
+            log.exception(f"Failed to delete BM25 index {collection_name}: {e}")
+
+    def reset(self) -> None:
+        if not self.enabled:
+            return
+        epoch = self._bump("")
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                with conn:
+                    self._reset(conn, epoch)
+        except Exception as e:
+            log.exception(f"Failed to reset BM25 index: {e}")
+
+    def _reset(self, conn: sqlite3.Connection, epoch: Optional[int]) -> None:
+        conn.execute("DELETE FROM bm25_posting")
+        conn.execute("DELETE FROM bm25_document")
+        conn.execute("DELETE FROM bm25_collection")
+        conn.execute(
+            "INSERT OR REPLACE INTO bm25_meta (key, value) VALUES ('epoch', ?)",
+            (str(epoch or 0),),
+        )
+
+    def is_current(self, collection_name: str) -> bool:
+        """
+        Whether the index of the collection is tracked and, with Redis, holds
+        the latest shared version (no other node wrote to it meanwhile).
+        """
+        if not self.has_collection(collection_name):
+            return False
+
+        versions = self._get_shared_versions(collection_name)
+        if versions is None:
+            return True
+
+        epoch, version = versions
+        conn = self._get_conn()
+        row = conn.execute("SELECT value FROM bm25_meta WHERE key = 'epoch'").fetchone()
+        if int(row[0] if row else 0) != epoch:
+            # Another node reset the index, everything here is stale
+            with self._lock:
+                with conn:
+                    self._reset(conn, epoch)
+            return False
+        return self._get_version(conn, collection_name) == version
+
+    def ensure_collection(
+        self, collection_name: str, fetch: Callable[[], Optional[Any]]
+    ) -> bool:
+        """
+        Make sure the collection is indexed, back-filling it from `fetch`
+        (a callable returning a GetResult) if it is not tracked yet.
+        """
+        if not self.enabled:
+            return False
+        if self.is_current(collection_name):
+            return True
+
+        # Read the version first, a write racing the fetch triggers a rebuild
+        versions = self._get_shared_versions(collection_name)
+        version = versions[1] if versions is not None else None
+
+        log.info(f"Building BM25 index for collection {collection_name}")
+        result = fetch()
+        items = []
+        if result is not None and result.ids:
+            items = [
+                {
+                    "id": str(id),
+                    "text": result.documents[0][idx],
+                    "metadata": result.metadatas[0][idx],
+                }
+                for idx, id in enumerate(result.ids[0])
+            ]
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                with conn:
+                    self._build_collection(conn, collection_name, items, version)
+        except Exception as e:
+            log.exception(f"Failed to build BM25 index for {collection_name}: {e}")
+        return self.has_collection(collection_name)
+
+    def count(self, collection_name: str) -> int:
+        if not self.enabled:
+            return 0
+        row = (
+            self._get_conn()
+            .execute(
+                "SELECT doc_count FROM bm25_collection WHERE name = ?",
+                (collection_name,),
+            )
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def search(self, collection_name: str, query: str, k: int) -> List[Document]:
+        if not self.enabled:
+            return []
+
+        conn = self._get_conn()
+        stats = conn.execute(
+            "SELECT doc_count, total_length FROM bm25_collection WHERE name = ?",
+            (collection_name,),
+        ).fetchone()
+        if not stats or not stats[0]:
+            return []
+
+        doc_count, total_length = stats
+        avg_length = (total_length / doc_count) or 1.0
+
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = conn.execute(
+                """
+                SELECT p.doc_rowid, p.tf, d.length
+                FROM bm25_posting p JOIN bm25_document d ON d.rowid = p.doc_rowid
+                WHERE p.collection = ? AND p.term = ?
+                """,
+                (collection_name, term),
+            ).fetchall()
+            if not postings:
+                continue
+
+            df = len(postings)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for rowid, tf, length in postings:
+                scores[rowid] += (
+                    idf
+                    * tf
+                    * (self.k1 + 1)
+                    / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+                )
+
+        top = heapq.nlargest(k, scores.items(), key=lambda x: x[1])
+        if not top:
+            return []
+
+        placeholders = ",".join("?" * len(top))
+        rows = {
+            rowid: (text, metadata)
+            for rowid, text, metadata in conn.execute(
+                f"SELECT rowid, text, metadata FROM bm25_document WHERE rowid IN ({placeholders})",
+                [rowid for rowid, _ in top],
+            )
+        }
+
+        return [
+            Document(
+                page_content=rows[rowid][0],
+                metadata=json.loads(rows[rowid][1]) if rows[rowid][1] else {},
+            )
+            for rowid, _ in top
+            if rowid in rows
+        ]
+
+
+def get_bm25_redis():
+    if not (ENABLE_RAG_BM25_INDEX and REDIS_URL):
+        return None
+    try:
+        return get_redis_connection(
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+            redis_cluster=REDIS_CLUSTER,
+            decode_responses=True,
+        )
+    except Exception as e:
+        log.error(f"Failed to connect the BM25 index to Redis: {e}")
+        return None
+
+
+BM25_INDEX = BM25Index(
+    RAG_BM25_INDEX_PATH,
+    enabled=ENABLE_RAG_BM25_INDEX,
+    redis=get_bm25_redis(),
+    redis_key_prefix=REDIS_KEY_PREFIX,
+)
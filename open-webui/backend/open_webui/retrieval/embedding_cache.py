@@ -0,0 +1,310 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from open_webui.config import (
+    ENABLE_RAG_EMBEDDING_CACHE,
+    RAG_EMBEDDING_CACHE_PATH,
+    RAG_EMBEDDING_CACHE_MAX_SIZE_MB,
+    RAG_EMBEDDING_CACHE_MEMORY_SIZE,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embedding_cache_accessed_at ON embedding_cache (accessed_at);
+"""
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache for embeddings, keyed by
+    (engine, base URL, model, prefix, sha256(text)).
+
+    Lookups go through an in-memory LRU first and then a SQLite store on disk,
+    which is shared between workers. The disk store is bounded by size and
+    evicts the least recently used entries once the limit is exceeded.
+    Vectors are stored as float32, in memory as well (`array("f")`, a quarter
+    of the size of a list of Python floats) and converted to lists on reads.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        enabled: bool = True,
+        max_size_bytes: int = 1024 * 1024 * 1024,
+        memory_size: int = 10000,
+    ):
+        self.path = path
+        self.enabled = enabled
+        self.max_size_bytes = max_size_bytes
+        self.memory_size = memory_size
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._bytes_since_eviction = 0
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.enabled:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._get_conn().executescript(SCHEMA)
+                self._evict()
+            except Exception as e:
+                log.exception(
+                    f"Failed to initialize embedding cache at {self.path}: {e}"
+                )
+                self.enabled = False
+
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(
+        engine: str, model: str, prefix: Optional[str], text: str, url: str = ""
+    ) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+        parts = [engine or "", model or "", prefix or "", text_hash]
+        if url:
+            # Two endpoints serving the same model name may not share vectors
+            parts.insert(1, url.rstrip("/"))
+        return hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+
+    ####################
+    # Memory LRU
+    ####################
+
+    def _memory_get(self, key: str) -> Optional[array]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+            return vector
+
+    def _memory_put(self, key: str, vector: array) -> None:
+        if self.memory_size <= 0:
+            return
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    ####################
+    # Disk store
+    ####################
+
+    def _evict(self) -> None:
+        conn = self._get_conn()
+        total, count = conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM embedding_cache"
+        ).fetchone()
+        self._bytes_since_eviction = 0
+        if total <= self.max_size_bytes or not count:
+            return
+
+        # Evict down to 90% of the limit to avoid evicting on every write
+        excess = total - int(self.max_size_bytes * 0.9)
+        n = max(1, int(excess / (total / count)) + 1)
+        with conn:
+            conn.execute(
+                "DELETE FROM embedding_cache WHERE key IN "
+                "(SELECT key FROM embedding_cache ORDER BY accessed_at LIMIT ?)",
+                (n,),
+            )
+        self.evictions += n
+        log.debug(f"embedding cache: evicted {n} entries")
+
+    def get_many(
+        self,
+        engine: str,
+        model: str,
+        prefix: Optional[str],
+        texts: List[str],
+        url: str = "",
+    ) -> List[Optional[List[float]]]:
+        if not self.enabled:
+            return [None] * len(texts)
+
+        keys = [self.make_key(engine, model, prefix, text, url) for text in texts]
+        results = [self._memory_get(key) for key in keys]
+        self.memory_hits += sum(1 for vector in results if vector is not None)
+
+        missing = list({key for key, vector in zip(keys, results) if vector is None})
+        found = {}
+        if missing:
+            try:
+                conn = self._get_conn()
+                for i in range(0, len(missing), 500):
+                    batch = missing[i : i + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    for key, blob in conn.execute(
+                        f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})",
+                        batch,
+                    ):
+                        vector = array("f")
+                        vector.frombytes(blob)
+                        found[key] = vector
+
+                if found:
+                    with conn:
+                        conn.executemany(
+                            "UPDATE embedding_cache SET accessed_at = ? WHERE key = ?",
+                            [(time.time(), key) for key in found],
+                        )
+            except Exception as e:
+                log.exception(f"embedding cache lookup failed: {e}")
+
+        for idx, key in enumerate(keys):
+            if results[idx] is None and key in found:
+                results[idx] = found[key]
+                self._memory_put(key, found[key])
+
+        hits = sum(1 for vector in results if vector is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return [vector.tolist() if vector is not None else None for vector in results]
+
+    def put_many(
+        self,
+        engine: str,
+        model: str,
+        prefix: Optional[str],
+        texts: List[str],
+        embeddings: List[List[float]],
+        url: str = "",
+    ) -> None:
+        if not self.enabled:
+            return
+
+        rows = []
+        now = time.time()
+        for text, embedding in zip(texts, embeddings):
+            if embedding is None:
+                continue
+            key = self.make_key(engine, model, prefix, text, url)
+            vector = array("f", embedding)
+            blob = vector.tobytes()
+            rows.append((key, blob, len(blob), now))
+            self._memory_put(key, vector)
+
+        if not rows:
+            return
+
+        try:
+            conn = self._get_conn()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (key, vector, size, accessed_at) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+            self._bytes_since_eviction += sum(row[2] for row in rows)
+            if self._bytes_since_eviction > self.max_size_bytes / 100:
+                self._evict()
+        except Exception as e:
+            log.exception(f"embedding cache write failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if not self.enabled:
+            return
+        conn = self._get_conn()
+        with conn:
+            conn.execute("DELETE FROM embedding_cache")
+
+    def stats(self) -> dict:
+        entries, size = 0, 0
+        if self.enabled:
+            entries, size = (
+                self._get_conn()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embedding_cache")
+                .fetchone()
+            )
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "entries": entries,
+            "size_bytes": size,
+            "max_size_bytes": self.max_size_bytes,
+        }
+
+
+def with_embedding_cache(
+    embedding_function: Callable, engine: str, model: str, url: str = ""
+) -> Callable:
+    """
+    Wrap an embedding function returned by `get_embedding_function` so that
+    only texts missing from the cache are sent to the embedding engine.
+    """
+    if not EMBEDDING_CACHE.enabled:
+        return embedding_function
+
+    def cached_embedding_function(query, prefix=None, user=None):
+        texts = query if isinstance(query, list) else [query]
+        embeddings = EMBEDDING_CACHE.get_many(engine, model, prefix, texts, url)
+
+        missing = list(
+            dict.fromkeys(
+                text for text, embedding in zip(texts, embeddings) if embedding is None
+            )
+        )
+        if missing:
+            generated = embedding_function(missing, prefix=prefix, user=user)
+            if generated is None or len(generated) != len(missing):
+                log.warning(
+                    "embedding function returned no or partial results, skipping cache"
+                )
+                return None
+
+            EMBEDDING_CACHE.put_many(engine, model, prefix, missing, generated, url)
+
+            generated_by_text = dict(zip(missing, generated))
+            embeddings = [
+                (embedding if embedding is not None else generated_by_text[texts[idx]])
+                for idx, embedding in enumerate(embeddings)
+            ]
+
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+    return cached_embedding_function
+
+
+EMBEDDING_CACHE = EmbeddingCache(
+    RAG_EMBEDDING_CACHE_PATH,
+    enabled=ENABLE_RAG_EMBEDDING_CACHE,
+    max_size_bytes=RAG_EMBEDDING_CACHE_MAX_SIZE_MB * 1024 * 1024,
+    memory_size=RAG_EMBEDDING_CACHE_MEMORY_SIZE,
+)
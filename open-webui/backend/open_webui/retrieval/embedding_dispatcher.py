@@ -0,0 +1,326 @@
+import asyncio
+import logging
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional, Union
+from urllib.parse import quote
+
+import aiohttp
+
+from open_webui.config import (
+    RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    RAG_EMBEDDING_CONCURRENT_REQUESTS,
+    RAG_EMBEDDING_POOL_SIZE,
+    RAG_EMBEDDING_MAX_RETRIES,
+)
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    AIOHTTP_CLIENT_TIMEOUT,
+    AIOHTTP_CLIENT_SESSION_SSL,
+    ENABLE_FORWARD_USER_INFO_HEADERS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Transient failures, retried with backoff (honouring Retry-After)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Batch rejected as too large, retried as two smaller batches
+SPLIT_STATUS_CODES = {400, 413}
+
+MAX_RETRY_DELAY = 60
+
+
+class EmbeddingRequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Embedding request failed with status {status}: {message}")
+        self.status = status
+
+
+def get_embedding_request(
+    engine: str,
+    model: str,
+    texts: list[str],
+    url: str,
+    key: str = "",
+    prefix: Optional[str] = None,
+    user=None,
+    azure_api_version: Optional[str] = None,
+) -> tuple[str, dict, dict]:
+    """Return the (url, headers, payload) of a batch embedding request for an engine."""
+    headers = {"Content-Type": "application/json"}
+    if engine == "azure_openai":
+        headers["api-key"] = key
+    else:
+        headers["Authorization"] = f"Bearer {key}"
+
+    if ENABLE_FORWARD_USER_INFO_HEADERS and user:
+        headers.update(
+            {
+                "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                "X-OpenWebUI-User-Id": user.id,
+                "X-OpenWebUI-User-Email": user.email,
+                "X-OpenWebUI-User-Role": user.role,
+            }
+        )
+
+    payload = {"input": texts}
+    if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
+        payload[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+    if engine == "ollama":
+        payload["model"] = model
+        return f"{url}/api/embed", headers, payload
+    elif engine == "openai":
+        payload["model"] = model
+        return f"{url}/embeddings", headers, payload
+    elif engine == "azure_openai":
+        return (
+            f"{url}/openai/deployments/{model}/embeddings?api-version={azure_api_version}",
+            headers,
+            payload,
+        )
+    else:
+        raise ValueError(f"Unknown embedding engine: {engine}")
+
+
+def parse_embedding_response(engine: str, data: dict) -> list[list[float]]:
+    if engine == "ollama":
+        if "embeddings" in data:
+            return data["embeddings"]
+    elif "data" in data:
+        return [
+            elem["embedding"]
+            for elem in sorted(data["data"], key=lambda elem: elem.get("index", 0))
+        ]
+    raise Exception("Something went wrong :/")
+
+
+def get_retry_delay(retry_after: Optional[str], attempt: int) -> float:
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_RETRY_DELAY)
+        except ValueError:
+            try:
+                delta = parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)
+                return min(max(delta.total_seconds(), 0), MAX_RETRY_DELAY)
+            except Exception:
+                pass
+    # Exponential backoff with jitter
+    return min(2**attempt, MAX_RETRY_DELAY) * (0.5 + random.random() / 2)
+
+
+class EmbeddingDispatcher:
+    """
+    Dispatches batch embedding requests to remote engines.
+
+    All requests share one keep-alive aiohttp connection pool, owned by an
+    event loop running in a background thread so that synchronous callers
+    (ingestion runs in the thread pool) can use it too. Batches of a single
+    call are sent concurrently, bounded by `max_concurrency`.
+
+    Every engine is retried on 429/5xx with Retry-After aware backoff. When an
+    engine rejects a batch as too large (400/413) the batch is split in half,
+    and the smaller size is remembered for later batches to that endpoint.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        pool_size: int = 16,
+        max_retries: int = 5,
+        timeout: Optional[int] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.pool_size = max(1, pool_size)
+        self.max_retries = max(0, max_retries)
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Learned batch size ceilings per (engine, url, model)
+        self._batch_size_limits: dict[tuple, int] = {}
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="embedding-dispatcher", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Only called from the dispatcher loop, so no locking needed
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    keepalive_timeout=60,
+                    ttl_dns_cache=300,
+                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trust_env=True,
+            )
+        return self._session
+
+    async def _request(
+        self, engine: str, model: str, texts: list[str], **kwargs
+    ) -> list[list[float]]:
+        url, headers, payload = get_embedding_request(engine, model, texts, **kwargs)
+        session = self._get_session()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with session.post(url, headers=headers, json=payload) as r:
+                    if r.status in RETRY_STATUS_CODES and attempt < self.max_retries:
+                        delay = get_retry_delay(r.headers.get("Retry-After"), attempt)
+                        log.warning(
+                            f"{engine} embeddings returned {r.status}, retrying in {delay:.1f}s"
+                        )
+                        await asyncio.sleep(delay)
+                        continue
+
+                    if r.status >= 400:
+                        raise EmbeddingRequestError(r.status, await r.text())
+
+                    embeddings = parse_embedding_response(engine, await r.json())
+                    if len(embeddings) != len(texts):
+                        raise Exception(
+                            f"Expected {len(texts)} embeddings, got {len(embeddings)}"
+                        )
+                    return embeddings
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = get_retry_delay(None, attempt)
+                log.warning(
+                    f"{engine} embeddings failed ({e}), retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    async def _request_with_split(
+        self, limit_key: tuple, engine: str, model: str, texts: list[str], **kwargs
+    ) -> list[list[float]]:
+        try:
+            return await self._request(engine, model, texts, **kwargs)
+        except EmbeddingRequestError as e:
+            if e.status not in SPLIT_STATUS_CODES or len(texts) <= 1:
+                raise
+
+        half = len(texts) // 2
+        log.info(f"{engine} embeddings rejected a batch of {len(texts)}, splitting")
+        embeddings = await self._request_with_split(
+            limit_key, engine, model, texts[:half], **kwargs
+        )
+        embeddings += await self._request_with_split(
+            limit_key, engine, model, texts[half:], **kwargs
+        )
+
+        # Both halves succeeded, so the batch size was the problem
+        self._batch_size_limits[limit_key] = min(
+            self._batch_size_limits.get(limit_key, len(texts)), half
+        )
+        return embeddings
+
+    async def aembed(
+        self,
+        engine: str,
+        model: str,
+        texts: list[str],
+        batch_size: int,
+        url: str,
+        key: str = "",
+        prefix: Optional[str] = None,
+        user=None,
+        azure_api_version: Optional[str] = None,
+    ) -> list[list[float]]:
+        if prefix is not None and RAG_EMBEDDING_PREFIX_FIELD_NAME is None:
+            texts = [f"{prefix}{text}" for text in texts]
+
+        kwargs = {
+            "url": url,
+            "key": key,
+            "prefix": prefix,
+            "user": user,
+            "azure_api_version": azure_api_version,
+        }
+        limit_key = (engine, url, model)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_batch(batch: list[str]) -> list[list[float]]:
+            try:
+                return await self._request_with_split(
+                    limit_key, engine, model, batch, **kwargs
+                )
+            finally:
+                semaphore.release()
+
+        # Batches are sliced lazily so a learned size limit applies to the rest
+        tasks = []
+        offset = 0
+        try:
+            while offset < len(texts):
+                await semaphore.acquire()
+                size = min(
+                    max(1, batch_size),
+                    self._batch_size_limits.get(limit_key, batch_size),
+                )
+                batch = texts[offset : offset + size]
+                tasks.append(asyncio.create_task(run_batch(batch)))
+                offset += len(batch)
+
+            log.debug(
+                f"aembed:{engine} {len(texts)} texts in {len(tasks)} batches "
+                f"({self.max_concurrency} concurrent)"
+            )
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return [embedding for batch in results for embedding in batch]
+
+    def embed(
+        self,
+        engine: str,
+        model: str,
+        texts: Union[str, list[str]],
+        batch_size: int,
+        url: str,
+        key: str = "",
+        prefix: Optional[str] = None,
+        user=None,
+        azure_api_version: Optional[str] = None,
+    ) -> Union[list[float], list[list[float]]]:
+        """Blocking entry point, usable from any thread other than the dispatcher loop."""
+        embeddings = asyncio.run_coroutine_threadsafe(
+            self.aembed(
+                engine,
+                model,
+                texts if isinstance(texts, list) else [texts],
+                batch_size,
+                url,
+                key=key,
+                prefix=prefix,
+                user=user,
+                azure_api_version=azure_api_version,
+            ),
+            self._get_loop(),
+        ).result()
+        return embeddings if isinstance(texts, list) else embeddings[0]
+
+
+EMBEDDING_DISPATCHER = EmbeddingDispatcher(
+    max_concurrency=RAG_EMBEDDING_CONCURRENT_REQUESTS,
+    pool_size=RAG_EMBEDDING_POOL_SIZE,
+    max_retries=RAG_EMBEDDING_MAX_RETRIES,
+    timeout=AIOHTTP_CLIENT_TIMEOUT,
+)
@@ -3,6 +3,7 @@ import logging
 import ftfy
 import sys
 import json
+from typing import Iterator, Optional
 
 from azure.identity import DefaultAzureCredential
 from langchain_community.document_loaders import (
@@ -27,6 +28,16 @@ from open_webui.retrieval.loaders.external_document import ExternalDocumentLoade
 
 from open_webui.retrieval.loaders.mistral import MistralLoader
 from open_webui.retrieval.loaders.datalab_marker import DatalabMarkerLoader
+from open_webui.retrieval.loaders.parallel import (
+    get_page_count,
+    is_pdf_range_extraction_supported,
+    lazy_load_parallel,
+)
+from open_webui.config import (
+    ENABLE_PARALLEL_DOCUMENT_EXTRACTION,
+    DOCUMENT_EXTRACTION_WORKERS,
+    DOCUMENT_EXTRACTION_PAGES_PER_TASK,
+)
 
 
 from open_webui.env import SRC_LOG_LEVELS, GLOBAL_LOG_LEVEL
@@ -215,15 +226,47 @@ class Loader:
     def load(
         self, filename: str, file_content_type: str, file_path: str
     ) -> list[Document]:
+        return list(self.lazy_load(filename, file_content_type, file_path))
+
+    def lazy_load(
+        self, filename: str, file_content_type: str, file_path: str
+    ) -> Iterator[Document]:
         loader = self._get_loader(filename, file_content_type, file_path)
-        docs = loader.load()
 
-        return [
-            Document(
+        file_type = self._get_parallel_file_type(filename, loader)
+        if file_type:
+            page_count = get_page_count(file_type, file_path)
+            if page_count and page_count > DOCUMENT_EXTRACTION_PAGES_PER_TASK:
+                yield from lazy_load_parallel(
+                    file_type,
+                    file_path,
+                    page_count,
+                    pages_per_task=DOCUMENT_EXTRACTION_PAGES_PER_TASK,
+                    max_workers=DOCUMENT_EXTRACTION_WORKERS,
+                    extract_images=bool(self.kwargs.get("PDF_EXTRACT_IMAGES")),
+                )
+                return
+
+        for doc in loader.load():
+            yield Document(
                 page_content=ftfy.fix_text(doc.page_content), metadata=doc.metadata
             )
-            for doc in docs
-        ]
+
+    def _get_parallel_file_type(self, filename: str, loader) -> Optional[str]:
+        """File type to extract in parallel page ranges, if the file qualifies."""
+        if (
+            not ENABLE_PARALLEL_DOCUMENT_EXTRACTION
+            or DOCUMENT_EXTRACTION_PAGES_PER_TASK < 1
+        ):
+            return None
+
+        file_ext = filename.split(".")[-1].lower()
+        if isinstance(loader, PyPDFLoader) and is_pdf_range_extraction_supported():
+            return "pdf"
+        # .ppt files cannot be split
+        if isinstance(loader, UnstructuredPowerPointLoader) and file_ext == "pptx":
+            return "pptx"
+        return None
 
     def _is_text_file(self, file_ext: str, file_content_type: str) -> bool:
         return file_ext in known_source_ext or (
@@ -0,0 +1,236 @@
+"""
+Parallel extraction of page oriented documents.
+
+Large PDF and PPTX files are split into page ranges which are extracted and
+cleaned in a shared process pool. The documents are yielded in page order as
+soon as the leading ranges are done, so consumers can start before the whole
+file is extracted. The workers only import this module, keep it light.
+"""
+
+import io
+import logging
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Iterator, List, Optional
+
+import ftfy
+from langchain_core.documents import Document
+
+log = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a threaded server process is unsafe, always spawn. The
+            # workers are kept for the life of the process, as importing the
+            # parsers takes seconds
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, max_workers),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def reset_extraction_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def clean_documents(docs: List[Document]) -> List[Document]:
+    return [
+        Document(page_content=ftfy.fix_text(doc.page_content), metadata=doc.metadata)
+        for doc in docs
+    ]
+
+
+####################
+# Page counts
+####################
+
+
+def get_page_count(file_type: str, file_path: str) -> Optional[int]:
+    """Number of pages (slides) of the file, None if it cannot be split."""
+    try:
+        if file_type == "pdf":
+            from pypdf import PdfReader
+
+            return len(PdfReader(file_path).pages)
+        elif file_type == "pptx":
+            from pptx import Presentation
+
+            return len(Presentation(file_path).slides)
+    except Exception as e:
+        log.warning(f"Failed to count the pages of {file_path}: {e}")
+    return None
+
+
+####################
+# Workers
+####################
+
+
+@lru_cache(maxsize=1)
+def is_pdf_range_extraction_supported() -> bool:
+    """
+    Whether the private langchain-community helpers extract_pdf_pages mirrors
+    PyPDFParser with are available; they may change with any release.
+    """
+    try:
+        from langchain_community.document_loaders.parsers.pdf import (
+            _merge_text_and_extras,
+            _purge_metadata,
+            _validate_metadata,
+        )
+    except ImportError as e:
+        log.warning(f"Parallel PDF extraction unavailable, using PyPDFLoader: {e}")
+        return False
+    return True
+
+
+def extract_pdf_pages(
+    file_path: str, start: int, stop: int, extract_images: bool = False
+) -> List[Document]:
+    """
+    Documents of pages [start, stop), identical to those PyPDFLoader yields
+    for these pages.
+    """
+    try:
+        return _extract_pdf_pages(file_path, start, stop, extract_images)
+    except (ImportError, AttributeError) as e:
+        # The langchain-community internals changed, extract the whole file
+        from langchain_community.document_loaders import PyPDFLoader
+
+        log.warning(f"Falling back to PyPDFLoader for pages {start}-{stop}: {e}")
+        loader = PyPDFLoader(file_path, extract_images=extract_images)
+        return clean_documents(list(loader.lazy_load())[start:stop])
+
+
+def _extract_pdf_pages(
+    file_path: str, start: int, stop: int, extract_images: bool
+) -> List[Document]:
+    import pypdf
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain_community.document_loaders.parsers.pdf import (
+        _merge_text_and_extras,
+        _purge_metadata,
+        _validate_metadata,
+    )
+
+    # Mirrors PyPDFParser.lazy_parse, for a range of pages only
+    parser = PyPDFLoader(file_path, extract_images=extract_images).parser
+    reader = pypdf.PdfReader(file_path)
+    doc_metadata = _purge_metadata(
+        {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+        | dict(reader.metadata or {})
+        | {"source": file_path, "total_pages": len(reader.pages)}
+    )
+
+    docs = []
+    for page_number in range(start, min(stop, len(reader.pages))):
+        page = reader.pages[page_number]
+        text = page.extract_text(
+            extraction_mode=parser.extraction_mode, **parser.extraction_kwargs
+        )
+        images = parser.extract_images_from_page(page)
+        docs.append(
+            Document(
+                page_content=_merge_text_and_extras([images], text).strip(),
+                metadata=_validate_metadata(
+                    doc_metadata
+                    | {
+                        "page": page_number,
+                        "page_label": reader.page_labels[page_number],
+                    }
+                ),
+            )
+        )
+    return clean_documents(docs)
+
+
+def extract_pptx_slides(file_path: str, start: int, stop: int) -> List[Document]:
+    """Text of slides [start, stop), as UnstructuredPowerPointLoader extracts it."""
+    from pptx import Presentation
+    from unstructured.partition.pptx import partition_pptx
+
+    # Extract a copy of the deck holding only the slides of the range
+    presentation = Presentation(file_path)
+    slide_ids = presentation.slides._sldIdLst
+    for idx, slide_id in reversed(list(enumerate(slide_ids))):
+        if not start <= idx < stop:
+            presentation.part.drop_rel(slide_id.rId)
+            slide_ids.remove(slide_id)
+
+    data = io.BytesIO()
+    presentation.save(data)
+    data.seek(0)
+
+    elements = partition_pptx(file=data)
+    return clean_documents(
+        [
+            Document(
+                page_content="\n\n".join([str(el) for el in elements]),
+                metadata={"source": file_path},
+            )
+        ]
+    )
+
+
+####################
+# Loading
+####################
+
+
+def lazy_load_parallel(
+    file_type: str,
+    file_path: str,
+    page_count: int,
+    pages_per_task: int,
+    max_workers: int,
+    extract_images: bool = False,
+) -> Iterator[Document]:
+    """
+    Extract the file in ranges of `pages_per_task` pages on the shared pool,
+    yielding the cleaned documents in page order.
+    """
+    pool = get_extraction_pool(max_workers)
+    ranges = deque(
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    )
+    log.info(
+        f"Extracting {file_path} ({page_count} pages) in {len(ranges)} parallel tasks"
+    )
+
+    def submit(start: int, stop: int):
+        if file_type == "pdf":
+            return pool.submit(
+                extract_pdf_pages, file_path, start, stop, extract_images
+            )
+        return pool.submit(extract_pptx_slides, file_path, start, stop)
+
+    # Keep a bounded window of ranges in flight, so that a huge file neither
+    # monopolizes the pool nor piles up results nobody consumed yet
+    pending = deque()
+    try:
+        while ranges or pending:
+            while ranges and len(pending) < max(1, max_workers) * 2:
+                pending.append(submit(*ranges.popleft()))
+            yield from pending.popleft().result()
+    except BrokenProcessPool:
+        reset_extraction_pool()
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,316 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from open_webui.config import (
+    ENABLE_RAG_QUERY_CACHE,
+    RAG_QUERY_CACHE_TTL,
+    RAG_QUERY_CACHE_SIZE,
+)
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.retrieval.vector.main import VectorDBBase, VectorItem
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class QueryResultCache:
+    """
+    Cache of search results keyed by the queried collections, the query
+    (embedding) and the search parameters.
+
+    Every key embeds the current version of each collection it covers. Writes
+    to a collection bump its version, so results computed before the write
+    can never be served afterwards; they simply age out. Versions and results
+    are kept in Redis when a connection is given, so that all workers share
+    them, and in process memory otherwise.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        ttl: int = 600,
+        max_size: int = 1000,
+        redis=None,
+        redis_key_prefix: str = "open-webui",
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_size = max_size
+        self.redis = redis
+        self.prefix = f"{redis_key_prefix}:rag:query_cache"
+
+        self._results = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    ####################
+    # Versions
+    ####################
+
+    # Versions are fields of a single Redis hash, the epoch (bumped on reset)
+    # uses the empty field name which no collection can have
+    def get_versions(self, collection_names: List[str]) -> List[int]:
+        """Epoch followed by the version of each collection."""
+        if self.redis is not None:
+            values = self.redis.hmget(
+                f"{self.prefix}:versions", [""] + list(collection_names)
+            )
+            return [int(value or 0) for value in values]
+
+        with self._lock:
+            return [self._epoch] + [
+                self._versions.get(name, 0) for name in collection_names
+            ]
+
+    def bump(self, collection_name: str) -> None:
+        """Invalidate every cached result involving `collection_name`."""
+        if not self.enabled:
+            return
+        try:
+            if self.redis is not None:
+                self.redis.hincrby(f"{self.prefix}:versions", collection_name, 1)
+            else:
+                with self._lock:
+                    self._versions[collection_name] = (
+                        self._versions.get(collection_name, 0) + 1
+                    )
+        except Exception as e:
+            log.error(f"Failed to bump query cache version of {collection_name}: {e}")
+
+    def bump_all(self) -> None:
+        """Invalidate every cached result."""
+        if not self.enabled:
+            return
+        try:
+            if self.redis is not None:
+                self.redis.hincrby(f"{self.prefix}:versions", "", 1)
+            else:
+                with self._lock:
+                    self._epoch += 1
+                    self._results.clear()
+        except Exception as e:
+            log.error(f"Failed to reset query cache: {e}")
+
+    ####################
+    # Results
+    ####################
+
+    @staticmethod
+    def hash_embeddings(embeddings: List[List[float]]) -> str:
+        hasher = hashlib.sha256()
+        for embedding in embeddings:
+            hasher.update(array("f", embedding).tobytes())
+            hasher.update(b"\x00")
+        return hasher.hexdigest()
+
+    def make_key(self, collection_names: List[str], **params) -> Optional[str]:
+        """
+        Key of a result over `collection_names`, or None if the versions could
+        not be read (in which case the result must not be cached).
+        """
+        if not self.enabled:
+            return None
+        try:
+            versions = self.get_versions(collection_names)
+        except Exception as e:
+            log.error(f"Failed to read query cache versions: {e}")
+            return None
+
+        payload = json.dumps(
+            {
+                "collections": list(zip(collection_names, versions[1:])),
+                "epoch": versions[0],
+                "params": params,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[dict]:
+        if key is None:
+            return None
+
+        value = None
+        try:
+            if self.redis is not None:
+                value = self.redis.get(f"{self.prefix}:result:{key}")
+            else:
+                with self._lock:
+                    entry = self._results.get(key)
+                    if entry is not None:
+                        if entry[0] > time.monotonic():
+                            self._results.move_to_end(key)
+                            value = entry[1]
+                        else:
+                            del self._results[key]
+        except Exception as e:
+            log.error(f"Query cache lookup failed: {e}")
+
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    def put(self, key: Optional[str], result: dict) -> None:
+        if key is None or result is None:
+            return
+
+        try:
+            value = json.dumps(result, default=str)
+            if self.redis is not None:
+                self.redis.set(f"{self.prefix}:result:{key}", value, ex=self.ttl)
+            elif self.max_size > 0:
+                with self._lock:
+                    self._results[key] = (time.monotonic() + self.ttl, value)
+                    self._results.move_to_end(key)
+                    while len(self._results) > self.max_size:
+                        self._results.popitem(last=False)
+        except Exception as e:
+            log.error(f"Query cache write failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": "redis" if self.redis is not None else "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "entries": len(self._results) if self.redis is None else None,
+            "ttl": self.ttl,
+        }
+
+
+class VersionedVectorDBClient(VectorDBBase):
+    """
+    Vector DB client wrapper bumping the query cache version of every
+    collection written through it. Other attributes are passed through to the
+    wrapped client.
+    """
+
+    def __init__(self, client: VectorDBBase, cache: QueryResultCache):
+        self.client = client
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self.client.has_collection(collection_name)
+
+    def delete_collection(self, collection_name: str) -> None:
+        try:
+            return self.client.delete_collection(collection_name)
+        finally:
+            self.cache.bump(collection_name)
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        try:
+            return self.client.insert(collection_name, items)
+        finally:
+            self.cache.bump(collection_name)
+
+    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        try:
+            return self.client.upsert(collection_name, items)
+        finally:
+            self.cache.bump(collection_name)
+
+    def update_metadata(
+        self, collection_name: str, ids: List[str], metadatas: List[Any]
+    ) -> None:
+        try:
+            return self.client.update_metadata(collection_name, ids, metadatas)
+        finally:
+            self.cache.bump(collection_name)
+
+    def search(self, collection_name: str, vectors: List[List[float]], limit: int):
+        return self.client.search(collection_name, vectors, limit)
+
+    def query(self, collection_name: str, filter: Dict, limit: Optional[int] = None):
+        return self.client.query(collection_name, filter, limit)
+
+    def get(self, collection_name: str):
+        return self.client.get(collection_name)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        try:
+            return self.client.delete(collection_name, ids=ids, filter=filter)
+        finally:
+            self.cache.bump(collection_name)
+
+    def reset(self) -> None:
+        try:
+            return self.client.reset()
+        finally:
+            self.cache.bump_all()
+
+    async def asearch(
+        self, collection_name: str, vectors: List[List[float]], limit: int
+    ):
+        return await self.client.asearch(collection_name, vectors, limit)
+
+    async def aquery(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ):
+        return await self.client.aquery(collection_name, filter, limit)
+
+    async def aget(self, collection_name: str):
+        return await self.client.aget(collection_name)
+
+    async def ainsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        try:
+            return await self.client.ainsert(collection_name, items)
+        finally:
+            self.cache.bump(collection_name)
+
+
+def get_query_cache_redis():
+    if not (ENABLE_RAG_QUERY_CACHE and REDIS_URL):
+        return None
+    try:
+        return get_redis_connection(
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+            redis_cluster=REDIS_CLUSTER,
+            decode_responses=True,
+        )
+    except Exception as e:
+        log.error(f"Failed to connect the query cache to Redis: {e}")
+        return None
+
+
+QUERY_RESULT_CACHE = QueryResultCache(
+    enabled=ENABLE_RAG_QUERY_CACHE,
+    ttl=RAG_QUERY_CACHE_TTL,
+    max_size=RAG_QUERY_CACHE_SIZE,
+    redis=get_query_cache_redis(),
+    redis_key_prefix=REDIS_KEY_PREFIX,
+)
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from open_webui.config import RAG_RERANKING_BATCH_SIZE, RAG_RERANKING_CACHE_SIZE
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class RerankCache:
+    """
+    In-memory LRU of reranker scores keyed by
+    (engine, model, sha256(query), sha256(document)).
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.enabled = max_size > 0
+
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(engine: str, model: str, query: str, document: str) -> str:
+        return hashlib.sha256(
+            "\x00".join(
+                [
+                    engine or "",
+                    model or "",
+                    hashlib.sha256(query.encode("utf-8", "surrogatepass")).hexdigest(),
+                    hashlib.sha256(
+                        document.encode("utf-8", "surrogatepass")
+                    ).hexdigest(),
+                ]
+            ).encode()
+        ).hexdigest()
+
+    def get_many(self, keys: List[str]) -> List[Optional[float]]:
+        if not self.enabled:
+            return [None] * len(keys)
+
+        scores = []
+        with self._lock:
+            for key in keys:
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                scores.append(score)
+
+        hits = sum(1 for score in scores if score is not None)
+        self.hits += hits
+        self.misses += len(scores) - hits
+        return scores
+
+    def put_many(self, keys: List[str], scores: List[float]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_size:
+                self._scores.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scores.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "entries": len(self._scores),
+            "max_size": self.max_size,
+        }
+
+
+def with_rerank_cache(
+    reranking_function: Callable,
+    engine: str,
+    model: str,
+    batch_size: int = RAG_RERANKING_BATCH_SIZE,
+) -> Callable:
+    """
+    Wrap a reranking function returned by `get_reranking_function` so that
+    duplicate (query, document) pairs are scored once, cached scores are
+    reused, and the remaining pairs are sent to the reranker in batches of
+    `batch_size`.
+    """
+
+    def cached_reranking_function(
+        sentences: List[Tuple[str, str]], user=None
+    ) -> List[float]:
+        keys = [
+            RERANK_CACHE.make_key(engine, model, query, document)
+            for query, document in sentences
+        ]
+        scores = RERANK_CACHE.get_many(keys)
+
+        missing = {}
+        for key, sentence, score in zip(keys, sentences, scores):
+            if score is None and key not in missing:
+                missing[key] = sentence
+
+        if missing:
+            missing_keys = list(missing.keys())
+            missing_sentences = list(missing.values())
+
+            generated = []
+            step = max(1, batch_size)
+            for i in range(0, len(missing_sentences), step):
+                batch_scores = reranking_function(
+                    missing_sentences[i : i + step], user=user
+                )
+                generated.extend(
+                    float(score)
+                    for score in (
+                        batch_scores.tolist()
+                        if hasattr(batch_scores, "tolist")
+                        else batch_scores
+                    )
+                )
+
+            log.debug(
+                f"rerank: scored {len(missing_sentences)} of {len(sentences)} pairs "
+                f"in {-(-len(missing_sentences) // step)} batches"
+            )
+            RERANK_CACHE.put_many(missing_keys, generated)
+
+            generated_by_key = dict(zip(missing_keys, generated))
+            scores = [
+                score if score is not None else generated_by_key[key]
+                for key, score in zip(keys, scores)
+            ]
+
+        return scores
+
+    # Identifies the reranker in keys of cached search results
+    cached_reranking_function.model = (engine, model)
+    return cached_reranking_function
+
+
+RERANK_CACHE = RerankCache(max_size=RAG_RERANKING_CACHE_SIZE)
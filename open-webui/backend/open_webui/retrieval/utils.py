@@ -1,39 +1,43 @@
+import asyncio
 import logging
 import os
-from typing import Optional, Union
+from typing import Optional
 
-import requests
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
-import time
 
-from urllib.parse import quote
+from fastapi.concurrency import run_in_threadpool
 from huggingface_hub import snapshot_download
 from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
+from open_webui.retrieval.embedding_cache import with_embedding_cache
+from open_webui.retrieval.embedding_dispatcher import EMBEDDING_DISPATCHER
+from open_webui.retrieval.query_cache import QUERY_RESULT_CACHE
+from open_webui.retrieval.rerank_cache import with_rerank_cache
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
 from open_webui.models.knowledge import Knowledges
 from open_webui.models.notes import Notes
 
-from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.vector.main import (
+    GetResult,
+    get_vector_db_executor,
+    get_vector_db_semaphore,
+)
 from open_webui.utils.access_control import has_access
 
 
 from open_webui.env import (
     SRC_LOG_LEVELS,
     OFFLINE_MODE,
-    ENABLE_FORWARD_USER_INFO_HEADERS,
 )
 from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
-    RAG_EMBEDDING_PREFIX_FIELD_NAME,
 )
 
 log = logging.getLogger(__name__)
@@ -78,6 +82,21 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class BM25IndexRetriever(BaseRetriever):
+    collection_name: Any
+    top_k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        return BM25_INDEX.search(
+            collection_name=self.collection_name, query=query, k=self.top_k
+        )
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -98,6 +117,27 @@ def query_doc(
         raise e
 
 
+async def aquery_doc(
+    collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
+):
+    try:
+        log.debug(f"aquery_doc:doc {collection_name}")
+        async with get_vector_db_semaphore():
+            result = await VECTOR_DB_CLIENT.asearch(
+                collection_name=collection_name,
+                vectors=[query_embedding],
+                limit=k,
+            )
+
+        if result:
+            log.info(f"aquery_doc:result {result.ids} {result.metadatas}")
+
+        return result
+    except Exception as e:
+        log.exception(f"Error querying doc {collection_name} with limit {k}: {e}")
+        raise e
+
+
 def get_doc(collection_name: str, user: UserModel = None):
     try:
         log.debug(f"get_doc:doc {collection_name}")
@@ -112,50 +152,90 @@ def get_doc(collection_name: str, user: UserModel = None):
         raise e
 
 
-def query_doc_with_hybrid_search(
+def ensure_bm25_index(collection_name: str) -> bool:
+    """Make sure the persistent BM25 index for a collection exists, building it once if needed."""
+    return BM25_INDEX.ensure_collection(
+        collection_name,
+        lambda: VECTOR_DB_CLIENT.get(collection_name=collection_name),
+    )
+
+
+def get_hybrid_retriever(
     collection_name: str,
-    collection_result: GetResult,
-    query: str,
+    collection_result: Optional[GetResult],
     embedding_function,
     k: int,
-    reranking_function,
-    k_reranker: int,
-    r: float,
     hybrid_bm25_weight: float,
-) -> dict:
-    try:
-        if not collection_result.documents[0]:
-            log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
-            return {"documents": [], "metadatas": [], "distances": []}
+) -> Optional[EnsembleRetriever]:
+    """Build the BM25 + vector ensemble retriever for a collection, or None if it is empty."""
+    # BM_25 required only if weight is greater than 0
+    if hybrid_bm25_weight > 0:
+        log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
+        if ensure_bm25_index(collection_name):
+            if BM25_INDEX.count(collection_name) == 0:
+                log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
+                return None
+
+            bm25_retriever = BM25IndexRetriever(
+                collection_name=collection_name, top_k=k
+            )
+        else:
+            # Index disabled or unavailable, build an in-memory one from the collection
+            from langchain_community.retrievers import BM25Retriever
+
+            if not collection_result:
+                collection_result = VECTOR_DB_CLIENT.get(
+                    collection_name=collection_name
+                )
+
+            if not collection_result or not collection_result.documents[0]:
+                log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
+                return None
 
-        # BM_25 required only if weight is greater than 0
-        if hybrid_bm25_weight > 0:
-            log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
             bm25_retriever = BM25Retriever.from_texts(
                 texts=collection_result.documents[0],
                 metadatas=collection_result.metadatas[0],
             )
             bm25_retriever.k = k
 
-        vector_search_retriever = VectorSearchRetriever(
+    vector_search_retriever = VectorSearchRetriever(
+        collection_name=collection_name,
+        embedding_function=embedding_function,
+        top_k=k,
+    )
+
+    if hybrid_bm25_weight <= 0:
+        return EnsembleRetriever(retrievers=[vector_search_retriever], weights=[1.0])
+    elif hybrid_bm25_weight >= 1:
+        return EnsembleRetriever(retrievers=[bm25_retriever], weights=[1.0])
+    else:
+        return EnsembleRetriever(
+            retrievers=[bm25_retriever, vector_search_retriever],
+            weights=[hybrid_bm25_weight, 1.0 - hybrid_bm25_weight],
+        )
+
+
+def query_doc_with_hybrid_search(
+    collection_name: str,
+    collection_result: Optional[GetResult],
+    query: str,
+    embedding_function,
+    k: int,
+    reranking_function,
+    k_reranker: int,
+    r: float,
+    hybrid_bm25_weight: float,
+) -> dict:
+    try:
+        ensemble_retriever = get_hybrid_retriever(
             collection_name=collection_name,
+            collection_result=collection_result,
             embedding_function=embedding_function,
-            top_k=k,
+            k=k,
+            hybrid_bm25_weight=hybrid_bm25_weight,
         )
-
-        if hybrid_bm25_weight <= 0:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[vector_search_retriever], weights=[1.0]
-            )
-        elif hybrid_bm25_weight >= 1:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever], weights=[1.0]
-            )
-        else:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever, vector_search_retriever],
-                weights=[hybrid_bm25_weight, 1.0 - hybrid_bm25_weight],
-            )
+        if ensemble_retriever is None:
+            return {"documents": [], "metadatas": [], "distances": []}
 
         compressor = RerankCompressor(
             embedding_function=embedding_function,
@@ -288,13 +368,25 @@ def query_collection(
     def process_query_collection(collection_name, query_embedding):
         try:
             if collection_name:
+                cache_key = QUERY_RESULT_CACHE.make_key(
+                    [collection_name],
+                    search="vector",
+                    embedding=QUERY_RESULT_CACHE.hash_embeddings([query_embedding]),
+                    k=k,
+                )
+                cached = QUERY_RESULT_CACHE.get(cache_key)
+                if cached is not None:
+                    return cached, None
+
                 result = query_doc(
                     collection_name=collection_name,
                     k=k,
                     query_embedding=query_embedding,
                 )
                 if result is not None:
-                    return result.model_dump(), None
+                    result = result.model_dump()
+                    QUERY_RESULT_CACHE.put(cache_key, result)
+                    return result, None
             return None, None
         except Exception as e:
             log.exception(f"Error when querying the collection: {e}")
@@ -306,15 +398,94 @@ def query_collection(
         f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
-    with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
+    executor = get_vector_db_executor()
+    future_results = []
+    for query_embedding in query_embeddings:
+        for collection_name in collection_names:
+            result = executor.submit(
+                process_query_collection, collection_name, query_embedding
+            )
+            future_results.append(result)
+    task_results = [future.result() for future in future_results]
+
+    for result, err in task_results:
+        if err is not None:
+            error = True
+        elif result is not None:
+            results.append(result)
+
+    if error and not results:
+        log.warning("All collection queries failed. No results returned.")
+
+    return merge_and_sort_query_results(results, k=k)
+
+
+async def aquery_collection(
+    collection_names: list[str],
+    queries: list[str],
+    embedding_function,
+    k: int,
+) -> dict:
+    """
+    Async variant of `query_collection`: the searches are fanned out on the
+    event loop through the async vector DB API.
+    """
+    results = []
+    error = False
+
+    async def call_cache(func, *args):
+        # Redis round trips must not block the event loop
+        if QUERY_RESULT_CACHE.redis is not None:
+            return await run_in_threadpool(func, *args)
+        return func(*args)
+
+    def get_cached(collection_name, query_embedding):
+        cache_key = QUERY_RESULT_CACHE.make_key(
+            [collection_name],
+            search="vector",
+            embedding=QUERY_RESULT_CACHE.hash_embeddings([query_embedding]),
+            k=k,
+        )
+        return cache_key, QUERY_RESULT_CACHE.get(cache_key)
+
+    async def process_query_collection(collection_name, query_embedding):
+        try:
+            if collection_name:
+                cache_key, cached = await call_cache(
+                    get_cached, collection_name, query_embedding
+                )
+                if cached is not None:
+                    return cached, None
+
+                result = await aquery_doc(
+                    collection_name=collection_name,
+                    k=k,
+                    query_embedding=query_embedding,
                 )
-                future_results.append(result)
-        task_results = [future.result() for future in future_results]
+                if result is not None:
+                    result = result.model_dump()
+                    await call_cache(QUERY_RESULT_CACHE.put, cache_key, result)
+                    return result, None
+            return None, None
+        except Exception as e:
+            log.exception(f"Error when querying the collection: {e}")
+            return None, e
+
+    # Generate all query embeddings (in one call)
+    query_embeddings = await run_in_threadpool(
+        embedding_function, queries, prefix=RAG_EMBEDDING_QUERY_PREFIX
+    )
+    log.debug(
+        f"aquery_collection: processing {len(queries)} queries across {len(collection_names)} collections"
+    )
+
+    task_results = await asyncio.gather(
+        *[
+            process_query_collection(collection_name, query_embedding)
+            for query_embedding in query_embeddings
+            for collection_name in collection_names
+        ]
+    )
 
     for result, err in task_results:
         if err is not None:
@@ -338,14 +509,37 @@ def query_collection_with_hybrid_search(
     r: float,
     hybrid_bm25_weight: float,
 ) -> dict:
+    cache_key = None
+    if QUERY_RESULT_CACHE.enabled:
+        # Keyed by the query embeddings rather than the texts, so that results
+        # are never shared between embedding models
+        query_embeddings = embedding_function(
+            queries, prefix=RAG_EMBEDDING_QUERY_PREFIX
+        )
+        cache_key = QUERY_RESULT_CACHE.make_key(
+            collection_names,
+            search="hybrid",
+            queries=queries,
+            embedding=QUERY_RESULT_CACHE.hash_embeddings(query_embeddings),
+            reranker=getattr(reranking_function, "model", None),
+            k=k,
+            k_reranker=k_reranker,
+            r=r,
+            hybrid_bm25_weight=hybrid_bm25_weight,
+        )
+        cached = QUERY_RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
     results = []
     error = False
-    # Fetch collection data once per collection sequentially
-    # Avoid fetching the same data multiple times later
+    # Make sure the sparse index exists for every collection up front, so
+    # queries never need to fetch the entire collection from the vector DB.
+    # Collections whose index could not be built are skipped (assigned None)
     collection_results = {}
-    # Only retrieve entire collection if bm_25 calculation is required
-    if hybrid_bm25_weight > 0:
-        for collection_name in collection_names:
+    for collection_name in collection_names:
+        collection_results[collection_name] = []
+        if hybrid_bm25_weight > 0 and not ensure_bm25_index(collection_name):
             try:
                 log.debug(
                     f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
@@ -356,27 +550,22 @@ def query_collection_with_hybrid_search(
             except Exception as e:
                 log.exception(f"Failed to fetch collection {collection_name}: {e}")
                 collection_results[collection_name] = None
-    else:
-        for collection_name in collection_names:
-            collection_results[collection_name] = []
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
     )
 
-    def process_query(collection_name, query):
+    def retrieve(collection_name, query):
         try:
-            result = query_doc_with_hybrid_search(
+            ensemble_retriever = get_hybrid_retriever(
                 collection_name=collection_name,
                 collection_result=collection_results[collection_name],
-                query=query,
                 embedding_function=embedding_function,
                 k=k,
-                reranking_function=reranking_function,
-                k_reranker=k_reranker,
-                r=r,
                 hybrid_bm25_weight=hybrid_bm25_weight,
             )
-            return result, None
+            if ensemble_retriever is None:
+                return [], None
+            return ensemble_retriever.invoke(query), None
         except Exception as e:
             log.exception(f"Error when querying the collection with hybrid_search: {e}")
             return None, e
@@ -390,22 +579,108 @@ def query_collection_with_hybrid_search(
         for q in queries
     ]
 
-    with ThreadPoolExecutor() as executor:
-        future_results = [executor.submit(process_query, cn, q) for cn, q in tasks]
-        task_results = [future.result() for future in future_results]
+    # Gather the candidates of every (collection, query) pair first ...
+    executor = get_vector_db_executor()
+    future_results = [executor.submit(retrieve, cn, q) for cn, q in tasks]
+    task_results = [future.result() for future in future_results]
 
-    for result, err in task_results:
+    candidates = []
+    for (_, query), (documents, err) in zip(tasks, task_results):
         if err is not None:
             error = True
-        elif result is not None:
-            results.append(result)
+        elif documents is not None:
+            candidates.append((query, documents))
 
-    if error and not results:
+    if error and not candidates:
         raise Exception(
             "Hybrid search failed for all collections. Using Non-hybrid search as fallback."
         )
 
-    return merge_and_sort_query_results(results, k=k)
+    # ... then score each unique (query, document) pair once, in a single pass
+    pairs = list(
+        dict.fromkeys(
+            (query, doc.page_content)
+            for query, documents in candidates
+            for doc in documents
+        )
+    )
+    try:
+        scores = dict(
+            zip(pairs, score_documents(pairs, embedding_function, reranking_function))
+        )
+    except Exception as e:
+        log.exception(f"Error when reranking hybrid search results: {e}")
+        raise Exception(
+            "Hybrid search failed for all collections. Using Non-hybrid search as fallback."
+        )
+    log.debug(
+        f"query_collection_with_hybrid_search: scored {len(pairs)} unique candidates for {len(tasks)} tasks"
+    )
+
+    for query, documents in candidates:
+        docs_with_scores = [
+            (doc, scores[(query, doc.page_content)]) for doc in documents
+        ]
+        if r:
+            docs_with_scores = [(d, s) for d, s in docs_with_scores if s >= r]
+
+        # Same cut as query_doc_with_hybrid_search: top k_reranker, then top k
+        docs_with_scores = sorted(
+            docs_with_scores, key=operator.itemgetter(1), reverse=True
+        )[: min(k, k_reranker)]
+
+        results.append(
+            {
+                "distances": [[score for _, score in docs_with_scores]],
+                "documents": [[doc.page_content for doc, _ in docs_with_scores]],
+                "metadatas": [
+                    [
+                        {**doc.metadata, "score": score}
+                        for doc, score in docs_with_scores
+                    ]
+                ],
+            }
+        )
+
+    result = merge_and_sort_query_results(results, k=k)
+    if not error:
+        QUERY_RESULT_CACHE.put(cache_key, result)
+    return result
+
+
+def score_documents(
+    pairs: list[tuple[str, str]], embedding_function, reranking_function=None
+) -> list[float]:
+    """
+    Score (query, document) pairs with the reranker, or by embedding cosine
+    similarity when no reranker is configured, in one batched pass.
+    """
+    if not pairs:
+        return []
+
+    if reranking_function is not None:
+        scores = reranking_function(pairs)
+        return scores.tolist() if not isinstance(scores, list) else scores
+
+    from sentence_transformers import util
+
+    queries = list(dict.fromkeys(query for query, _ in pairs))
+    documents = list(dict.fromkeys(document for _, document in pairs))
+
+    query_embeddings = embedding_function(queries, RAG_EMBEDDING_QUERY_PREFIX)
+    # Normalize like save_docs_to_vector_db so chunks hit the embedding cache
+    document_embeddings = embedding_function(
+        [document.replace("\n", " ") for document in documents],
+        RAG_EMBEDDING_CONTENT_PREFIX,
+    )
+    similarities = util.cos_sim(query_embeddings, document_embeddings)
+
+    query_index = {query: idx for idx, query in enumerate(queries)}
+    document_index = {document: idx for idx, document in enumerate(documents)}
+    return [
+        float(similarities[query_index[query]][document_index[document]])
+        for query, document in pairs
+    ]
 
 
 def get_embedding_function(
@@ -418,217 +693,214 @@ def get_embedding_function(
     azure_api_version=None,
 ):
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
+        func = lambda query, prefix=None, user=None: embedding_function.encode(
             query, **({"prompt": prefix} if prefix else {})
         ).tolist()
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
-        func = lambda query, prefix=None, user=None: generate_embeddings(
+        # Batches are sent concurrently over a shared, retrying connection pool
+        func = lambda query, prefix=None, user=None: EMBEDDING_DISPATCHER.embed(
             engine=embedding_engine,
             model=embedding_model,
-            text=query,
-            prefix=prefix,
+            texts=query,
+            batch_size=embedding_batch_size,
             url=url,
             key=key,
+            prefix=prefix,
             user=user,
             azure_api_version=azure_api_version,
         )
-
-        def generate_multiple(query, prefix, user, func):
-            if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    embeddings.extend(
-                        func(
-                            query[i : i + embedding_batch_size],
-                            prefix=prefix,
-                            user=user,
-                        )
-                    )
-                return embeddings
-            else:
-                return func(query, prefix, user)
-
-        return lambda query, prefix=None, user=None: generate_multiple(
-            query, prefix, user, func
-        )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
+    # Serve previously embedded texts (re-uploads, reindexing, reranking) from the cache
+    return with_embedding_cache(
+        func, embedding_engine, embedding_model, url if embedding_engine else ""
+    )
+
 
 def get_reranking_function(reranking_engine, reranking_model, reranking_function):
     if reranking_function is None:
         return None
     if reranking_engine == "external":
-        return lambda sentences, user=None: reranking_function.predict(
+        func = lambda sentences, user=None: reranking_function.predict(
             sentences, user=user
         )
     else:
-        return lambda sentences, user=None: reranking_function.predict(sentences)
+        func = lambda sentences, user=None: reranking_function.predict(sentences)
 
+    return with_rerank_cache(func, reranking_engine, reranking_model)
 
-def get_sources_from_items(
-    request,
-    items,
-    queries,
-    embedding_function,
-    k,
-    reranking_function,
-    k_reranker,
-    r,
-    hybrid_bm25_weight,
-    hybrid_search,
-    full_context=False,
-    user: Optional[UserModel] = None,
-):
-    log.debug(
-        f"items: {items} {queries} {embedding_function} {reranking_function} {full_context}"
-    )
 
-    extracted_collections = []
-    query_results = []
+def get_query_result_from_item(
+    request, item, user: Optional[UserModel] = None
+) -> tuple[Optional[dict], list[str]]:
+    """
+    Resolve an item to either its full content (query result) or the names of
+    the collections to search. This reads the database, run it off the loop.
+    """
+    query_result = None
+    collection_names = []
 
-    for item in items:
-        query_result = None
-        collection_names = []
+    if item.get("type") == "text":
+        # Raw Text
+        # Used during temporary chat file uploads
 
-        if item.get("type") == "text":
-            # Raw Text
-            # Used during temporary chat file uploads
+        if item.get("file"):
+            # if item has file data, use it
+            query_result = {
+                "documents": [[item.get("file", {}).get("data", {}).get("content")]],
+                "metadatas": [[item.get("file", {}).get("data", {}).get("meta", {})]],
+            }
+        else:
+            # Fallback to item content
+            query_result = {
+                "documents": [[item.get("content")]],
+                "metadatas": [[{"file_id": item.get("id"), "name": item.get("name")}]],
+            }
 
-            if item.get("file"):
-                # if item has file data, use it
+    elif item.get("type") == "note":
+        # Note Attached
+        note = Notes.get_note_by_id(item.get("id"))
+
+        if note and (
+            user.role == "admin"
+            or note.user_id == user.id
+            or has_access(user.id, "read", note.access_control)
+        ):
+            # User has access to the note
+            query_result = {
+                "documents": [[note.data.get("content", {}).get("md", "")]],
+                "metadatas": [[{"file_id": note.id, "name": note.title}]],
+            }
+
+    elif item.get("type") == "file":
+        if (
+            item.get("context") == "full"
+            or request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
+        ):
+            if item.get("file", {}).get("data", {}).get("content", ""):
+                # Manual Full Mode Toggle
+                # Used from chat file modal, we can assume that the file content will be available from item.get("file").get("data", {}).get("content")
                 query_result = {
                     "documents": [
-                        [item.get("file", {}).get("data", {}).get("content")]
-                    ],
-                    "metadatas": [
-                        [item.get("file", {}).get("data", {}).get("meta", {})]
+                        [item.get("file", {}).get("data", {}).get("content", "")]
                     ],
-                }
-            else:
-                # Fallback to item content
-                query_result = {
-                    "documents": [[item.get("content")]],
                     "metadatas": [
-                        [{"file_id": item.get("id"), "name": item.get("name")}]
+                        [
+                            {
+                                "file_id": item.get("id"),
+                                "name": item.get("name"),
+                                **item.get("file").get("data", {}).get("metadata", {}),
+                            }
+                        ]
                     ],
                 }
-
-        elif item.get("type") == "note":
-            # Note Attached
-            note = Notes.get_note_by_id(item.get("id"))
-
-            if note and (
-                user.role == "admin"
-                or note.user_id == user.id
-                or has_access(user.id, "read", note.access_control)
-            ):
-                # User has access to the note
-                query_result = {
-                    "documents": [[note.data.get("content", {}).get("md", "")]],
-                    "metadatas": [[{"file_id": note.id, "name": note.title}]],
-                }
-
-        elif item.get("type") == "file":
-            if (
-                item.get("context") == "full"
-                or request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
-            ):
-                if item.get("file", {}).get("data", {}).get("content", ""):
-                    # Manual Full Mode Toggle
-                    # Used from chat file modal, we can assume that the file content will be available from item.get("file").get("data", {}).get("content")
+            elif item.get("id"):
+                file_object = Files.get_file_by_id(item.get("id"))
+                if file_object:
                     query_result = {
-                        "documents": [
-                            [item.get("file", {}).get("data", {}).get("content", "")]
-                        ],
+                        "documents": [[file_object.data.get("content", "")]],
                         "metadatas": [
                             [
                                 {
                                     "file_id": item.get("id"),
-                                    "name": item.get("name"),
-                                    **item.get("file")
-                                    .get("data", {})
-                                    .get("metadata", {}),
+                                    "name": file_object.filename,
+                                    "source": file_object.filename,
                                 }
                             ]
                         ],
                     }
-                elif item.get("id"):
-                    file_object = Files.get_file_by_id(item.get("id"))
-                    if file_object:
-                        query_result = {
-                            "documents": [[file_object.data.get("content", "")]],
-                            "metadatas": [
-                                [
-                                    {
-                                        "file_id": item.get("id"),
-                                        "name": file_object.filename,
-                                        "source": file_object.filename,
-                                    }
-                                ]
-                            ],
-                        }
+        else:
+            # Fallback to collection names
+            if item.get("legacy"):
+                collection_names.append(f"{item['id']}")
             else:
-                # Fallback to collection names
-                if item.get("legacy"):
-                    collection_names.append(f"{item['id']}")
-                else:
-                    collection_names.append(f"file-{item['id']}")
+                collection_names.append(f"file-{item['id']}")
 
-        elif item.get("type") == "collection":
-            if (
-                item.get("context") == "full"
-                or request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
-            ):
-                # Manual Full Mode Toggle for Collection
-                knowledge_base = Knowledges.get_knowledge_by_id(item.get("id"))
+    elif item.get("type") == "collection":
+        if (
+            item.get("context") == "full"
+            or request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
+        ):
+            # Manual Full Mode Toggle for Collection
+            knowledge_base = Knowledges.get_knowledge_by_id(item.get("id"))
 
-                if knowledge_base and (
-                    user.role == "admin"
-                    or has_access(user.id, "read", knowledge_base.access_control)
-                ):
+            if knowledge_base and (
+                user.role == "admin"
+                or has_access(user.id, "read", knowledge_base.access_control)
+            ):
 
-                    file_ids = knowledge_base.data.get("file_ids", [])
+                file_ids = knowledge_base.data.get("file_ids", [])
 
-                    documents = []
-                    metadatas = []
-                    for file_id in file_ids:
-                        file_object = Files.get_file_by_id(file_id)
+                documents = []
+                metadatas = []
+                for file_id in file_ids:
+                    file_object = Files.get_file_by_id(file_id)
 
-                        if file_object:
-                            documents.append(file_object.data.get("content", ""))
-                            metadatas.append(
-                                {
-                                    "file_id": file_id,
-                                    "name": file_object.filename,
-                                    "source": file_object.filename,
-                                }
-                            )
+                    if file_object:
+                        documents.append(file_object.data.get("content", ""))
+                        metadatas.append(
+                            {
+                                "file_id": file_id,
+                                "name": file_object.filename,
+                                "source": file_object.filename,
+                            }
+                        )
 
-                    query_result = {
-                        "documents": [documents],
-                        "metadatas": [metadatas],
-                    }
+                query_result = {
+                    "documents": [documents],
+                    "metadatas": [metadatas],
+                }
+        else:
+            # Fallback to collection names
+            if item.get("legacy"):
+                collection_names = item.get("collection_names", [])
             else:
-                # Fallback to collection names
-                if item.get("legacy"):
-                    collection_names = item.get("collection_names", [])
-                else:
-                    collection_names.append(item["id"])
+                collection_names.append(item["id"])
 
-        elif item.get("docs"):
-            # BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL
-            query_result = {
-                "documents": [[doc.get("content") for doc in item.get("docs")]],
-                "metadatas": [[doc.get("metadata") for doc in item.get("docs")]],
-            }
-        elif item.get("collection_name"):
-            # Direct Collection Name
-            collection_names.append(item["collection_name"])
-        elif item.get("collection_names"):
-            # Collection Names List
-            collection_names.extend(item["collection_names"])
+    elif item.get("docs"):
+        # BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL
+        query_result = {
+            "documents": [[doc.get("content") for doc in item.get("docs")]],
+            "metadatas": [[doc.get("metadata") for doc in item.get("docs")]],
+        }
+    elif item.get("collection_name"):
+        # Direct Collection Name
+        collection_names.append(item["collection_name"])
+    elif item.get("collection_names"):
+        # Collection Names List
+        collection_names.extend(item["collection_names"])
+
+    return query_result, collection_names
+
+
+async def get_sources_from_items(
+    request,
+    items,
+    queries,
+    embedding_function,
+    k,
+    reranking_function,
+    k_reranker,
+    r,
+    hybrid_bm25_weight,
+    hybrid_search,
+    full_context=False,
+    user: Optional[UserModel] = None,
+):
+    log.debug(
+        f"items: {items} {queries} {embedding_function} {reranking_function} {full_context}"
+    )
 
+    extracted_collections = []
+    query_results = []
+
+    # Resolving the items reads the database, keep it off the event loop
+    resolved_items = await run_in_threadpool(
+        lambda: [get_query_result_from_item(request, item, user) for item in items]
+    )
+
+    for item, (query_result, collection_names) in zip(items, resolved_items):
         # If query_result is None
         # Fallback to collection names and vector search the collections
         if query_result is None and collection_names:
@@ -639,12 +911,16 @@ def get_sources_from_items(
 
             try:
                 if full_context:
-                    query_result = get_all_items_from_collections(collection_names)
+                    query_result = await run_in_threadpool(
+                        get_all_items_from_collections, collection_names
+                    )
                 else:
                     query_result = None  # Initialize to None
                     if hybrid_search:
                         try:
-                            query_result = query_collection_with_hybrid_search(
+                            # BM25 scoring and reranking are CPU bound
+                            query_result = await run_in_threadpool(
+                                query_collection_with_hybrid_search,
                                 collection_names=collection_names,
                                 queries=queries,
                                 embedding_function=embedding_function,
@@ -661,7 +937,7 @@ def get_sources_from_items(
 
                     # fallback to non-hybrid search
                     if not hybrid_search and query_result is None:
-                        query_result = query_collection(
+                        query_result = await aquery_collection(
                             collection_names=collection_names,
                             queries=queries,
                             embedding_function=embedding_function,
@@ -738,199 +1014,6 @@ def get_model_path(model: str, update_model: bool = False):
         return model
 
 
-def generate_openai_batch_embeddings(
-    model: str,
-    texts: list[str],
-    url: str = "https://api.openai.com/v1",
-    key: str = "",
-    prefix: str = None,
-    user: UserModel = None,
-) -> Optional[list[list[float]]]:
-    try:
-        log.debug(
-            f"generate_openai_batch_embeddings:model {model} batch size: {len(texts)}"
-        )
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            json=json_data,
-        )
-        r.raise_for_status()
-        data = r.json()
-        if "data" in data:
-            return [elem["embedding"] for elem in data["data"]]
-        else:
-            raise "Something went wrong :/"
-    except Exception as e:
-        log.exception(f"Error generating openai batch embeddings: {e}")
-        return None
-
-
-def generate_azure_openai_batch_embeddings(
-    model: str,
-    texts: list[str],
-    url: str,
-    key: str = "",
-    version: str = "",
-    prefix: str = None,
-    user: UserModel = None,
-) -> Optional[list[list[float]]]:
-    try:
-        log.debug(
-            f"generate_azure_openai_batch_embeddings:deployment {model} batch size: {len(texts)}"
-        )
-        json_data = {"input": texts}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        url = f"{url}/openai/deployments/{model}/embeddings?api-version={version}"
-
-        for _ in range(5):
-            r = requests.post(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": key,
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                json=json_data,
-            )
-            if r.status_code == 429:
-                retry = float(r.headers.get("Retry-After", "1"))
-                time.sleep(retry)
-                continue
-            r.raise_for_status()
-            data = r.json()
-            if "data" in data:
-                return [elem["embedding"] for elem in data["data"]]
-            else:
-                raise Exception("Something went wrong :/")
-        return None
-    except Exception as e:
-        log.exception(f"Error generating azure openai batch embeddings: {e}")
-        return None
-
-
-def generate_ollama_batch_embeddings(
-    model: str,
-    texts: list[str],
-    url: str,
-    key: str = "",
-    prefix: str = None,
-    user: UserModel = None,
-) -> Optional[list[list[float]]]:
-    try:
-        log.debug(
-            f"generate_ollama_batch_embeddings:model {model} batch size: {len(texts)}"
-        )
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS
-                    else {}
-                ),
-            },
-            json=json_data,
-        )
-        r.raise_for_status()
-        data = r.json()
-
-        if "embeddings" in data:
-            return data["embeddings"]
-        else:
-            raise "Something went wrong :/"
-    except Exception as e:
-        log.exception(f"Error generating ollama batch embeddings: {e}")
-        return None
-
-
-def generate_embeddings(
-    engine: str,
-    model: str,
-    text: Union[str, list[str]],
-    prefix: Union[str, None] = None,
-    **kwargs,
-):
-    url = kwargs.get("url", "")
-    key = kwargs.get("key", "")
-    user = kwargs.get("user")
-
-    if prefix is not None and RAG_EMBEDDING_PREFIX_FIELD_NAME is None:
-        if isinstance(text, list):
-            text = [f"{prefix}{text_element}" for text_element in text]
-        else:
-            text = f"{prefix}{text}"
-
-    if engine == "ollama":
-        embeddings = generate_ollama_batch_embeddings(
-            **{
-                "model": model,
-                "texts": text if isinstance(text, list) else [text],
-                "url": url,
-                "key": key,
-                "prefix": prefix,
-                "user": user,
-            }
-        )
-        return embeddings[0] if isinstance(text, str) else embeddings
-    elif engine == "openai":
-        embeddings = generate_openai_batch_embeddings(
-            model, text if isinstance(text, list) else [text], url, key, prefix, user
-        )
-        return embeddings[0] if isinstance(text, str) else embeddings
-    elif engine == "azure_openai":
-        azure_api_version = kwargs.get("azure_api_version", "")
-        embeddings = generate_azure_openai_batch_embeddings(
-            model,
-            text if isinstance(text, list) else [text],
-            url,
-            key,
-            azure_api_version,
-            prefix,
-            user,
-        )
-        return embeddings[0] if isinstance(text, str) else embeddings
-
-
 import operator
 from typing import Optional, Sequence
 
@@ -965,8 +1048,10 @@ class RerankCompressor(BaseDocumentCompressor):
             from sentence_transformers import util
 
             query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
+            # Normalize like save_docs_to_vector_db so chunks hit the embedding cache
             document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
+                [doc.page_content.replace("\n", " ") for doc in documents],
+                RAG_EMBEDDING_CONTENT_PREFIX,
             )
             scores = util.cos_sim(query_embedding, document_embedding)[0]
 
@@ -172,6 +172,18 @@ class ChromaClient(VectorDBBase):
             ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas
         )
 
+    def update_metadata(
+        self, collection_name: str, ids: list[str], metadatas: list[dict]
+    ):
+        # Update the metadata of the items, keeping their embeddings and documents.
+        collection = self.client.get_collection(name=collection_name)
+        for batch in create_batches(
+            api=self.client,
+            ids=ids,
+            metadatas=[stringify_metadata(metadata) for metadata in metadatas],
+        ):
+            collection.update(*batch)
+
     def delete(
         self,
         collection_name: str,
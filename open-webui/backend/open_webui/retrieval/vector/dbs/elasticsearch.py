@@ -1,7 +1,7 @@
-from elasticsearch import Elasticsearch, BadRequestError
+from elasticsearch import AsyncElasticsearch, Elasticsearch, BadRequestError
 from typing import Optional
 import ssl
-from elasticsearch.helpers import bulk, scan
+from elasticsearch.helpers import async_scan, bulk, scan
 
 from open_webui.retrieval.vector.utils import stringify_metadata
 from open_webui.retrieval.vector.main import (
@@ -32,18 +32,21 @@ class ElasticsearchClient(VectorDBBase):
 
     def __init__(self):
         self.index_prefix = ELASTICSEARCH_INDEX_PREFIX
-        self.client = Elasticsearch(
-            hosts=[ELASTICSEARCH_URL],
-            ca_certs=ELASTICSEARCH_CA_CERTS,
-            api_key=ELASTICSEARCH_API_KEY,
-            cloud_id=ELASTICSEARCH_CLOUD_ID,
-            basic_auth=(
+        client_kwargs = {
+            "hosts": [ELASTICSEARCH_URL],
+            "ca_certs": ELASTICSEARCH_CA_CERTS,
+            "api_key": ELASTICSEARCH_API_KEY,
+            "cloud_id": ELASTICSEARCH_CLOUD_ID,
+            "basic_auth": (
                 (ELASTICSEARCH_USERNAME, ELASTICSEARCH_PASSWORD)
                 if ELASTICSEARCH_USERNAME and ELASTICSEARCH_PASSWORD
                 else None
             ),
-            ssl_assert_fingerprint=SSL_ASSERT_FINGERPRINT,
-        )
+            "ssl_assert_fingerprint": SSL_ASSERT_FINGERPRINT,
+        }
+        self.client = Elasticsearch(**client_kwargs)
+        # Used by the async API (asearch, aquery, aget)
+        self.aclient = AsyncElasticsearch(**client_kwargs)
 
     # Status: works
     def _get_index_name(self, dimension: int) -> str:
@@ -147,15 +150,29 @@ class ElasticsearchClient(VectorDBBase):
         except Exception as e:
             return None
 
+    async def _ahas_collection(self, collection_name) -> bool:
+        query_body = {"query": {"bool": {"filter": []}}}
+        query_body["query"]["bool"]["filter"].append(
+            {"term": {"collection": collection_name}}
+        )
+
+        try:
+            result = await self.aclient.count(
+                index=f"{self.index_prefix}*", body=query_body
+            )
+
+            return result.body["count"] > 0
+        except Exception as e:
+            return None
+
     def delete_collection(self, collection_name: str):
         query = {"query": {"term": {"collection": collection_name}}}
         self.client.delete_by_query(index=f"{self.index_prefix}*", body=query)
 
-    # Status: works
-    def search(
+    def _get_search_body(
         self, collection_name: str, vectors: list[list[float]], limit: int
-    ) -> Optional[SearchResult]:
-        query = {
+    ) -> dict:
+        return {
             "size": limit,
             "_source": ["text", "metadata"],
             "query": {
@@ -173,19 +190,28 @@ class ElasticsearchClient(VectorDBBase):
             },
         }
 
+    # Status: works
+    def search(
+        self, collection_name: str, vectors: list[list[float]], limit: int
+    ) -> Optional[SearchResult]:
         result = self.client.search(
-            index=self._get_index_name(len(vectors[0])), body=query
+            index=self._get_index_name(len(vectors[0])),
+            body=self._get_search_body(collection_name, vectors, limit),
         )
 
         return self._result_to_search_result(result)
 
-    # Status: only tested halfwat
-    def query(
-        self, collection_name: str, filter: dict, limit: Optional[int] = None
-    ) -> Optional[GetResult]:
-        if not self.has_collection(collection_name):
-            return None
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float]], limit: int
+    ) -> Optional[SearchResult]:
+        result = await self.aclient.search(
+            index=self._get_index_name(len(vectors[0])),
+            body=self._get_search_body(collection_name, vectors, limit),
+        )
+
+        return self._result_to_search_result(result)
 
+    def _get_query_body(self, collection_name: str, filter: dict) -> dict:
         query_body = {
             "query": {"bool": {"filter": []}},
             "_source": ["text", "metadata"],
@@ -196,12 +222,41 @@ class ElasticsearchClient(VectorDBBase):
         query_body["query"]["bool"]["filter"].append(
             {"term": {"collection": collection_name}}
         )
+        return query_body
+
+    # Status: only tested halfwat
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not self.has_collection(collection_name):
+            return None
+
         size = limit if limit else 10
 
         try:
             result = self.client.search(
                 index=f"{self.index_prefix}*",
-                body=query_body,
+                body=self._get_query_body(collection_name, filter),
+                size=size,
+            )
+
+            return self._result_to_get_result(result)
+
+        except Exception as e:
+            return None
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not await self._ahas_collection(collection_name):
+            return None
+
+        size = limit if limit else 10
+
+        try:
+            result = await self.aclient.search(
+                index=f"{self.index_prefix}*",
+                body=self._get_query_body(collection_name, filter),
                 size=size,
             )
 
@@ -231,6 +286,20 @@ class ElasticsearchClient(VectorDBBase):
 
         return self._scan_result_to_get_result(results)
 
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        query = {
+            "query": {"bool": {"filter": [{"term": {"collection": collection_name}}]}},
+            "_source": ["text", "metadata"],
+        }
+        results = [
+            hit
+            async for hit in async_scan(
+                self.aclient, index=f"{self.index_prefix}*", query=query
+            )
+        ]
+
+        return self._scan_result_to_get_result(results)
+
     # Status: works
     def insert(self, collection_name: str, items: list[VectorItem]):
         if not self._has_index(dimension=len(items[0]["vector"])):
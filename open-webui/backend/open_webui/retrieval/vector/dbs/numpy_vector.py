@@ -0,0 +1,699 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from open_webui.retrieval.vector.main import (
+    VectorDBBase,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
+from open_webui.retrieval.vector.utils import stringify_metadata
+from open_webui.config import (
+    NUMPY_VECTOR_DATA_PATH,
+    NUMPY_VECTOR_DTYPE,
+    NUMPY_VECTOR_INDEX,
+    NUMPY_VECTOR_IVF_LISTS,
+    NUMPY_VECTOR_IVF_PROBES,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS info (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    row INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    text TEXT,
+    metadata TEXT
+);
+"""
+
+# Rows scored per matrix product, bounds the float32 copy of the vectors
+BLOCK_SIZE = 65536
+# Collections smaller than this are always searched exhaustively
+IVF_MIN_ROWS = 4096
+IVF_ITERATIONS = 10
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+class NumpyCollection:
+    """
+    A collection stored in its own directory:
+
+    - vectors.<generation>.npy: L2-normalized vectors, one per row, as float16
+      or int8 with a per-row scale in scales.<generation>.npy. Files are memory
+      mapped, so opening a collection reads nothing until it is searched.
+    - meta.db: SQLite sidecar mapping rows to ids, texts and metadata. A row
+      is live while it is referenced there; vectors are written before their
+      metadata commits, so a crash never exposes a partial insert.
+    - ivf.npz: optional IVF centroids and row assignments.
+
+    Growing or compacting the vector file writes a new generation which the
+    metadata commit switches to atomically.
+    """
+
+    def __init__(self, path: str, dtype: str = "float16", index: str = "flat"):
+        self.path = path
+        self.index = index
+        self.lock = threading.RLock()
+
+        os.makedirs(path, exist_ok=True)
+        self.conn = sqlite3.connect(
+            os.path.join(path, "meta.db"), check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+        info = dict(self.conn.execute("SELECT key, value FROM info").fetchall())
+        self.dtype = info.get("dtype", dtype)
+        self.dim = int(info["dim"]) if "dim" in info else None
+        self.generation = int(info.get("generation", 0))
+        self.next_row = int(info.get("next_row", 0))
+        self.compactions = int(info.get("compactions", 0))
+
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._live: Optional[np.ndarray] = None
+        self._ivf: Optional[Dict[str, Any]] = None
+
+        self._remove_stale_files()
+
+    ####################
+    # Files
+    ####################
+
+    def _file(self, name: str, generation: int) -> str:
+        return os.path.join(self.path, f"{name}.{generation}.npy")
+
+    def _remove_stale_files(self) -> None:
+        # Leftovers of a generation that never committed, or was replaced
+        for filename in os.listdir(self.path):
+            match = re.fullmatch(r"(vectors|scales)\.(\d+)\.npy", filename)
+            if match and int(match.group(2)) != self.generation:
+                os.remove(os.path.join(self.path, filename))
+
+    def _open(self) -> None:
+        if self._vectors is not None or not os.path.exists(
+            self._file("vectors", self.generation)
+        ):
+            return
+        self._vectors = np.load(self._file("vectors", self.generation), mmap_mode="r+")
+        if self.dtype == "int8":
+            self._scales = np.load(
+                self._file("scales", self.generation), mmap_mode="r+"
+            )
+
+    def _allocate(self, generation: int, capacity: int) -> Tuple[np.memmap, Any]:
+        vectors = np.lib.format.open_memmap(
+            self._file("vectors", generation),
+            mode="w+",
+            dtype=np.int8 if self.dtype == "int8" else np.float16,
+            shape=(capacity, self.dim),
+        )
+        scales = None
+        if self.dtype == "int8":
+            scales = np.lib.format.open_memmap(
+                self._file("scales", generation),
+                mode="w+",
+                dtype=np.float32,
+                shape=(capacity,),
+            )
+        return vectors, scales
+
+    def _capacity(self) -> int:
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        vectors = normalize(vectors)
+        if self.dtype != "int8":
+            return vectors.astype(np.float16), None
+
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        quantized = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+
+    def _decode(self, rows) -> np.ndarray:
+        vectors = self._vectors[rows].astype(np.float32)
+        if self._scales is not None:
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def _set_info(self, **values) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()],
+        )
+
+    ####################
+    # Live rows
+    ####################
+
+    def _load_live(self) -> None:
+        if self._live is not None:
+            return
+        self._live = np.zeros(self._capacity(), dtype=bool)
+        rows = np.fromiter(
+            (row for (row,) in self.conn.execute("SELECT row FROM chunks")),
+            dtype=np.int64,
+        )
+        self._live[rows] = True
+
+    def _mark(self, rows: List[int], live: bool) -> None:
+        if self._live is None:
+            return
+        if len(self._live) < self._capacity():
+            self._live = np.concatenate(
+                [self._live, np.zeros(self._capacity() - len(self._live), bool)]
+            )
+        self._live[rows] = live
+
+    ####################
+    # Writes
+    ####################
+
+    def add(self, items: List[VectorItem], replace: bool = False) -> None:
+        with self.lock:
+            # Last item wins for ids repeated within the batch
+            items = list({item["id"]: item for item in items}.values())
+            if not items:
+                return
+
+            existing = self.get_rows([item["id"] for item in items])
+            if replace and existing:
+                self.remove(list(existing.values()))
+            elif existing:
+                items = [item for item in items if item["id"] not in existing]
+                if not items:
+                    return
+
+            vectors = np.asarray([item["vector"] for item in items], dtype=np.float32)
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(
+                    f"Vector dimension mismatch: collection has {self.dim}, got {vectors.shape[1]}"
+                )
+
+            self._open()
+            encoded, scales = self._encode(vectors)
+            start, end = self.next_row, self.next_row + len(items)
+
+            generation = self.generation
+            if end > self._capacity():
+                # Grow into a new generation, committed below with the metadata
+                generation = self.generation + 1
+                new_vectors, new_scales = self._allocate(
+                    generation, max(1024, 2 * self._capacity(), end)
+                )
+                if start:
+                    new_vectors[:start] = self._vectors[:start]
+                    if new_scales is not None:
+                        new_scales[:start] = self._scales[:start]
+            else:
+                new_vectors, new_scales = self._vectors, self._scales
+
+            new_vectors[start:end] = encoded
+            new_vectors.flush()
+            if new_scales is not None:
+                new_scales[start:end] = scales
+                new_scales.flush()
+
+            try:
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT INTO chunks (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                        [
+                            (
+                                start + idx,
+                                item["id"],
+                                item["text"],
+                                json.dumps(
+                                    stringify_metadata(item.get("metadata") or {})
+                                ),
+                            )
+                            for idx, item in enumerate(items)
+                        ],
+                    )
+                    self._set_info(
+                        dtype=self.dtype,
+                        dim=self.dim,
+                        generation=generation,
+                        next_row=end,
+                        compactions=self.compactions,
+                    )
+            except Exception:
+                if generation != self.generation:
+                    del new_vectors, new_scales
+                    self._remove_generation(generation)
+                raise
+
+            if generation != self.generation:
+                old_generation = self.generation
+                self._vectors, self._scales = new_vectors, new_scales
+                self.generation = generation
+                self._remove_generation(old_generation)
+
+            self.next_row = end
+            self._mark(list(range(start, end)), True)
+            if self._ivf is not None:
+                self._assign_ivf(start, end)
+
+    def remove(self, rows: List[int]) -> None:
+        with self.lock:
+            if not rows:
+                return
+            with self.conn:
+                self.conn.executemany(
+                    "DELETE FROM chunks WHERE row = ?", [(row,) for row in rows]
+                )
+            self._mark(rows, False)
+
+            live = self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            if self.next_row - live > max(1024, live):
+                self.compact()
+
+    def update_metadata(self, ids: List[str], metadatas: List[dict]) -> None:
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE chunks SET metadata = ? WHERE id = ?",
+                    [
+                        (json.dumps(stringify_metadata(metadata or {})), id)
+                        for id, metadata in zip(ids, metadatas)
+                    ],
+                )
+
+    def compact(self) -> None:
+        """Rewrite the live vectors contiguously into a new generation."""
+        with self.lock:
+            self._open()
+            rows = [
+                row
+                for (row,) in self.conn.execute("SELECT row FROM chunks ORDER BY row")
+            ]
+            generation = self.generation + 1
+            vectors, scales = self._allocate(generation, max(1024, 2 * len(rows)))
+            for i in range(0, len(rows), BLOCK_SIZE):
+                block = rows[i : i + BLOCK_SIZE]
+                vectors[i : i + len(block)] = self._vectors[block]
+                if scales is not None:
+                    scales[i : i + len(block)] = self._scales[block]
+            vectors.flush()
+            if scales is not None:
+                scales.flush()
+
+            # Rows only move down, in ascending order, so targets are always free
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE chunks SET row = ? WHERE row = ?",
+                    [(new, old) for new, old in enumerate(rows) if new != old],
+                )
+                self._set_info(
+                    generation=generation,
+                    next_row=len(rows),
+                    compactions=self.compactions + 1,
+                )
+
+            old_generation = self.generation
+            self._vectors, self._scales = vectors, scales
+            self.generation = generation
+            self.next_row = len(rows)
+            self.compactions += 1
+            self._remove_generation(old_generation)
+            self._live = None
+            self._ivf = None
+            log.debug(f"Compacted {self.path} to {len(rows)} rows")
+
+    def _remove_generation(self, generation: int) -> None:
+        for name in ["vectors", "scales"]:
+            try:
+                os.remove(self._file(name, generation))
+            except FileNotFoundError:
+                pass
+
+    ####################
+    # Reads
+    ####################
+
+    def get_rows(self, ids: List[str]) -> Dict[str, int]:
+        rows = {}
+        for i in range(0, len(ids), 500):
+            batch = ids[i : i + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows.update(
+                self.conn.execute(
+                    f"SELECT id, row FROM chunks WHERE id IN ({placeholders})", batch
+                ).fetchall()
+            )
+        return rows
+
+    def get_chunks(self, rows: List[int]) -> Dict[int, Tuple[str, str, dict]]:
+        chunks = {}
+        with self.lock:
+            for i in range(0, len(rows), 500):
+                batch = rows[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                for row, id, text, metadata in self.conn.execute(
+                    f"SELECT row, id, text, metadata FROM chunks WHERE row IN ({placeholders})",
+                    batch,
+                ):
+                    chunks[row] = (id, text, json.loads(metadata or "{}"))
+        return chunks
+
+    def filter_rows(
+        self, filter: Optional[Dict] = None, limit: Optional[int] = None
+    ) -> List[int]:
+        clauses, params = [], []
+        for key, value in (filter or {}).items():
+            clauses.append("json_extract(metadata, ?) = ?")
+            params.extend(['$."' + key.replace('"', '\\"') + '"', value])
+
+        sql = "SELECT row FROM chunks"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY row"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self.lock:
+            return [row for (row,) in self.conn.execute(sql, params)]
+
+    ####################
+    # Search
+    ####################
+
+    def _build_ivf(self, live_rows: np.ndarray) -> None:
+        lists = NUMPY_VECTOR_IVF_LISTS or int(math.sqrt(len(live_rows)))
+        lists = max(1, min(lists, len(live_rows)))
+
+        # Spherical k-means over a sample of the collection
+        rng = np.random.default_rng(0)
+        sample = np.sort(
+            rng.choice(live_rows, min(len(live_rows), lists * 64), replace=False)
+        )
+        x = normalize(self._decode(sample))
+        centroids = x[rng.choice(len(x), lists, replace=False)]
+        for _ in range(IVF_ITERATIONS):
+            assignments = np.argmax(x @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, x)
+            counts = np.bincount(assignments, minlength=lists)
+            centroids = np.where(
+                counts[:, None] > 0, normalize(sums), centroids
+            ).astype(np.float32)
+
+        self._ivf = {
+            "centroids": centroids,
+            "assignments": np.zeros(0, dtype=np.int32),
+            "built_rows": self.next_row,
+        }
+        self._assign_ivf(0, self.next_row)
+        self._save_ivf()
+        log.info(f"Built IVF index with {lists} lists for {self.path}")
+
+    def _assign_ivf(self, start: int, end: int) -> None:
+        assignments = [self._ivf["assignments"][:start]]
+        for i in range(start, end, BLOCK_SIZE):
+            block = np.arange(i, min(i + BLOCK_SIZE, end))
+            assignments.append(
+                np.argmax(
+                    self._decode(block) @ self._ivf["centroids"].T, axis=1
+                ).astype(np.int32)
+            )
+        self._ivf["assignments"] = np.concatenate(assignments)
+
+    def _save_ivf(self) -> None:
+        tmp_path = os.path.join(self.path, "ivf.tmp.npz")
+        np.savez(
+            tmp_path,
+            centroids=self._ivf["centroids"],
+            assignments=self._ivf["assignments"],
+            built_rows=self._ivf["built_rows"],
+            compactions=self.compactions,
+        )
+        os.replace(tmp_path, os.path.join(self.path, "ivf.npz"))
+
+    def _load_ivf(self, live_rows: np.ndarray) -> None:
+        if self._ivf is None:
+            try:
+                with np.load(os.path.join(self.path, "ivf.npz")) as data:
+                    # Row numbers change on compaction
+                    if int(data["compactions"]) == self.compactions:
+                        self._ivf = {
+                            "centroids": data["centroids"],
+                            "assignments": data["assignments"],
+                            "built_rows": int(data["built_rows"]),
+                        }
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                log.warning(f"Ignoring unreadable IVF index of {self.path}: {e}")
+
+            if self._ivf is not None and len(self._ivf["assignments"]) < self.next_row:
+                self._assign_ivf(len(self._ivf["assignments"]), self.next_row)
+
+        # Rebuild once the collection doubled since the centroids were trained
+        if self._ivf is None or self.next_row > 2 * self._ivf["built_rows"]:
+            self._build_ivf(live_rows)
+
+    def search(
+        self, queries: np.ndarray, limit: int
+    ) -> List[List[Tuple[str, str, dict, float]]]:
+        """(id, text, metadata, cosine similarity) of the nearest chunks per query."""
+        queries = normalize(queries.astype(np.float32))
+
+        # Held throughout, compaction renumbers rows
+        with self.lock:
+            self._open()
+            if self._vectors is None or not self.next_row:
+                return [[] for _ in queries]
+            self._load_live()
+            n = self.next_row
+            live = self._live[:n]
+
+            ivf = None
+            if self.index == "ivf" and np.count_nonzero(live) >= IVF_MIN_ROWS:
+                self._load_ivf(np.flatnonzero(live))
+                ivf = self._ivf
+
+            results = []
+            for query in queries:
+                if ivf is not None:
+                    probes = min(NUMPY_VECTOR_IVF_PROBES, len(ivf["centroids"]))
+                    nearest = np.argpartition(-(ivf["centroids"] @ query), probes - 1)[
+                        :probes
+                    ]
+                    candidates = np.flatnonzero(
+                        np.isin(ivf["assignments"][:n], nearest) & live
+                    )
+                    scores = np.concatenate(
+                        [
+                            self._decode(candidates[i : i + BLOCK_SIZE]) @ query
+                            for i in range(0, len(candidates), BLOCK_SIZE)
+                        ]
+                        or [np.zeros(0, dtype=np.float32)]
+                    )
+                else:
+                    scores = np.concatenate(
+                        [
+                            self._decode(np.arange(i, min(i + BLOCK_SIZE, n))) @ query
+                            for i in range(0, n, BLOCK_SIZE)
+                        ]
+                    )
+                    scores[~live] = -np.inf
+                    candidates = np.arange(n)
+
+                k = min(limit, len(candidates))
+                if not k:
+                    results.append([])
+                    continue
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                top = [
+                    (int(candidates[i]), float(scores[i]))
+                    for i in top
+                    if np.isfinite(scores[i])
+                ]
+
+                chunks = self.get_chunks([row for row, _ in top])
+                results.append([(*chunks[row], score) for row, score in top])
+            return results
+
+    def close(self) -> None:
+        with self.lock:
+            self._vectors = None
+            self._scales = None
+            self.conn.close()
+
+
+class NumpyVectorClient(VectorDBBase):
+    """
+    Embedded vector store for single-node deployments: every collection is a
+    set of memory-mapped NumPy arrays searched in process, with an SQLite
+    sidecar for texts and metadata. Files must not be shared between
+    processes, so run a single worker with this backend.
+    """
+
+    def __init__(self):
+        self.path = NUMPY_VECTOR_DATA_PATH
+        self.collections: Dict[str, NumpyCollection] = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def _get_collection_path(self, collection_name: str) -> str:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", collection_name)[:64]
+        name_hash = hashlib.sha256(collection_name.encode()).hexdigest()[:12]
+        return os.path.join(self.path, f"{safe_name}-{name_hash}")
+
+    def _get_collection(
+        self, collection_name: str, create: bool = False
+    ) -> Optional[NumpyCollection]:
+        # Collections are opened lazily, on first use
+        with self.lock:
+            collection = self.collections.get(collection_name)
+            if collection is None:
+                path = self._get_collection_path(collection_name)
+                if not create and not os.path.exists(os.path.join(path, "meta.db")):
+                    return None
+                collection = NumpyCollection(
+                    path, dtype=NUMPY_VECTOR_DTYPE, index=NUMPY_VECTOR_INDEX
+                )
+                self.collections[collection_name] = collection
+            return collection
+
+    def _get_result(
+        self, collection: NumpyCollection, rows: List[int]
+    ) -> Optional[GetResult]:
+        chunks = collection.get_chunks(rows)
+        chunks = [chunks[row] for row in rows if row in chunks]
+        return GetResult(
+            ids=[[id for id, _, _ in chunks]],
+            documents=[[text for _, text, _ in chunks]],
+            metadatas=[[metadata for _, _, metadata in chunks]],
+        )
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self._get_collection(collection_name) is not None
+
+    def delete_collection(self, collection_name: str) -> None:
+        with self.lock:
+            collection = self.collections.pop(collection_name, None)
+            if collection is not None:
+                collection.close()
+            shutil.rmtree(
+                self._get_collection_path(collection_name), ignore_errors=True
+            )
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        self._get_collection(collection_name, create=True).add(items)
+
+    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        self._get_collection(collection_name, create=True).add(items, replace=True)
+
+    def update_metadata(
+        self, collection_name: str, ids: List[str], metadatas: List[dict]
+    ) -> None:
+        collection = self._get_collection(collection_name)
+        if collection is not None:
+            collection.update_metadata(ids, metadatas)
+
+    def search(
+        self, collection_name: str, vectors: List[List[float]], limit: int
+    ) -> Optional[SearchResult]:
+        try:
+            collection = self._get_collection(collection_name)
+            if collection is None:
+                return None
+
+            ids, distances, documents, metadatas = [], [], [], []
+            for matches in collection.search(
+                np.asarray(vectors, dtype=np.float32), limit
+            ):
+                ids.append([id for id, _, _, _ in matches])
+                documents.append([text for _, text, _, _ in matches])
+                metadatas.append([metadata for _, _, metadata, _ in matches])
+                # Cosine similarity from [-1, 1] to a [0, 1] score, like other backends,
+                # clipped as quantization can overshoot slightly
+                distances.append(
+                    [
+                        min(max((1.0 + score) / 2.0, 0.0), 1.0)
+                        for _, _, _, score in matches
+                    ]
+                )
+
+            return SearchResult(
+                ids=ids, distances=distances, documents=documents, metadatas=metadatas
+            )
+        except Exception as e:
+            log.exception(f"Error during search in {collection_name}: {e}")
+            return None
+
+    def query(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        try:
+            collection = self._get_collection(collection_name)
+            if collection is None:
+                return None
+            return self._get_result(
+                collection, collection.filter_rows(filter, limit=limit)
+            )
+        except Exception as e:
+            log.exception(f"Error during query in {collection_name}: {e}")
+            return None
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            return None
+        return self._get_result(collection, collection.filter_rows())
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            return
+
+        with collection.lock:
+            if ids:
+                rows = list(collection.get_rows(ids).values())
+            elif filter:
+                rows = collection.filter_rows(filter)
+            else:
+                return
+            collection.remove(rows)
+
+    def reset(self) -> None:
+        with self.lock:
+            for collection in self.collections.values():
+                collection.close()
+            self.collections.clear()
+            for name in os.listdir(self.path):
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
@@ -1,4 +1,4 @@
-from opensearchpy import OpenSearch
+from opensearchpy import AsyncOpenSearch, OpenSearch
 from opensearchpy.helpers import bulk
 from typing import Optional
 
@@ -21,12 +21,15 @@ from open_webui.config import (
 class OpenSearchClient(VectorDBBase):
     def __init__(self):
         self.index_prefix = "open_webui"
-        self.client = OpenSearch(
-            hosts=[OPENSEARCH_URI],
-            use_ssl=OPENSEARCH_SSL,
-            verify_certs=OPENSEARCH_CERT_VERIFY,
-            http_auth=(OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD),
-        )
+        client_kwargs = {
+            "hosts": [OPENSEARCH_URI],
+            "use_ssl": OPENSEARCH_SSL,
+            "verify_certs": OPENSEARCH_CERT_VERIFY,
+            "http_auth": (OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD),
+        }
+        self.client = OpenSearch(**client_kwargs)
+        # Used by the async API (asearch, aquery, aget)
+        self.aclient = AsyncOpenSearch(**client_kwargs)
 
     def _get_index_name(self, collection_name: str) -> str:
         return f"{self.index_prefix}_{collection_name}"
@@ -112,6 +115,24 @@ class OpenSearchClient(VectorDBBase):
         # We are simply adapting to the norms of the other DBs.
         self.client.indices.delete(index=self._get_index_name(collection_name))
 
+    def _get_search_body(self, vectors: list[list[float | int]], limit: int) -> dict:
+        return {
+            "size": limit,
+            "_source": ["text", "metadata"],
+            "query": {
+                "script_score": {
+                    "query": {"match_all": {}},
+                    "script": {
+                        "source": "(cosineSimilarity(params.query_value, doc[params.field]) + 1.0) / 2.0",
+                        "params": {
+                            "field": "vector",
+                            "query_value": vectors[0],
+                        },  # Assuming single query vector
+                    },
+                }
+            },
+        }
+
     def search(
         self, collection_name: str, vectors: list[list[float | int]], limit: int
     ) -> Optional[SearchResult]:
@@ -119,25 +140,9 @@ class OpenSearchClient(VectorDBBase):
             if not self.has_collection(collection_name):
                 return None
 
-            query = {
-                "size": limit,
-                "_source": ["text", "metadata"],
-                "query": {
-                    "script_score": {
-                        "query": {"match_all": {}},
-                        "script": {
-                            "source": "(cosineSimilarity(params.query_value, doc[params.field]) + 1.0) / 2.0",
-                            "params": {
-                                "field": "vector",
-                                "query_value": vectors[0],
-                            },  # Assuming single query vector
-                        },
-                    }
-                },
-            }
-
             result = self.client.search(
-                index=self._get_index_name(collection_name), body=query
+                index=self._get_index_name(collection_name),
+                body=self._get_search_body(vectors, limit),
             )
 
             return self._result_to_search_result(result)
@@ -145,12 +150,26 @@ class OpenSearchClient(VectorDBBase):
         except Exception as e:
             return None
 
-    def query(
-        self, collection_name: str, filter: dict, limit: Optional[int] = None
-    ) -> Optional[GetResult]:
-        if not self.has_collection(collection_name):
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        try:
+            if not await self.aclient.indices.exists(
+                index=self._get_index_name(collection_name)
+            ):
+                return None
+
+            result = await self.aclient.search(
+                index=self._get_index_name(collection_name),
+                body=self._get_search_body(vectors, limit),
+            )
+
+            return self._result_to_search_result(result)
+
+        except Exception as e:
             return None
 
+    def _get_query_body(self, filter: dict) -> dict:
         query_body = {
             "query": {"bool": {"filter": []}},
             "_source": ["text", "metadata"],
@@ -160,13 +179,42 @@ class OpenSearchClient(VectorDBBase):
             query_body["query"]["bool"]["filter"].append(
                 {"term": {"metadata." + str(field) + ".keyword": value}}
             )
+        return query_body
+
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not self.has_collection(collection_name):
+            return None
 
         size = limit if limit else 10000
 
         try:
             result = self.client.search(
                 index=self._get_index_name(collection_name),
-                body=query_body,
+                body=self._get_query_body(filter),
+                size=size,
+            )
+
+            return self._result_to_get_result(result)
+
+        except Exception as e:
+            return None
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not await self.aclient.indices.exists(
+            index=self._get_index_name(collection_name)
+        ):
+            return None
+
+        size = limit if limit else 10000
+
+        try:
+            result = await self.aclient.search(
+                index=self._get_index_name(collection_name),
+                body=self._get_query_body(filter),
                 size=size,
             )
 
@@ -187,6 +235,14 @@ class OpenSearchClient(VectorDBBase):
         )
         return self._result_to_get_result(result)
 
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        query = {"query": {"match_all": {}}, "_source": ["text", "metadata"]}
+
+        result = await self.aclient.search(
+            index=self._get_index_name(collection_name), body=query
+        )
+        return self._result_to_get_result(result)
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         self._create_index_if_not_exists(
             collection_name=collection_name, dimension=len(items[0]["vector"])
@@ -1,6 +1,8 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
+import hashlib
 import logging
 import json
+import time
 from sqlalchemy import (
     func,
     literal,
@@ -17,6 +19,8 @@ from sqlalchemy import (
     Table,
     values,
 )
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.sql import true
 from sqlalchemy.pool import NullPool, QueuePool
 
@@ -43,6 +47,14 @@ from open_webui.config import (
     PGVECTOR_POOL_MAX_OVERFLOW,
     PGVECTOR_POOL_TIMEOUT,
     PGVECTOR_POOL_RECYCLE,
+    PGVECTOR_INDEX_METHOD,
+    PGVECTOR_IVFFLAT_LISTS,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_HNSW_ITERATIVE_SCAN,
+    PGVECTOR_PARTITION_BY_COLLECTION,
+    PGVECTOR_INSERT_BATCH_SIZE,
 )
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -79,6 +91,8 @@ class DocumentChunk(Base):
 
 class PgvectorClient(VectorDBBase):
     def __init__(self) -> None:
+        # Created on the first asearch (False until then)
+        self._async_engine = False
 
         # if no pgvector uri, use the existing database connection
         if not PGVECTOR_DB_URL:
@@ -149,19 +163,27 @@ class PgvectorClient(VectorDBBase):
             # Check vector length consistency
             self.check_vector_length()
 
-            # Create the tables if they do not exist
-            # Base.metadata.create_all requires a bind (engine or connection)
-            # Get the connection from the session
-            connection = self.session.connection()
-            Base.metadata.create_all(bind=connection)
+            self.partitioned = self.is_partitioned()
+            self._partitions = set()
+            if self.partitioned is None and PGVECTOR_PARTITION_BY_COLLECTION:
+                self.create_partitioned_table("document_chunk")
+                self.partitioned = True
+            else:
+                # Create the tables if they do not exist
+                # Base.metadata.create_all requires a bind (engine or connection)
+                # Get the connection from the session
+                connection = self.session.connection()
+                Base.metadata.create_all(bind=connection)
+                self.partitioned = bool(self.partitioned)
+
+                if PGVECTOR_PARTITION_BY_COLLECTION and not self.partitioned:
+                    log.warning(
+                        "PGVECTOR_PARTITION_BY_COLLECTION is enabled but document_chunk is not partitioned, "
+                        "rebuild the vector index to migrate it."
+                    )
 
             # Create an index on the vector column if it doesn't exist
-            self.session.execute(
-                text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
-                    "ON document_chunk USING ivfflat (vector vector_cosine_ops) WITH (lists = 100);"
-                )
-            )
+            self.create_vector_index("idx_document_chunk_vector")
             self.session.execute(
                 text(
                     "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
@@ -169,6 +191,13 @@ class PgvectorClient(VectorDBBase):
                 )
             )
             self.session.commit()
+
+            index_method = self.get_index_method()
+            if index_method and index_method != PGVECTOR_INDEX_METHOD:
+                log.warning(
+                    f"Existing vector index uses {index_method} but PGVECTOR_INDEX_METHOD is {PGVECTOR_INDEX_METHOD}, "
+                    "rebuild the vector index to apply it."
+                )
             log.info("Initialization complete.")
         except Exception as e:
             self.session.rollback()
@@ -210,6 +239,373 @@ class PgvectorClient(VectorDBBase):
                 "The 'vector' column does not exist in the 'document_chunk' table."
             )
 
+    ####################
+    # Index management
+    ####################
+
+    def is_partitioned(self) -> Optional[bool]:
+        """Whether document_chunk is partitioned, or None if it does not exist yet."""
+        relkind = self.session.execute(
+            text(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass('document_chunk')"
+            )
+        ).scalar()
+        if relkind is None:
+            return None
+        return relkind == "p"
+
+    def create_partitioned_table(self, table_name: str) -> None:
+        data_type = "BYTEA" if PGVECTOR_PGCRYPTO else "TEXT"
+        metadata_type = "BYTEA" if PGVECTOR_PGCRYPTO else "JSONB"
+        self.session.execute(
+            text(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table_name} (
+                    id TEXT NOT NULL,
+                    vector vector({VECTOR_LENGTH}),
+                    collection_name TEXT NOT NULL,
+                    text {data_type},
+                    vmetadata {metadata_type},
+                    PRIMARY KEY (id, collection_name)
+                ) PARTITION BY LIST (collection_name);
+            """
+            )
+        )
+        # Catches rows of collections whose partition could not be created
+        self.session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS document_chunk_default PARTITION OF {table_name} DEFAULT;"
+            )
+        )
+
+    @staticmethod
+    def get_partition_name(collection_name: str) -> str:
+        return (
+            f"document_chunk_{hashlib.md5(collection_name.encode()).hexdigest()[:20]}"
+        )
+
+    def create_partition(
+        self, collection_name: str, table_name: str = "document_chunk"
+    ) -> None:
+        # DDL cannot take bind parameters, quote the value as a string literal
+        value = "'" + collection_name.replace("'", "''") + "'"
+        self.session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {self.get_partition_name(collection_name)} "
+                f"PARTITION OF {table_name} FOR VALUES IN ({value});"
+            )
+        )
+
+    def refresh_partitioned(self) -> bool:
+        """
+        Re-read whether document_chunk is partitioned (a catalog lookup), since
+        another worker may have migrated it by an index rebuild meanwhile.
+        """
+        partitioned = bool(self.is_partitioned())
+        if partitioned != self.partitioned:
+            self.partitioned = partitioned
+            self._partitions = set()
+        return partitioned
+
+    def ensure_partition(self, collection_name: str) -> None:
+        if not self.refresh_partitioned() or collection_name in self._partitions:
+            return
+
+        partition_name = self.get_partition_name(collection_name)
+        try:
+            self.create_partition(collection_name)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            # Created concurrently by another worker
+            exists = self.session.execute(
+                text("SELECT to_regclass(:name) IS NOT NULL"), {"name": partition_name}
+            ).scalar()
+            self.session.rollback()
+            if not exists:
+                # e.g. rows of the collection already are in the default partition
+                log.warning(
+                    f"Could not create partition of {collection_name}, "
+                    f"its rows go to the default partition: {e}"
+                )
+        self._partitions.add(collection_name)
+
+    @staticmethod
+    def get_vector_index_statement(
+        index_name: str, table_name: str = "document_chunk", concurrently: bool = False
+    ) -> Optional[str]:
+        create = "CREATE INDEX CONCURRENTLY" if concurrently else "CREATE INDEX"
+        if PGVECTOR_INDEX_METHOD == "hnsw":
+            return (
+                f"{create} IF NOT EXISTS {index_name} "
+                f"ON {table_name} USING hnsw (vector vector_cosine_ops) "
+                f"WITH (m = {int(PGVECTOR_HNSW_M)}, ef_construction = {int(PGVECTOR_HNSW_EF_CONSTRUCTION)});"
+            )
+        elif PGVECTOR_INDEX_METHOD == "ivfflat":
+            return (
+                f"{create} IF NOT EXISTS {index_name} "
+                f"ON {table_name} USING ivfflat (vector vector_cosine_ops) "
+                f"WITH (lists = {int(PGVECTOR_IVFFLAT_LISTS)});"
+            )
+        return None
+
+    def create_vector_index(
+        self, index_name: str, table_name: str = "document_chunk"
+    ) -> None:
+        statement = self.get_vector_index_statement(index_name, table_name)
+        if statement:
+            self.session.execute(text(statement))
+
+    def get_index_method(self) -> Optional[str]:
+        return self.session.execute(
+            text(
+                "SELECT am.amname FROM pg_class c JOIN pg_am am ON am.oid = c.relam "
+                "WHERE c.oid = to_regclass('idx_document_chunk_vector')"
+            )
+        ).scalar()
+
+    @staticmethod
+    def get_search_param_statements() -> list:
+        # SET LOCAL only lasts for the current (read-only) transaction
+        statements = []
+        if PGVECTOR_INDEX_METHOD == "hnsw":
+            statements.append(
+                text(f"SET LOCAL hnsw.ef_search = {int(PGVECTOR_HNSW_EF_SEARCH)}")
+            )
+            if PGVECTOR_HNSW_ITERATIVE_SCAN != "off":
+                statements.append(
+                    text(
+                        f"SET LOCAL hnsw.iterative_scan = {PGVECTOR_HNSW_ITERATIVE_SCAN}"
+                    )
+                )
+        return statements
+
+    def set_search_params(self) -> None:
+        for statement in self.get_search_param_statements():
+            self.session.execute(statement)
+
+    def get_index_info(self) -> dict:
+        try:
+            partitions = 0
+            if self.refresh_partitioned():
+                partitions = self.session.execute(
+                    text(
+                        "SELECT COUNT(*) FROM pg_inherits WHERE inhparent = to_regclass('document_chunk')"
+                    )
+                ).scalar()
+            return {
+                "method": self.get_index_method() or "none",
+                "configured_method": PGVECTOR_INDEX_METHOD,
+                "partitioned": self.partitioned,
+                "partition_by_collection": PGVECTOR_PARTITION_BY_COLLECTION,
+                "partitions": partitions,
+                "params": {
+                    "ivfflat_lists": PGVECTOR_IVFFLAT_LISTS,
+                    "hnsw_m": PGVECTOR_HNSW_M,
+                    "hnsw_ef_construction": PGVECTOR_HNSW_EF_CONSTRUCTION,
+                    "hnsw_ef_search": PGVECTOR_HNSW_EF_SEARCH,
+                    "hnsw_iterative_scan": PGVECTOR_HNSW_ITERATIVE_SCAN,
+                },
+            }
+        finally:
+            self.session.rollback()  # read-only transaction
+
+    def rebuild_index(self) -> dict:
+        """
+        Recreate the vector index with the configured method and parameters,
+        first migrating document_chunk to per-collection partitions if
+        PGVECTOR_PARTITION_BY_COLLECTION is enabled and it is not partitioned yet.
+
+        Searches keep being served throughout. Writes are blocked while the
+        table is migrated, and while the index of a partitioned table is built
+        (PostgreSQL cannot build those concurrently); an unpartitioned table
+        gets its new index built concurrently next to the old one.
+        """
+        try:
+            if PGVECTOR_PARTITION_BY_COLLECTION and not self.refresh_partitioned():
+                self.migrate_to_partitions()
+            elif self.partitioned:
+                log.info(f"Building {PGVECTOR_INDEX_METHOD} vector index")
+                start = time.time()
+                self.swap_vector_index(self.session.execute)
+                self.session.commit()
+                log.info(f"Vector index rebuilt in {time.time() - start:.1f}s")
+            else:
+                self.session.rollback()
+                log.info(f"Building {PGVECTOR_INDEX_METHOD} vector index concurrently")
+                start = time.time()
+                # CONCURRENTLY cannot run inside a transaction block
+                with self.session.get_bind().connect() as connection:
+                    connection = connection.execution_options(
+                        isolation_level="AUTOCOMMIT"
+                    )
+                    self.swap_vector_index(connection.execute, concurrently=True)
+                log.info(f"Vector index rebuilt in {time.time() - start:.1f}s")
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during index rebuild: {e}")
+            raise
+
+        return self.get_index_info()
+
+    def swap_vector_index(
+        self,
+        execute: Callable,
+        table_name: str = "document_chunk",
+        concurrently: bool = False,
+    ) -> None:
+        """Build the new index next to the old one, then replace the old one."""
+        drop = "DROP INDEX CONCURRENTLY" if concurrently else "DROP INDEX"
+        # Also clears an invalid index left behind by a failed concurrent build
+        execute(text(f"{drop} IF EXISTS idx_document_chunk_vector_new;"))
+        statement = self.get_vector_index_statement(
+            "idx_document_chunk_vector_new", table_name, concurrently=concurrently
+        )
+        if statement:
+            execute(text(statement))
+        execute(text(f"{drop} IF EXISTS idx_document_chunk_vector;"))
+        if statement:
+            execute(
+                text(
+                    "ALTER INDEX idx_document_chunk_vector_new RENAME TO idx_document_chunk_vector;"
+                )
+            )
+
+    def migrate_to_partitions(self) -> None:
+        """
+        Copy document_chunk into a partitioned table with its indexes, then
+        swap the tables, in one transaction. The SHARE lock taken first blocks
+        writes (which would be lost by the copy) but not searches until the
+        swap, which only holds ACCESS EXCLUSIVE until the commit right after.
+        """
+        log.info("Migrating document_chunk to per-collection partitions")
+        start = time.time()
+        self.session.execute(text("LOCK TABLE document_chunk IN SHARE MODE;"))
+        self.create_partitioned_table("document_chunk_partitioned")
+        collection_names = (
+            self.session.execute(
+                text("SELECT DISTINCT collection_name FROM document_chunk")
+            )
+            .scalars()
+            .all()
+        )
+        for collection_name in collection_names:
+            self.create_partition(collection_name, "document_chunk_partitioned")
+        self.session.execute(
+            text(
+                "INSERT INTO document_chunk_partitioned (id, vector, collection_name, text, vmetadata) "
+                "SELECT id, vector, collection_name, text, vmetadata FROM document_chunk;"
+            )
+        )
+        self.create_vector_index(
+            "idx_document_chunk_vector_new", "document_chunk_partitioned"
+        )
+        self.session.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name_new "
+                "ON document_chunk_partitioned (collection_name);"
+            )
+        )
+
+        # Dropping the table drops its indexes as well
+        self.session.execute(text("DROP TABLE document_chunk;"))
+        self.session.execute(
+            text("ALTER TABLE document_chunk_partitioned RENAME TO document_chunk;")
+        )
+        self.session.execute(
+            text(
+                "ALTER INDEX IF EXISTS idx_document_chunk_vector_new RENAME TO idx_document_chunk_vector;"
+            )
+        )
+        self.session.execute(
+            text(
+                "ALTER INDEX idx_document_chunk_collection_name_new "
+                "RENAME TO idx_document_chunk_collection_name;"
+            )
+        )
+        self.session.commit()
+        log.info(f"Migrated document_chunk in {time.time() - start:.1f}s")
+
+        self.partitioned = True
+        self._partitions = set(collection_names)
+
+    def get_nearest_ids(
+        self, collection_name: str, vector: List[float], k: int, exact: bool = False
+    ) -> List[str]:
+        try:
+            if exact:
+                # Force a sequential scan, i.e. exact nearest neighbour search
+                self.session.execute(text("SET LOCAL enable_indexscan = off"))
+                self.session.execute(text("SET LOCAL enable_bitmapscan = off"))
+            else:
+                self.set_search_params()
+
+            query_vector = cast(array(vector), Vector(VECTOR_LENGTH))
+            rows = self.session.execute(
+                select(DocumentChunk.id)
+                .where(DocumentChunk.collection_name == collection_name)
+                .order_by(DocumentChunk.vector.cosine_distance(query_vector))
+                .limit(k)
+            ).all()
+            return [row.id for row in rows]
+        finally:
+            self.session.rollback()  # read-only transaction
+
+    def benchmark_index(
+        self, collection_name: str, k: int = 10, samples: int = 20
+    ) -> dict:
+        """
+        Measure recall@k and latency of index (ANN) search against exact search,
+        using vectors sampled from the collection as queries.
+        """
+        try:
+            vectors = (
+                self.session.execute(
+                    select(DocumentChunk.vector)
+                    .where(DocumentChunk.collection_name == collection_name)
+                    .order_by(func.random())
+                    .limit(samples)
+                )
+                .scalars()
+                .all()
+            )
+        finally:
+            self.session.rollback()  # read-only transaction
+
+        recalls, ann_latencies, exact_latencies = [], [], []
+        for vector in vectors:
+            vector = [float(value) for value in vector]
+
+            start = time.perf_counter()
+            ann_ids = self.get_nearest_ids(collection_name, vector, k)
+            ann_latencies.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            exact_ids = self.get_nearest_ids(collection_name, vector, k, exact=True)
+            exact_latencies.append((time.perf_counter() - start) * 1000)
+
+            if exact_ids:
+                recalls.append(len(set(ann_ids) & set(exact_ids)) / len(exact_ids))
+
+        def percentiles(latencies: List[float]) -> dict:
+            latencies = sorted(latencies)
+            if not latencies:
+                return {"p50": None, "p95": None}
+            return {
+                "p50": latencies[len(latencies) // 2],
+                "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            }
+
+        return {
+            "collection_name": collection_name,
+            "method": self.get_index_info()["method"],
+            "k": k,
+            "samples": len(vectors),
+            "recall": (sum(recalls) / len(recalls)) if recalls else None,
+            "ann_latency_ms": percentiles(ann_latencies),
+            "exact_latency_ms": percentiles(exact_latencies),
+        }
+
     def adjust_vector_length(self, vector: List[float]) -> List[float]:
         # Adjust vector to have length VECTOR_LENGTH
         current_length = len(vector)
@@ -221,55 +617,85 @@ class PgvectorClient(VectorDBBase):
             vector = vector[:VECTOR_LENGTH]
         return vector
 
+    def write_items(
+        self, collection_name: str, items: List[VectorItem], on_conflict: str = ""
+    ) -> None:
+        """
+        Write items with one set-based INSERT per PGVECTOR_INSERT_BATCH_SIZE
+        items, passing the columns as arrays and unnesting them server side
+        (encrypting text and metadata there as well when pgcrypto is enabled).
+        """
+        if PGVECTOR_PGCRYPTO:
+            text_value = "pgp_sym_encrypt(t.text, :key)"
+            metadata_value = "pgp_sym_encrypt(t.metadata, :key)"
+        else:
+            text_value = "t.text"
+            metadata_value = "CAST(t.metadata AS jsonb)"
+
+        statement = text(
+            f"""
+            INSERT INTO document_chunk
+            (id, vector, collection_name, text, vmetadata)
+            SELECT t.id, CAST(t.vector AS vector), :collection_name, {text_value}, {metadata_value}
+            FROM unnest(
+                CAST(:ids AS text[]),
+                CAST(:vectors AS text[]),
+                CAST(:texts AS text[]),
+                CAST(:metadatas AS text[])
+            ) AS t(id, vector, text, metadata)
+            {on_conflict}
+        """
+        )
+
+        # A single statement cannot insert or update the same id twice, keep the last one
+        items = list({item["id"]: item for item in items}.values())
+
+        batch_size = max(1, PGVECTOR_INSERT_BATCH_SIZE)
+        for i in range(0, len(items), batch_size):
+            batch = items[i : i + batch_size]
+            params = {
+                "ids": [item["id"] for item in batch],
+                "vectors": [
+                    "["
+                    + ",".join(
+                        str(float(value))
+                        for value in self.adjust_vector_length(item["vector"])
+                    )
+                    + "]"
+                    for item in batch
+                ],
+                "texts": [item["text"] for item in batch],
+                "metadatas": [
+                    json.dumps(
+                        item["metadata"]
+                        if PGVECTOR_PGCRYPTO
+                        else stringify_metadata(item["metadata"])
+                    )
+                    for item in batch
+                ],
+                "collection_name": collection_name,
+            }
+            if PGVECTOR_PGCRYPTO:
+                params["key"] = PGVECTOR_PGCRYPTO_KEY
+            self.session.execute(statement, params)
+
     def insert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
+            self.ensure_partition(collection_name)
             if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    # Use raw SQL for BYTEA/pgcrypto
-                    # Ensure metadata is converted to its JSON text representation
-                    json_metadata = json.dumps(item["metadata"])
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata_text, :key)
-                            )
-                            ON CONFLICT (id) DO NOTHING
-                        """
-                        ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata_text": json_metadata,
-                            "key": PGVECTOR_PGCRYPTO_KEY,
-                        },
-                    )
+                self.write_items(
+                    collection_name,
+                    items,
+                    on_conflict=f"ON CONFLICT {self.conflict_target} DO NOTHING",
+                )
                 self.session.commit()
                 log.info(f"Encrypted & inserted {len(items)} into '{collection_name}'")
 
             else:
-                new_items = []
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    new_chunk = DocumentChunk(
-                        id=item["id"],
-                        vector=vector,
-                        collection_name=collection_name,
-                        text=item["text"],
-                        vmetadata=stringify_metadata(item["metadata"]),
-                    )
-                    new_items.append(new_chunk)
-                self.session.bulk_save_objects(new_items)
+                self.write_items(collection_name, items)
                 self.session.commit()
                 log.info(
-                    f"Inserted {len(new_items)} items into collection '{collection_name}'."
+                    f"Inserted {len(items)} items into collection '{collection_name}'."
                 )
         except Exception as e:
             self.session.rollback()
@@ -278,63 +704,20 @@ class PgvectorClient(VectorDBBase):
 
     def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
+            self.ensure_partition(collection_name)
+            self.write_items(
+                collection_name,
+                items,
+                on_conflict=f"""ON CONFLICT {self.conflict_target} DO UPDATE SET
+                  vector = EXCLUDED.vector,
+                  collection_name = EXCLUDED.collection_name,
+                  text = EXCLUDED.text,
+                  vmetadata = EXCLUDED.vmetadata""",
+            )
+            self.session.commit()
             if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    json_metadata = json.dumps(item["metadata"])
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata_text, :key)
-                            )
-                            ON CONFLICT (id) DO UPDATE SET
-                              vector = EXCLUDED.vector,
-                              collection_name = EXCLUDED.collection_name,
-                              text = EXCLUDED.text,
-                              vmetadata = EXCLUDED.vmetadata
-                        """
-                        ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata_text": json_metadata,
-                            "key": PGVECTOR_PGCRYPTO_KEY,
-                        },
-                    )
-                self.session.commit()
                 log.info(f"Encrypted & upserted {len(items)} into '{collection_name}'")
             else:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    existing = (
-                        self.session.query(DocumentChunk)
-                        .filter(DocumentChunk.id == item["id"])
-                        .first()
-                    )
-                    if existing:
-                        existing.vector = vector
-                        existing.text = item["text"]
-                        existing.vmetadata = stringify_metadata(item["metadata"])
-                        existing.collection_name = (
-                            collection_name  # Update collection_name if necessary
-                        )
-                    else:
-                        new_chunk = DocumentChunk(
-                            id=item["id"],
-                            vector=vector,
-                            collection_name=collection_name,
-                            text=item["text"],
-                            vmetadata=stringify_metadata(item["metadata"]),
-                        )
-                        self.session.add(new_chunk)
-                self.session.commit()
                 log.info(
                     f"Upserted {len(items)} items into collection '{collection_name}'."
                 )
@@ -343,6 +726,135 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during upsert: {e}")
             raise
 
+    def update_metadata(
+        self, collection_name: str, ids: List[str], metadatas: List[Any]
+    ) -> None:
+        if PGVECTOR_PGCRYPTO:
+            metadata_value = "pgp_sym_encrypt(t.metadata, :key)"
+        else:
+            metadata_value = "CAST(t.metadata AS jsonb)"
+
+        statement = text(
+            f"""
+            UPDATE document_chunk SET vmetadata = {metadata_value}
+            FROM unnest(CAST(:ids AS text[]), CAST(:metadatas AS text[]))
+                AS t(id, metadata)
+            WHERE document_chunk.id = t.id
+              AND document_chunk.collection_name = :collection_name
+        """
+        )
+        try:
+            batch_size = max(1, PGVECTOR_INSERT_BATCH_SIZE)
+            for i in range(0, len(ids), batch_size):
+                params = {
+                    "ids": ids[i : i + batch_size],
+                    "metadatas": [
+                        json.dumps(
+                            metadata
+                            if PGVECTOR_PGCRYPTO
+                            else stringify_metadata(metadata)
+                        )
+                        for metadata in metadatas[i : i + batch_size]
+                    ],
+                    "collection_name": collection_name,
+                }
+                if PGVECTOR_PGCRYPTO:
+                    params["key"] = PGVECTOR_PGCRYPTO_KEY
+                self.session.execute(statement, params)
+            self.session.commit()
+            log.info(
+                f"Updated the metadata of {len(ids)} items in collection '{collection_name}'."
+            )
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during metadata update: {e}")
+            raise
+
+    def get_search_statement(
+        self,
+        collection_name: str,
+        vectors: List[List[float]],
+        limit: Optional[int] = None,
+    ):
+        def vector_expr(vector):
+            return cast(array(vector), Vector(VECTOR_LENGTH))
+
+        # Create the values for query vectors
+        qid_col = column("qid", Integer)
+        q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
+        query_vectors = (
+            values(qid_col, q_vector_col)
+            .data([(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)])
+            .alias("query_vectors")
+        )
+
+        result_fields = [
+            DocumentChunk.id,
+        ]
+        if PGVECTOR_PGCRYPTO:
+            result_fields.append(
+                pgcrypto_decrypt(DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text).label(
+                    "text"
+                )
+            )
+            result_fields.append(
+                pgcrypto_decrypt(
+                    DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
+                ).label("vmetadata")
+            )
+        else:
+            result_fields.append(DocumentChunk.text)
+            result_fields.append(DocumentChunk.vmetadata)
+        result_fields.append(
+            (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
+                "distance"
+            )
+        )
+
+        # Build the lateral subquery for each query vector
+        subq = (
+            select(*result_fields)
+            .where(DocumentChunk.collection_name == collection_name)
+            .order_by((DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)))
+        )
+        if limit is not None:
+            subq = subq.limit(limit)
+        subq = subq.lateral("result")
+
+        # Build the main query by joining query_vectors and the lateral subquery
+        return (
+            select(
+                query_vectors.c.qid,
+                subq.c.id,
+                subq.c.text,
+                subq.c.vmetadata,
+                subq.c.distance,
+            )
+            .select_from(query_vectors)
+            .join(subq, true())
+            .order_by(query_vectors.c.qid, subq.c.distance)
+        )
+
+    @staticmethod
+    def rows_to_search_result(rows, num_queries: int) -> SearchResult:
+        ids = [[] for _ in range(num_queries)]
+        distances = [[] for _ in range(num_queries)]
+        documents = [[] for _ in range(num_queries)]
+        metadatas = [[] for _ in range(num_queries)]
+
+        for row in rows:
+            qid = int(row.qid)
+            ids[qid].append(row.id)
+            # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
+            # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
+            distances[qid].append((2.0 - row.distance) / 2.0)
+            documents[qid].append(row.text)
+            metadatas[qid].append(row.vmetadata)
+
+        return SearchResult(
+            ids=ids, distances=distances, documents=documents, metadatas=metadatas
+        )
+
     def search(
         self,
         collection_name: str,
@@ -355,102 +867,91 @@ class PgvectorClient(VectorDBBase):
 
             # Adjust query vectors to VECTOR_LENGTH
             vectors = [self.adjust_vector_length(vector) for vector in vectors]
-            num_queries = len(vectors)
-
-            def vector_expr(vector):
-                return cast(array(vector), Vector(VECTOR_LENGTH))
-
-            # Create the values for query vectors
-            qid_col = column("qid", Integer)
-            q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
-            query_vectors = (
-                values(qid_col, q_vector_col)
-                .data(
-                    [(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)]
-                )
-                .alias("query_vectors")
-            )
+            stmt = self.get_search_statement(collection_name, vectors, limit)
 
-            result_fields = [
-                DocumentChunk.id,
-            ]
-            if PGVECTOR_PGCRYPTO:
-                result_fields.append(
-                    pgcrypto_decrypt(
-                        DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text
-                    ).label("text")
-                )
-                result_fields.append(
-                    pgcrypto_decrypt(
-                        DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
-                    ).label("vmetadata")
-                )
-            else:
-                result_fields.append(DocumentChunk.text)
-                result_fields.append(DocumentChunk.vmetadata)
-            result_fields.append(
-                (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
-                    "distance"
-                )
-            )
+            self.set_search_params()
+            results = self.session.execute(stmt).all()
 
-            # Build the lateral subquery for each query vector
-            subq = (
-                select(*result_fields)
-                .where(DocumentChunk.collection_name == collection_name)
-                .order_by(
-                    (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
-                )
-            )
-            if limit is not None:
-                subq = subq.limit(limit)
-            subq = subq.lateral("result")
-
-            # Build the main query by joining query_vectors and the lateral subquery
-            stmt = (
-                select(
-                    query_vectors.c.qid,
-                    subq.c.id,
-                    subq.c.text,
-                    subq.c.vmetadata,
-                    subq.c.distance,
-                )
-                .select_from(query_vectors)
-                .join(subq, true())
-                .order_by(query_vectors.c.qid, subq.c.distance)
-            )
+            self.session.rollback()  # read-only transaction
+            return self.rows_to_search_result(results, len(vectors))
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during search: {e}")
+            return None
 
-            result_proxy = self.session.execute(stmt)
-            results = result_proxy.all()
+    def get_async_engine(self):
+        """
+        Engine of asearch, connecting to the same database through asyncpg.
+        None if asyncpg is not installed or the database is not PostgreSQL.
+        """
+        if self._async_engine is not False:
+            return self._async_engine
 
-            ids = [[] for _ in range(num_queries)]
-            distances = [[] for _ in range(num_queries)]
-            documents = [[] for _ in range(num_queries)]
-            metadatas = [[] for _ in range(num_queries)]
+        self._async_engine = None
+        try:
+            import asyncpg  # noqa: F401
+        except ImportError:
+            log.info("asyncpg is not installed, pgvector asearch uses a thread pool")
+            return None
 
-            if not results:
-                return SearchResult(
-                    ids=ids,
-                    distances=distances,
-                    documents=documents,
-                    metadatas=metadatas,
-                )
+        url = (
+            make_url(PGVECTOR_DB_URL)
+            if PGVECTOR_DB_URL
+            else self.session.get_bind().url
+        )
+        if url.get_backend_name() != "postgresql":
+            return None
 
-            for row in results:
-                qid = int(row.qid)
-                ids[qid].append(row.id)
-                # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
-                # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
-                distances[qid].append((2.0 - row.distance) / 2.0)
-                documents[qid].append(row.text)
-                metadatas[qid].append(row.vmetadata)
+        # asyncpg takes the ssl mode as a connect argument
+        connect_args = {}
+        if "sslmode" in url.query:
+            connect_args["ssl"] = url.query["sslmode"]
+            url = url.difference_update_query(["sslmode"])
+        url = url.set(drivername="postgresql+asyncpg")
 
-            self.session.rollback()  # read-only transaction
-            return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
-            )
+        if isinstance(PGVECTOR_POOL_SIZE, int) and PGVECTOR_POOL_SIZE <= 0:
+            pool_kwargs = {"poolclass": NullPool}
+        elif isinstance(PGVECTOR_POOL_SIZE, int):
+            pool_kwargs = {
+                "pool_size": PGVECTOR_POOL_SIZE,
+                "max_overflow": PGVECTOR_POOL_MAX_OVERFLOW,
+                "pool_timeout": PGVECTOR_POOL_TIMEOUT,
+                "pool_recycle": PGVECTOR_POOL_RECYCLE,
+            }
+        else:
+            pool_kwargs = {}
+
+        self._async_engine = create_async_engine(
+            url, connect_args=connect_args, pool_pre_ping=True, **pool_kwargs
+        )
+        return self._async_engine
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: List[List[float]],
+        limit: Optional[int] = None,
+    ) -> Optional[SearchResult]:
+        engine = self.get_async_engine()
+        if engine is None:
+            return await super().asearch(collection_name, vectors, limit)
+
+        try:
+            if not vectors:
+                return None
+
+            # Adjust query vectors to VECTOR_LENGTH
+            vectors = [self.adjust_vector_length(vector) for vector in vectors]
+            stmt = self.get_search_statement(collection_name, vectors, limit)
+
+            # The transaction is rolled back when the connection is released
+            async with engine.connect() as connection:
+                for statement in self.get_search_param_statements():
+                    await connection.execute(statement)
+                results = (await connection.execute(stmt)).all()
+
+            return self.rows_to_search_result(results, len(vectors))
         except Exception as e:
-            self.session.rollback()
             log.exception(f"Error during search: {e}")
             return None
 
@@ -629,6 +1130,24 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error checking collection existence: {e}")
             return False
 
+    @property
+    def conflict_target(self) -> str:
+        # Unique constraints of a partitioned table include the partition key
+        return "(id, collection_name)" if self.partitioned else "(id)"
+
     def delete_collection(self, collection_name: str) -> None:
+        if self.refresh_partitioned():
+            try:
+                self.session.execute(
+                    text(
+                        f"DROP TABLE IF EXISTS {self.get_partition_name(collection_name)};"
+                    )
+                )
+                self.session.commit()
+                self._partitions.discard(collection_name)
+            except Exception as e:
+                self.session.rollback()
+                log.exception(f"Error dropping partition of {collection_name}: {e}")
+                raise
         self.delete(collection_name)
         log.info(f"Collection '{collection_name}' deleted.")
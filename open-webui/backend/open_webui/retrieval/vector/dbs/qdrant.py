@@ -2,7 +2,7 @@ from typing import Optional
 import logging
 from urllib.parse import urlparse
 
-from qdrant_client import QdrantClient as Qclient
+from qdrant_client import AsyncQdrantClient, QdrantClient as Qclient
 from qdrant_client.http.models import PointStruct
 from qdrant_client.models import models
 
@@ -43,6 +43,7 @@ class QdrantClient(VectorDBBase):
 
         if not self.QDRANT_URI:
             self.client = None
+            self.aclient = None
             return
 
         # Unified handling for either scheme
@@ -51,20 +52,23 @@ class QdrantClient(VectorDBBase):
         http_port = parsed.port or 6333  # default REST port
 
         if self.PREFER_GRPC:
-            self.client = Qclient(
-                host=host,
-                port=http_port,
-                grpc_port=self.GRPC_PORT,
-                prefer_grpc=self.PREFER_GRPC,
-                api_key=self.QDRANT_API_KEY,
-                timeout=self.QDRANT_TIMEOUT,
-            )
+            client_kwargs = {
+                "host": host,
+                "port": http_port,
+                "grpc_port": self.GRPC_PORT,
+                "prefer_grpc": self.PREFER_GRPC,
+                "api_key": self.QDRANT_API_KEY,
+                "timeout": self.QDRANT_TIMEOUT,
+            }
         else:
-            self.client = Qclient(
-                url=self.QDRANT_URI,
-                api_key=self.QDRANT_API_KEY,
-                timeout=QDRANT_TIMEOUT,
-            )
+            client_kwargs = {
+                "url": self.QDRANT_URI,
+                "api_key": self.QDRANT_API_KEY,
+                "timeout": QDRANT_TIMEOUT,
+            }
+        self.client = Qclient(**client_kwargs)
+        # Used by the async API (asearch, aquery, aget)
+        self.aclient = AsyncQdrantClient(**client_kwargs)
 
     def _result_to_get_result(self, points) -> GetResult:
         ids = []
@@ -158,6 +162,22 @@ class QdrantClient(VectorDBBase):
             query=vectors[0],
             limit=limit,
         )
+        return self._query_response_to_search_result(query_response)
+
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        if limit is None:
+            limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+        query_response = await self.aclient.query_points(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            query=vectors[0],
+            limit=limit,
+        )
+        return self._query_response_to_search_result(query_response)
+
+    def _query_response_to_search_result(self, query_response) -> SearchResult:
         get_result = self._result_to_get_result(query_response.points)
         return SearchResult(
             ids=get_result.ids,
@@ -175,17 +195,9 @@ class QdrantClient(VectorDBBase):
             if limit is None:
                 limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
 
-            field_conditions = []
-            for key, value in filter.items():
-                field_conditions.append(
-                    models.FieldCondition(
-                        key=f"metadata.{key}", match=models.MatchValue(value=value)
-                    )
-                )
-
             points = self.client.scroll(
                 collection_name=f"{self.collection_prefix}_{collection_name}",
-                scroll_filter=models.Filter(should=field_conditions),
+                scroll_filter=self._get_query_filter(filter),
                 limit=limit,
             )
             return self._result_to_get_result(points[0])
@@ -193,6 +205,37 @@ class QdrantClient(VectorDBBase):
             log.exception(f"Error querying a collection '{collection_name}': {e}")
             return None
 
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ):
+        if not await self.aclient.collection_exists(
+            f"{self.collection_prefix}_{collection_name}"
+        ):
+            return None
+        try:
+            if limit is None:
+                limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+            points = await self.aclient.scroll(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                scroll_filter=self._get_query_filter(filter),
+                limit=limit,
+            )
+            return self._result_to_get_result(points[0])
+        except Exception as e:
+            log.exception(f"Error querying a collection '{collection_name}': {e}")
+            return None
+
+    def _get_query_filter(self, filter: dict) -> models.Filter:
+        field_conditions = []
+        for key, value in filter.items():
+            field_conditions.append(
+                models.FieldCondition(
+                    key=f"metadata.{key}", match=models.MatchValue(value=value)
+                )
+            )
+        return models.Filter(should=field_conditions)
+
     def get(self, collection_name: str) -> Optional[GetResult]:
         # Get all the items in the collection.
         points = self.client.scroll(
@@ -201,6 +244,13 @@ class QdrantClient(VectorDBBase):
         )
         return self._result_to_get_result(points[0])
 
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        points = await self.aclient.scroll(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            limit=NO_LIMIT,  # otherwise qdrant would set limit to 10!
+        )
+        return self._result_to_get_result(points[0])
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         self._create_collection_if_not_exists(collection_name, len(items[0]["vector"]))
@@ -213,6 +263,22 @@ class QdrantClient(VectorDBBase):
         points = self._create_points(items)
         return self.client.upsert(f"{self.collection_prefix}_{collection_name}", points)
 
+    def update_metadata(
+        self, collection_name: str, ids: list[str], metadatas: list[dict]
+    ):
+        # Replace the metadata of the points, keeping their vectors and text.
+        return self.client.batch_update_points(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            update_operations=[
+                models.SetPayloadOperation(
+                    set_payload=models.SetPayload(
+                        payload={"metadata": metadata}, points=[id]
+                    )
+                )
+                for id, metadata in zip(ids, metadatas)
+            ],
+        )
+
     def delete(
         self,
         collection_name: str,
@@ -20,7 +20,7 @@ from open_webui.retrieval.vector.main import (
     VectorDBBase,
     VectorItem,
 )
-from qdrant_client import QdrantClient as Qclient
+from qdrant_client import AsyncQdrantClient, QdrantClient as Qclient
 from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.http.models import PointStruct
 from qdrant_client.models import models
@@ -66,22 +66,25 @@ class QdrantClient(VectorDBBase):
         host = parsed.hostname or self.QDRANT_URI
         http_port = parsed.port or 6333  # default REST port
 
-        self.client = (
-            Qclient(
-                host=host,
-                port=http_port,
-                grpc_port=self.GRPC_PORT,
-                prefer_grpc=self.PREFER_GRPC,
-                api_key=self.QDRANT_API_KEY,
-                timeout=self.QDRANT_TIMEOUT,
-            )
+        client_kwargs = (
+            {
+                "host": host,
+                "port": http_port,
+                "grpc_port": self.GRPC_PORT,
+                "prefer_grpc": self.PREFER_GRPC,
+                "api_key": self.QDRANT_API_KEY,
+                "timeout": self.QDRANT_TIMEOUT,
+            }
             if self.PREFER_GRPC
-            else Qclient(
-                url=self.QDRANT_URI,
-                api_key=self.QDRANT_API_KEY,
-                timeout=self.QDRANT_TIMEOUT,
-            )
+            else {
+                "url": self.QDRANT_URI,
+                "api_key": self.QDRANT_API_KEY,
+                "timeout": self.QDRANT_TIMEOUT,
+            }
         )
+        self.client = Qclient(**client_kwargs)
+        # Used by the async API (asearch, aquery, aget)
+        self.aclient = AsyncQdrantClient(**client_kwargs)
 
         # Main collection types for multi-tenancy
         self.MEMORY_COLLECTION = f"{self.collection_prefix}_memories"
@@ -268,6 +271,31 @@ class QdrantClient(VectorDBBase):
             limit=limit,
             query_filter=models.Filter(must=[tenant_filter]),
         )
+        return self._query_response_to_search_result(query_response)
+
+    async def asearch(
+        self, collection_name: str, vectors: List[List[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        """
+        Async variant of `search`.
+        """
+        if not self.aclient or not vectors:
+            return None
+        mt_collection, tenant_id = self._get_collection_and_tenant_id(collection_name)
+        if not await self.aclient.collection_exists(collection_name=mt_collection):
+            log.debug(f"Collection {mt_collection} doesn't exist, search returns None")
+            return None
+
+        tenant_filter = _tenant_filter(tenant_id)
+        query_response = await self.aclient.query_points(
+            collection_name=mt_collection,
+            query=vectors[0],
+            limit=limit,
+            query_filter=models.Filter(must=[tenant_filter]),
+        )
+        return self._query_response_to_search_result(query_response)
+
+    def _query_response_to_search_result(self, query_response) -> SearchResult:
         get_result = self._result_to_get_result(query_response.points)
         return SearchResult(
             ids=get_result.ids,
@@ -300,6 +328,30 @@ class QdrantClient(VectorDBBase):
         )
         return self._result_to_get_result(points[0])
 
+    async def aquery(
+        self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
+    ):
+        """
+        Async variant of `query`.
+        """
+        if not self.aclient:
+            return None
+        mt_collection, tenant_id = self._get_collection_and_tenant_id(collection_name)
+        if not await self.aclient.collection_exists(collection_name=mt_collection):
+            log.debug(f"Collection {mt_collection} doesn't exist, query returns None")
+            return None
+        if limit is None:
+            limit = NO_LIMIT
+        tenant_filter = _tenant_filter(tenant_id)
+        field_conditions = [_metadata_filter(k, v) for k, v in filter.items()]
+        combined_filter = models.Filter(must=[tenant_filter, *field_conditions])
+        points = await self.aclient.scroll(
+            collection_name=mt_collection,
+            scroll_filter=combined_filter,
+            limit=limit,
+        )
+        return self._result_to_get_result(points[0])
+
     def get(self, collection_name: str) -> Optional[GetResult]:
         """
         Get all items in a collection with tenant isolation.
@@ -318,6 +370,24 @@ class QdrantClient(VectorDBBase):
         )
         return self._result_to_get_result(points[0])
 
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        """
+        Async variant of `get`.
+        """
+        if not self.aclient:
+            return None
+        mt_collection, tenant_id = self._get_collection_and_tenant_id(collection_name)
+        if not await self.aclient.collection_exists(collection_name=mt_collection):
+            log.debug(f"Collection {mt_collection} doesn't exist, get returns None")
+            return None
+        tenant_filter = _tenant_filter(tenant_id)
+        points = await self.aclient.scroll(
+            collection_name=mt_collection,
+            scroll_filter=models.Filter(must=[tenant_filter]),
+            limit=NO_LIMIT,
+        )
+        return self._result_to_get_result(points[0])
+
     def upsert(self, collection_name: str, items: List[VectorItem]):
         """
         Upsert items with tenant ID.
@@ -1,5 +1,6 @@
 from open_webui.retrieval.vector.main import VectorDBBase
 from open_webui.retrieval.vector.type import VectorType
+from open_webui.retrieval.query_cache import QUERY_RESULT_CACHE, VersionedVectorDBClient
 from open_webui.config import VECTOR_DB, ENABLE_QDRANT_MULTITENANCY_MODE
 
 
@@ -56,8 +57,17 @@ class Vector:
                 from open_webui.retrieval.vector.dbs.oracle23ai import Oracle23aiClient
 
                 return Oracle23aiClient()
+            case VectorType.NUMPY:
+                from open_webui.retrieval.vector.dbs.numpy_vector import (
+                    NumpyVectorClient,
+                )
+
+                return NumpyVectorClient()
             case _:
                 raise ValueError(f"Unsupported vector type: {vector_type}")
 
 
 VECTOR_DB_CLIENT = Vector.get_vector(VECTOR_DB)
+if QUERY_RESULT_CACHE.enabled:
+    # Writes must invalidate cached search results of the collections they touch
+    VECTOR_DB_CLIENT = VersionedVectorDBClient(VECTOR_DB_CLIENT, QUERY_RESULT_CACHE)
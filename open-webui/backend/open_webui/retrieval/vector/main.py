@@ -1,7 +1,14 @@
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Union
 
+from open_webui.config import VECTOR_DB_MAX_CONCURRENCY
+
 
 class VectorItem(BaseModel):
     id: str
@@ -20,6 +27,45 @@ class SearchResult(GetResult):
     distances: Optional[List[List[float | int]]]
 
 
+_executor = None
+_executor_lock = threading.Lock()
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_vector_db_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool shared by every blocking vector DB call made from async code
+    or fanned out by the retrieval utils. Tasks run on it must not wait for
+    other tasks of the pool.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, VECTOR_DB_MAX_CONCURRENCY),
+                    thread_name_prefix="vector_db",
+                )
+    return _executor
+
+
+def get_vector_db_semaphore() -> asyncio.Semaphore:
+    """Semaphore capping the concurrent vector DB calls of the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(
+            max(1, VECTOR_DB_MAX_CONCURRENCY)
+        )
+    return semaphore
+
+
+async def run_in_vector_db_executor(func, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(
+        get_vector_db_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
 class VectorDBBase(ABC):
     """
     Abstract base class for all vector database backends.
@@ -29,6 +75,10 @@ class VectorDBBase(ABC):
 
     Any custom vector database integration must inherit from this class and
     implement all abstract methods.
+
+    The async variants (`asearch`, `aquery`, `aget`, `ainsert`) run the
+    blocking methods in the shared vector DB executor by default. Backends
+    with an async driver override them with native implementations.
     """
 
     @abstractmethod
@@ -51,6 +101,15 @@ class VectorDBBase(ABC):
         """Insert or update vector items in a collection."""
         pass
 
+    def update_metadata(
+        self, collection_name: str, ids: List[str], metadatas: List[Any]
+    ) -> None:
+        """
+        Replace the metadata of stored vectors, keeping the vectors. Backends
+        which cannot update metadata on its own leave this unimplemented.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def search(
         self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
@@ -84,3 +143,27 @@ class VectorDBBase(ABC):
     def reset(self) -> None:
         """Reset the vector database by removing all collections or those matching a condition."""
         pass
+
+    async def asearch(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        """Async variant of `search`."""
+        return await run_in_vector_db_executor(
+            self.search, collection_name, vectors, limit
+        )
+
+    async def aquery(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        """Async variant of `query`."""
+        return await run_in_vector_db_executor(
+            self.query, collection_name, filter, limit
+        )
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        """Async variant of `get`."""
+        return await run_in_vector_db_executor(self.get, collection_name)
+
+    async def ainsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        """Async variant of `insert`."""
+        return await run_in_vector_db_executor(self.insert, collection_name, items)
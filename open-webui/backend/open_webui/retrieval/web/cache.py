@@ -0,0 +1,385 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import aiohttp
+from langchain_core.documents import Document
+
+from open_webui.retrieval.web.utils import get_web_loader, safe_validate_urls
+from open_webui.config import (
+    ENABLE_WEB_LOADER_CACHE,
+    WEB_LOADER_CACHE_PATH,
+    WEB_LOADER_CACHE_TTL,
+    WEB_LOADER_CACHE_MAX_SIZE_MB,
+    WEB_LOADER_ENGINE,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS web_page_cache (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    documents TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS web_page_cache_fetched_at ON web_page_cache (fetched_at);
+CREATE TABLE IF NOT EXISTS web_page_cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL,
+    count INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO web_page_cache_size (id, size, count)
+    SELECT 0, COALESCE(SUM(size), 0), COUNT(*) FROM web_page_cache;
+CREATE TRIGGER IF NOT EXISTS web_page_cache_insert AFTER INSERT ON web_page_cache
+BEGIN
+    UPDATE web_page_cache_size SET size = size + NEW.size, count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS web_page_cache_update AFTER UPDATE OF size ON web_page_cache
+BEGIN
+    UPDATE web_page_cache_size SET size = size + NEW.size - OLD.size;
+END;
+CREATE TRIGGER IF NOT EXISTS web_page_cache_delete AFTER DELETE ON web_page_cache
+BEGIN
+    UPDATE web_page_cache_size SET size = size - OLD.size, count = count - 1;
+END;
+"""
+
+# Timeout of conditional requests revalidating expired pages
+REVALIDATE_TIMEOUT = 10
+
+
+class WebPageCache:
+    """
+    Disk cache of the documents the web loader produced for a url, keyed by
+    (loader engine, url) and shared between workers.
+
+    Entries are fresh for `ttl` seconds. Expired entries are kept (until the
+    size limit evicts them) together with the page's ETag / Last-Modified
+    validators, so they can be revalidated rather than fetched again.
+
+    The total size is kept up to date by triggers, so that checking the limit
+    on writes does not scan the table. All methods do blocking SQLite I/O.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        enabled: bool = True,
+        ttl: int = 3600,
+        max_size_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.path = path
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_size_bytes = max_size_bytes
+
+        self._local = threading.local()
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        if self.enabled:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._get_conn().executescript(SCHEMA)
+            except Exception as e:
+                log.exception(
+                    f"Failed to initialize web page cache at {self.path}: {e}"
+                )
+                self.enabled = False
+
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(engine: str, url: str) -> str:
+        return hashlib.sha256(f"{engine or ''}\x00{url}".encode()).hexdigest()
+
+    def get_many(self, engine: str, urls: List[str]) -> Dict[str, dict]:
+        """Cached entries of `urls`, including expired ones (see `is_fresh`)."""
+        if not self.enabled or not urls:
+            return {}
+
+        keys = {self.make_key(engine, url): url for url in urls}
+        entries = {}
+        try:
+            conn = self._get_conn()
+            placeholders = ",".join("?" * len(keys))
+            for key, documents, etag, last_modified, fetched_at in conn.execute(
+                "SELECT key, documents, etag, last_modified, fetched_at "
+                f"FROM web_page_cache WHERE key IN ({placeholders})",
+                list(keys),
+            ):
+                entries[keys[key]] = {
+                    "documents": [
+                        Document(
+                            page_content=document["page_content"],
+                            metadata=document["metadata"],
+                        )
+                        for document in json.loads(documents)
+                    ],
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "fetched_at": fetched_at,
+                }
+        except Exception as e:
+            log.exception(f"web page cache lookup failed: {e}")
+        return entries
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def put_many(
+        self,
+        engine: str,
+        documents: Dict[str, List[Document]],
+        validators: Optional[Dict[str, dict]] = None,
+    ) -> None:
+        if not self.enabled or not documents:
+            return
+
+        validators = validators or {}
+        now = time.time()
+        rows = []
+        for url, url_documents in documents.items():
+            value = json.dumps(
+                [
+                    {"page_content": doc.page_content, "metadata": doc.metadata}
+                    for doc in url_documents
+                ],
+                default=str,
+            )
+            rows.append(
+                (
+                    self.make_key(engine, url),
+                    url,
+                    value,
+                    validators.get(url, {}).get("etag"),
+                    validators.get(url, {}).get("last_modified"),
+                    len(value),
+                    now,
+                )
+            )
+
+        try:
+            conn = self._get_conn()
+            with conn:
+                # An upsert, as REPLACE would not fire the delete trigger
+                conn.executemany(
+                    "INSERT INTO web_page_cache "
+                    "(key, url, documents, etag, last_modified, size, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET url = excluded.url, "
+                    "documents = excluded.documents, etag = excluded.etag, "
+                    "last_modified = excluded.last_modified, size = excluded.size, "
+                    "fetched_at = excluded.fetched_at",
+                    rows,
+                )
+            self._evict()
+        except Exception as e:
+            log.exception(f"web page cache write failed: {e}")
+
+    def touch(self, engine: str, urls: List[str]) -> None:
+        """Mark revalidated entries as fresh again."""
+        if not self.enabled or not urls:
+            return
+        try:
+            conn = self._get_conn()
+            with conn:
+                conn.executemany(
+                    "UPDATE web_page_cache SET fetched_at = ? WHERE key = ?",
+                    [(time.time(), self.make_key(engine, url)) for url in urls],
+                )
+        except Exception as e:
+            log.exception(f"web page cache write failed: {e}")
+
+    def _get_size(self, conn: sqlite3.Connection) -> tuple:
+        return conn.execute(
+            "SELECT size, count FROM web_page_cache_size WHERE id = 0"
+        ).fetchone() or (0, 0)
+
+    def _evict(self) -> None:
+        conn = self._get_conn()
+        total, count = self._get_size(conn)
+        if total <= self.max_size_bytes or not count:
+            return
+
+        # Evict the oldest pages down to 90% of the limit
+        excess = total - int(self.max_size_bytes * 0.9)
+        n = max(1, int(excess / (total / count)) + 1)
+        with conn:
+            conn.execute(
+                "DELETE FROM web_page_cache WHERE key IN "
+                "(SELECT key FROM web_page_cache ORDER BY fetched_at LIMIT ?)",
+                (n,),
+            )
+        log.debug(f"web page cache: evicted {n} pages")
+
+    def clear(self) -> None:
+        if not self.enabled:
+            return
+        conn = self._get_conn()
+        with conn:
+            conn.execute("DELETE FROM web_page_cache")
+
+    def stats(self) -> dict:
+        entries, size = 0, 0
+        if self.enabled:
+            size, entries = self._get_size(self._get_conn())
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": ((self.hits + self.revalidated) / lookups) if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_size_bytes": self.max_size_bytes,
+            "ttl": self.ttl,
+        }
+
+
+async def get_unmodified_urls(
+    entries: Dict[str, dict],
+    verify_ssl: bool = True,
+    concurrency: int = 10,
+    trust_env: bool = False,
+) -> List[str]:
+    """Urls whose page answers a conditional request with 304 Not Modified."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def is_unmodified(session: aiohttp.ClientSession, url: str, entry: dict):
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        async with semaphore:
+            try:
+                async with session.get(
+                    url, headers=headers, ssl=None if verify_ssl else False
+                ) as response:
+                    return response.status == 304
+            except Exception as e:
+                log.debug(f"Failed to revalidate {url}: {e}")
+                return False
+
+    async with aiohttp.ClientSession(
+        trust_env=trust_env,
+        timeout=aiohttp.ClientTimeout(total=REVALIDATE_TIMEOUT),
+    ) as session:
+        results = await asyncio.gather(
+            *[is_unmodified(session, url, entry) for url, entry in entries.items()]
+        )
+    return [url for url, unmodified in zip(entries, results) if unmodified]
+
+
+async def load_web_documents(
+    urls: Sequence[str],
+    verify_ssl: bool = True,
+    requests_per_second: int = 2,
+    trust_env: bool = False,
+) -> List[Document]:
+    """
+    Load `urls` with the configured web loader, fetching only pages that are
+    not in WEB_PAGE_CACHE, have expired and changed since, or carry no
+    validators to check that with.
+    """
+    if not WEB_PAGE_CACHE.enabled:
+        loader = get_web_loader(
+            urls,
+            verify_ssl=verify_ssl,
+            requests_per_second=requests_per_second,
+            trust_env=trust_env,
+        )
+        return await loader.aload()
+
+    engine = WEB_LOADER_ENGINE.value
+    urls = safe_validate_urls(list(urls))
+    # The cache is SQLite on disk, keep its I/O off the event loop
+    entries = await asyncio.to_thread(WEB_PAGE_CACHE.get_many, engine, urls)
+
+    cached = {
+        url: entry for url, entry in entries.items() if WEB_PAGE_CACHE.is_fresh(entry)
+    }
+    WEB_PAGE_CACHE.hits += len(cached)
+    expired = {
+        url: entry
+        for url, entry in entries.items()
+        if url not in cached and (entry["etag"] or entry["last_modified"])
+    }
+    if expired:
+        unmodified = await get_unmodified_urls(
+            expired,
+            verify_ssl=verify_ssl,
+            concurrency=requests_per_second,
+            trust_env=trust_env,
+        )
+        await asyncio.to_thread(WEB_PAGE_CACHE.touch, engine, unmodified)
+        cached.update({url: expired[url] for url in unmodified})
+        WEB_PAGE_CACHE.revalidated += len(unmodified)
+
+    missing = [url for url in urls if url not in cached]
+    WEB_PAGE_CACHE.misses += len(missing)
+    log.debug(
+        f"web page cache: {len(urls) - len(missing)} of {len(urls)} urls served from cache"
+    )
+
+    fetched = {}
+    if missing:
+        loader = get_web_loader(
+            missing,
+            verify_ssl=verify_ssl,
+            requests_per_second=requests_per_second,
+            trust_env=trust_env,
+        )
+        for document in await loader.aload():
+            fetched.setdefault(document.metadata.get("source"), []).append(document)
+
+        await asyncio.to_thread(
+            WEB_PAGE_CACHE.put_many,
+            engine,
+            {url: documents for url, documents in fetched.items() if url in missing},
+            validators=getattr(loader, "validators", None),
+        )
+
+    # Keep the order of the search results
+    documents = []
+    for url in urls:
+        if url in cached:
+            documents.extend(cached[url]["documents"])
+        else:
+            documents.extend(fetched.pop(url, []))
+    # Documents whose source is not one of the requested urls (e.g. redirects)
+    for url_documents in fetched.values():
+        documents.extend(url_documents)
+    return documents
+
+
+WEB_PAGE_CACHE = WebPageCache(
+    WEB_LOADER_CACHE_PATH,
+    enabled=ENABLE_WEB_LOADER_CACHE,
+    ttl=WEB_LOADER_CACHE_TTL,
+    max_size_bytes=WEB_LOADER_CACHE_MAX_SIZE_MB * 1024 * 1024,
+)
@@ -500,6 +500,8 @@ class SafeWebBaseLoader(WebBaseLoader):
         """
         super().__init__(*args, **kwargs)
         self.trust_env = trust_env
+        # ETag / Last-Modified of fetched urls, used to revalidate cached pages
+        self.validators: Dict[str, Dict[str, Optional[str]]] = {}
 
     async def _fetch(
         self, url: str, retries: int = 3, cooldown: int = 2, backoff: float = 1.5
@@ -520,6 +522,10 @@ class SafeWebBaseLoader(WebBaseLoader):
                     ) as response:
                         if self.raise_for_status:
                             response.raise_for_status()
+                        self.validators[url] = {
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                        }
                         return await response.text()
                 except aiohttp.ClientConnectionError as e:
                     if i == retries - 1:
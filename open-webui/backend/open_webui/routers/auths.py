@@ -49,7 +49,7 @@ from open_webui.utils.auth import (
     get_http_authorization_cred,
 )
 from open_webui.utils.webhook import post_webhook
-from open_webui.utils.access_control import get_permissions
+from open_webui.utils.access_control import get_permissions, invalidate_principals
 
 from typing import Optional, List
 
@@ -426,9 +426,11 @@ async def ldap_auth(request: Request, response: Response, form_data: LdapForm):
                 ):
                     if ENABLE_LDAP_GROUP_CREATION:
                         Groups.create_groups_by_group_names(user.id, user_groups)
+                        invalidate_principals()
 
                     try:
                         Groups.sync_groups_by_group_names(user.id, user_groups)
+                        invalidate_principals()
                         log.info(
                             f"Successfully synced groups for user {user.id}: {user_groups}"
                         )
@@ -488,6 +490,7 @@ async def signin(request: Request, response: Response, form_data: SigninForm):
 
             if group_names:
                 Groups.sync_groups_by_group_names(user.id, group_names)
+                invalidate_principals()
 
     elif WEBUI_AUTH == False:
         admin_email = "admin@localhost"
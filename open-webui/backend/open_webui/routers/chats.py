@@ -3,7 +3,11 @@ import logging
 from typing import Optional
 
 
-from open_webui.socket.main import get_event_emitter
+from open_webui.socket.main import (
+    get_event_emitter,
+    flush_message_events,
+    MESSAGE_EVENT_BUFFER,
+)
 from open_webui.models.chats import (
     ChatForm,
     ChatImportForm,
@@ -452,7 +456,12 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    # The edit replaces whatever is still buffered for the message
+    await flush_message_events(id, message_id)
+
+    chat = await MESSAGE_EVENT_BUFFER.write(
+        id,
+        Chats.upsert_message_to_chat_by_id_and_message_id,
         id,
         message_id,
         {
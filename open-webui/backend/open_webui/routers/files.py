@@ -25,6 +25,7 @@ from fastapi.responses import FileResponse, StreamingResponse
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
 
 from open_webui.models.users import Users
 from open_webui.models.files import (
@@ -347,6 +348,7 @@ async def delete_all_files(user=Depends(get_admin_user)):
         try:
             Storage.delete_all_files()
             VECTOR_DB_CLIENT.reset()
+            BM25_INDEX.reset()
         except Exception as e:
             log.exception(e)
             log.error("Error deleting files")
@@ -421,6 +423,8 @@ async def get_file_process_status(
                             event = {"status": status}
                             if status == "failed":
                                 event["error"] = data.get("error")
+                            if data.get("progress"):
+                                event["progress"] = data["progress"]
 
                             yield f"data: {json.dumps(event)}\n\n"
                             if status in ("completed", "failed"):
@@ -436,7 +440,10 @@ async def get_file_process_status(
                 media_type="text/event-stream",
             )
         else:
-            return {"status": file.data.get("status", "pending")}
+            response = {"status": file.data.get("status", "pending")}
+            if file.data.get("progress"):
+                response["progress"] = file.data["progress"]
+            return response
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -724,6 +731,7 @@ async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
             try:
                 Storage.delete_file(file.path)
                 VECTOR_DB_CLIENT.delete(collection_name=f"file-{id}")
+                BM25_INDEX.delete_collection(collection_name=f"file-{id}")
             except Exception as e:
                 log.exception(e)
                 log.error("Error deleting files")
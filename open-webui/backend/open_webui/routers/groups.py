@@ -17,6 +17,7 @@ from open_webui.constants import ERROR_MESSAGES
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.access_control import invalidate_principals
 from open_webui.env import SRC_LOG_LEVELS
 
 
@@ -93,6 +94,7 @@ async def update_group_by_id(
             form_data.user_ids = Users.get_valid_user_ids(form_data.user_ids)
 
         group = Groups.update_group_by_id(id, form_data)
+        invalidate_principals()
         if group:
             return group
         else:
@@ -122,6 +124,7 @@ async def add_user_to_group(
             form_data.user_ids = Users.get_valid_user_ids(form_data.user_ids)
 
         group = Groups.add_users_to_group(id, form_data.user_ids)
+        invalidate_principals()
         if group:
             return group
         else:
@@ -143,6 +146,7 @@ async def remove_users_from_group(
 ):
     try:
         group = Groups.remove_users_from_group(id, form_data.user_ids)
+        invalidate_principals()
         if group:
             return group
         else:
@@ -167,6 +171,7 @@ async def remove_users_from_group(
 async def delete_group_by_id(id: str, user=Depends(get_admin_user)):
     try:
         result = Groups.delete_group_by_id(id)
+        invalidate_principals()
         if result:
             return result
         else:
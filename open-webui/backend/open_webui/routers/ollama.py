@@ -1,20 +1,14 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
 import os
-import random
 import re
 import time
 from datetime import datetime
 
-from typing import Optional, Union
+from typing import Callable, Optional, Union
 from urllib.parse import urlparse
 import aiohttp
-from aiocache import cached
 import requests
 from urllib.parse import quote
 
@@ -50,7 +44,10 @@ from open_webui.utils.payload import (
     apply_system_prompt_to_body,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import AccessIndex, has_access
+from open_webui.utils.http_client import get_http_session, release_response
+from open_webui.utils.model_registry import MODEL_REGISTRY
+from open_webui.utils.ollama_balancer import OLLAMA_BALANCER, TrackedStream
 
 
 from open_webui.config import (
@@ -59,7 +56,6 @@ from open_webui.config import (
 from open_webui.env import (
     ENV,
     SRC_LOG_LEVELS,
-    MODELS_CACHE_TTL,
     AIOHTTP_CLIENT_SESSION_SSL,
     AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
@@ -81,40 +77,36 @@ log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as response:
-                return await response.json()
+        session = get_http_session(url)
+        async with session.get(
+            url,
+            timeout=timeout,
+            headers={
+                "Content-Type": "application/json",
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
         return None
 
 
-async def cleanup_response(
-    response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
-):
-    if response:
-        response.close()
-    if session:
-        await session.close()
+async def cleanup_response(response: Optional[aiohttp.ClientResponse]):
+    # The pooled session stays open, the connection goes back to the pool
+    await release_response(response)
 
 
 async def send_post_request(
@@ -125,17 +117,25 @@ async def send_post_request(
     content_type: Optional[str] = None,
     user: UserModel = None,
     metadata: Optional[dict] = None,
+    base_url: Optional[str] = None,
+    on_complete: Optional[Callable[[], None]] = None,
 ):
+    """
+    When `base_url` is given, the request is an inference request routed by
+    the balancer, which gets its timings and outcome. `on_complete` is called
+    once a successful response was read, for streams when the stream ended.
+    """
 
     r = None
+    tracked = base_url is not None
+    started_at = OLLAMA_BALANCER.request_started(base_url) if tracked else None
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
+        session = get_http_session(url)
 
         r = await session.post(
             url,
             data=payload,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
             headers={
                 "Content-Type": "application/json",
                 **({"Authorization": f"Bearer {key}"} if key else {}),
@@ -159,9 +159,12 @@ async def send_post_request(
         )
 
         if r.ok is False:
+            if tracked:
+                tracked = False
+                OLLAMA_BALANCER.request_finished(base_url, success=r.status < 500)
             try:
                 res = await r.json()
-                await cleanup_response(r, session)
+                await cleanup_response(r)
                 if "error" in res:
                     raise HTTPException(status_code=r.status, detail=res["error"])
             except HTTPException as e:
@@ -180,21 +183,43 @@ async def send_post_request(
             if content_type:
                 response_headers["Content-Type"] = content_type
 
+            content = r.content
+            tracked_stream = None
+            if tracked:
+                tracked = False
+                content = tracked_stream = TrackedStream(
+                    OLLAMA_BALANCER, base_url, content, started_at
+                )
+
+            async def finish():
+                await cleanup_response(r)
+                if tracked_stream is not None:
+                    # Releases the request if the stream was never read
+                    tracked_stream.finish()
+                if on_complete:
+                    on_complete()
+
             return StreamingResponse(
-                r.content,
+                content,
                 status_code=r.status,
                 headers=response_headers,
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(finish),
             )
         else:
             res = await r.json()
+            if tracked:
+                tracked = False
+                OLLAMA_BALANCER.request_finished(base_url, success=True)
+            if on_complete:
+                on_complete()
             return res
 
     except HTTPException as e:
         raise e  # Re-raise HTTPException to be handled by FastAPI
     except Exception as e:
+        if tracked:
+            tracked = False
+            OLLAMA_BALANCER.request_finished(base_url, success=False)
         detail = f"Ollama: {e}"
 
         raise HTTPException(
@@ -203,7 +228,21 @@ async def send_post_request(
         )
     finally:
         if not stream:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
+
+
+def get_registry_response(
+    url: str, path: str, key: Optional[str], user: UserModel = None, refresh=False
+):
+    # Served from the registry, per user if their info is forwarded as the
+    # connection may answer differently
+    return MODEL_REGISTRY.get(
+        "ollama",
+        f"{url}{path}",
+        lambda: send_get_request(f"{url}{path}", key, user=user),
+        key=(key, user.id if ENABLE_FORWARD_USER_INFO_HEADERS and user else None),
+        refresh=refresh,
+    )
 
 
 def get_api_key(idx, url, configs):
@@ -214,6 +253,22 @@ def get_api_key(idx, url, configs):
     )  # Legacy support
 
 
+def select_url_idx(request: Request, model: str, url_idxs: list[int]) -> int:
+    """Index of the Ollama backend to send a request for `model` to."""
+    if not url_idxs:
+        raise HTTPException(
+            status_code=400,
+            detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
+        )
+
+    urls = request.app.state.config.OLLAMA_BASE_URLS
+    configs = request.app.state.config.OLLAMA_API_CONFIGS
+    return OLLAMA_BALANCER.select(
+        [(idx, urls[idx], get_api_key(idx, urls[idx], configs)) for idx in url_idxs],
+        model,
+    )
+
+
 ##########################################
 #
 # API routes
@@ -241,47 +296,45 @@ async def verify_connection(
     url = form_data.url
     key = form_data.key
 
-    async with aiohttp.ClientSession(
-        trust_env=True,
-        timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST),
-    ) as session:
-        try:
-            async with session.get(
-                f"{url}/api/version",
-                headers={
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as r:
-                if r.status != 200:
-                    detail = f"HTTP Error: {r.status}"
-                    res = await r.json()
+    session = get_http_session(url)
+    try:
+        async with session.get(
+            f"{url}/api/version",
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST),
+            headers={
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as r:
+            if r.status != 200:
+                detail = f"HTTP Error: {r.status}"
+                res = await r.json()
 
-                    if "error" in res:
-                        detail = f"External Error: {res['error']}"
-                    raise Exception(detail)
+                if "error" in res:
+                    detail = f"External Error: {res['error']}"
+                raise Exception(detail)
 
-                data = await r.json()
-                return data
-        except aiohttp.ClientError as e:
-            log.exception(f"Client error: {str(e)}")
-            raise HTTPException(
-                status_code=500, detail="Open WebUI: Server Connection Error"
-            )
-        except Exception as e:
-            log.exception(f"Unexpected error: {e}")
-            error_detail = f"Unexpected error: {str(e)}"
-            raise HTTPException(status_code=500, detail=error_detail)
+            data = await r.json()
+            return data
+    except aiohttp.ClientError as e:
+        log.exception(f"Client error: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail="Open WebUI: Server Connection Error"
+        )
+    except Exception as e:
+        log.exception(f"Unexpected error: {e}")
+        error_detail = f"Unexpected error: {str(e)}"
+        raise HTTPException(status_code=500, detail=error_detail)
 
 
 @router.get("/config")
@@ -293,6 +346,11 @@ async def get_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/routing")
+async def get_routing_state(user=Depends(get_admin_user)):
+    return OLLAMA_BALANCER.stats()
+
+
 class OllamaConfigForm(BaseModel):
     ENABLE_OLLAMA_API: Optional[bool] = None
     OLLAMA_BASE_URLS: list[str]
@@ -340,16 +398,21 @@ def merge_ollama_models_lists(model_lists):
     return list(merged_models.values())
 
 
-@cached(ttl=MODELS_CACHE_TTL)
-async def get_all_models(request: Request, user: UserModel = None):
+async def get_all_models(
+    request: Request, user: UserModel = None, refresh: bool = False
+):
     log.info("get_all_models()")
     if request.app.state.config.ENABLE_OLLAMA_API:
         request_tasks = []
+        keys = {}
         for idx, url in enumerate(request.app.state.config.OLLAMA_BASE_URLS):
             if (str(idx) not in request.app.state.config.OLLAMA_API_CONFIGS) and (
                 url not in request.app.state.config.OLLAMA_API_CONFIGS  # Legacy support
             ):
-                request_tasks.append(send_get_request(f"{url}/api/tags", user=user))
+                keys[idx] = None
+                request_tasks.append(
+                    get_registry_response(url, "/api/tags", None, user, refresh)
+                )
             else:
                 api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
                     str(idx),
@@ -362,8 +425,9 @@ async def get_all_models(request: Request, user: UserModel = None):
                 key = api_config.get("key", None)
 
                 if enable:
+                    keys[idx] = key
                     request_tasks.append(
-                        send_get_request(f"{url}/api/tags", key, user=user)
+                        get_registry_response(url, "/api/tags", key, user, refresh)
                     )
                 else:
                     request_tasks.append(asyncio.ensure_future(asyncio.sleep(0, None)))
@@ -414,12 +478,33 @@ async def get_all_models(request: Request, user: UserModel = None):
         }
 
         try:
-            loaded_models = await get_ollama_loaded_models(request, user=user)
-            expires_map = {
-                m["model"]: m["expires_at"]
-                for m in loaded_models["models"]
-                if "expires_at" in m
-            }
+            loaded_responses = await asyncio.gather(
+                *[
+                    get_registry_response(
+                        request.app.state.config.OLLAMA_BASE_URLS[idx],
+                        "/api/ps",
+                        key,
+                        user,
+                        refresh,
+                    )
+                    for idx, key in keys.items()
+                ]
+            )
+
+            expires_map = {}
+            for idx, response in zip(keys, loaded_responses):
+                url = request.app.state.config.OLLAMA_BASE_URLS[idx]
+                prefix_id = request.app.state.config.OLLAMA_API_CONFIGS.get(
+                    str(idx),
+                    request.app.state.config.OLLAMA_API_CONFIGS.get(
+                        url, {}
+                    ),  # Legacy support
+                ).get("prefix_id", None)
+
+                for m in (response or {}).get("models", []):
+                    if "expires_at" in m:
+                        model = f"{prefix_id}.{m['model']}" if prefix_id else m["model"]
+                        expires_map.setdefault(model, m["expires_at"])
 
             for m in models["models"]:
                 if m["model"] in expires_map:
@@ -440,15 +525,14 @@ async def get_all_models(request: Request, user: UserModel = None):
 
 async def get_filtered_models(models, user):
     # Filter models based on user access control
-    filtered_models = []
-    for model in models.get("models", []):
-        model_info = Models.get_model_by_id(model["model"])
-        if model_info:
-            if user.id == model_info.user_id or has_access(
-                user.id, type="read", access_control=model_info.access_control
-            ):
-                filtered_models.append(model)
-    return filtered_models
+    access_index = AccessIndex("read")
+    for model_info in Models.get_all_models():
+        access_index.add(model_info.id, model_info.access_control, model_info.user_id)
+    accessible_ids = access_index.get_accessible_ids(user.id)
+
+    return [
+        model for model in models.get("models", []) if model["model"] in accessible_ids
+    ]
 
 
 @router.get("/api/tags")
@@ -739,6 +823,8 @@ async def pull_model(
         payload=json.dumps(payload),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        # The model only exists once the pull finished
+        on_complete=lambda: MODEL_REGISTRY.invalidate("ollama"),
     )
 
 
@@ -803,6 +889,7 @@ async def create_model(
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        on_complete=lambda: MODEL_REGISTRY.invalidate("ollama"),
     )
 
 
@@ -855,6 +942,7 @@ async def copy_model(
             data=form_data.model_dump_json(exclude_none=True).encode(),
         )
         r.raise_for_status()
+        MODEL_REGISTRY.invalidate("ollama")
 
         log.debug(f"r.text: {r.text}")
         return True
@@ -925,6 +1013,7 @@ async def delete_model(
             },
         )
         r.raise_for_status()
+        MODEL_REGISTRY.invalidate("ollama")
 
         log.debug(f"r.text: {r.text}")
         return True
@@ -964,7 +1053,7 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
         )
 
-    url_idx = random.choice(models[model]["urls"])
+    url_idx = select_url_idx(request, model, models[model]["urls"])
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
@@ -1038,7 +1127,7 @@ async def embed(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1125,7 +1214,7 @@ async def embeddings(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1218,7 +1307,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1240,6 +1329,7 @@ async def generate_completion(
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        base_url=url,
     )
 
 
@@ -1285,7 +1375,7 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = select_url_idx(request, model, models[model].get("urls", []))
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1373,6 +1463,7 @@ async def generate_chat_completion(
         content_type="application/x-ndjson",
         user=user,
         metadata=metadata,
+        base_url=url,
     )
 
 
@@ -1479,6 +1570,7 @@ async def generate_openai_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        base_url=url,
     )
 
 
@@ -1561,6 +1653,7 @@ async def generate_openai_chat_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        base_url=url,
     )
 
 
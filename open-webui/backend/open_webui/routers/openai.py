@@ -5,7 +5,6 @@ import logging
 from typing import Optional
 
 import aiohttp
-from aiocache import cached
 import requests
 from urllib.parse import quote
 
@@ -24,7 +23,6 @@ from open_webui.config import (
     CACHE_DIR,
 )
 from open_webui.env import (
-    MODELS_CACHE_TTL,
     AIOHTTP_CLIENT_SESSION_SSL,
     AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
@@ -46,7 +44,9 @@ from open_webui.utils.misc import (
 )
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import AccessIndex, has_access
+from open_webui.utils.http_client import get_http_session, release_response
+from open_webui.utils.model_registry import MODEL_REGISTRY
 
 
 log = logging.getLogger(__name__)
@@ -63,39 +63,35 @@ log.setLevel(SRC_LOG_LEVELS["OPENAI"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as response:
-                return await response.json()
+        session = get_http_session(url)
+        async with session.get(
+            url,
+            timeout=timeout,
+            headers={
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
         return None
 
 
-async def cleanup_response(
-    response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
-):
-    if response:
-        response.close()
-    if session:
-        await session.close()
+async def cleanup_response(response: Optional[aiohttp.ClientResponse]):
+    # The pooled session stays open, the connection goes back to the pool
+    await release_response(response)
 
 
 def openai_reasoning_model_handler(payload):
@@ -275,7 +271,23 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         raise HTTPException(status_code=401, detail=ERROR_MESSAGES.OPENAI_NOT_FOUND)
 
 
-async def get_all_models_responses(request: Request, user: UserModel) -> list:
+def get_models_response(
+    url: str, key: Optional[str], user: UserModel = None, refresh: bool = False
+):
+    # Model lists are served from the registry, per user if their info is
+    # forwarded as the connection may answer differently
+    return MODEL_REGISTRY.get(
+        "openai",
+        url,
+        lambda: send_get_request(f"{url}/models", key, user=user),
+        key=(key, user.id if ENABLE_FORWARD_USER_INFO_HEADERS and user else None),
+        refresh=refresh,
+    )
+
+
+async def get_all_models_responses(
+    request: Request, user: UserModel, refresh: bool = False
+) -> list:
     if not request.app.state.config.ENABLE_OPENAI_API:
         return []
 
@@ -298,10 +310,11 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
             url not in request.app.state.config.OPENAI_API_CONFIGS  # Legacy support
         ):
             request_tasks.append(
-                send_get_request(
-                    f"{url}/models",
+                get_models_response(
+                    url,
                     request.app.state.config.OPENAI_API_KEYS[idx],
                     user=user,
+                    refresh=refresh,
                 )
             )
         else:
@@ -318,10 +331,11 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
             if enable:
                 if len(model_ids) == 0:
                     request_tasks.append(
-                        send_get_request(
-                            f"{url}/models",
+                        get_models_response(
+                            url,
                             request.app.state.config.OPENAI_API_KEYS[idx],
                             user=user,
+                            refresh=refresh,
                         )
                     )
                 else:
@@ -390,25 +404,23 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
 
 async def get_filtered_models(models, user):
     # Filter models based on user access control
-    filtered_models = []
-    for model in models.get("data", []):
-        model_info = Models.get_model_by_id(model["id"])
-        if model_info:
-            if user.id == model_info.user_id or has_access(
-                user.id, type="read", access_control=model_info.access_control
-            ):
-                filtered_models.append(model)
-    return filtered_models
+    access_index = AccessIndex("read")
+    for model_info in Models.get_all_models():
+        access_index.add(model_info.id, model_info.access_control, model_info.user_id)
+    accessible_ids = access_index.get_accessible_ids(user.id)
 
+    return [model for model in models.get("data", []) if model["id"] in accessible_ids]
 
-@cached(ttl=MODELS_CACHE_TTL)
-async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
+
+async def get_all_models(
+    request: Request, user: UserModel, refresh: bool = False
+) -> dict[str, list]:
     log.info("get_all_models()")
 
     if not request.app.state.config.ENABLE_OPENAI_API:
         return {"data": []}
 
-    responses = await get_all_models_responses(request, user=user)
+    responses = await get_all_models_responses(request, user=user, refresh=refresh)
 
     def extract_data(response):
         if response and "data" in response:
@@ -484,105 +496,7 @@ async def get_models(
         )
 
         r = None
-        async with aiohttp.ClientSession(
-            trust_env=True,
-            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST),
-        ) as session:
-            try:
-                headers = {
-                    "Content-Type": "application/json",
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS
-                        else {}
-                    ),
-                }
-
-                if api_config.get("azure", False):
-                    models = {
-                        "data": api_config.get("model_ids", []) or [],
-                        "object": "list",
-                    }
-                else:
-                    headers["Authorization"] = f"Bearer {key}"
-
-                    async with session.get(
-                        f"{url}/models",
-                        headers=headers,
-                        ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                    ) as r:
-                        if r.status != 200:
-                            # Extract response error details if available
-                            error_detail = f"HTTP Error: {r.status}"
-                            res = await r.json()
-                            if "error" in res:
-                                error_detail = f"External Error: {res['error']}"
-                            raise Exception(error_detail)
-
-                        response_data = await r.json()
-
-                        # Check if we're calling OpenAI API based on the URL
-                        if "api.openai.com" in url:
-                            # Filter models according to the specified conditions
-                            response_data["data"] = [
-                                model
-                                for model in response_data.get("data", [])
-                                if not any(
-                                    name in model["id"]
-                                    for name in [
-                                        "babbage",
-                                        "dall-e",
-                                        "davinci",
-                                        "embedding",
-                                        "tts",
-                                        "whisper",
-                                    ]
-                                )
-                            ]
-
-                        models = response_data
-            except aiohttp.ClientError as e:
-                # ClientError covers all aiohttp requests issues
-                log.exception(f"Client error: {str(e)}")
-                raise HTTPException(
-                    status_code=500, detail="Open WebUI: Server Connection Error"
-                )
-            except Exception as e:
-                log.exception(f"Unexpected error: {e}")
-                error_detail = f"Unexpected error: {str(e)}"
-                raise HTTPException(status_code=500, detail=error_detail)
-
-    if user.role == "user" and not BYPASS_MODEL_ACCESS_CONTROL:
-        models["data"] = await get_filtered_models(models, user)
-
-    return models
-
-
-class ConnectionVerificationForm(BaseModel):
-    url: str
-    key: str
-
-    config: Optional[dict] = None
-
-
-@router.post("/verify")
-async def verify_connection(
-    form_data: ConnectionVerificationForm, user=Depends(get_admin_user)
-):
-    url = form_data.url
-    key = form_data.key
-
-    api_config = form_data.config or {}
-
-    async with aiohttp.ClientSession(
-        trust_env=True,
-        timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST),
-    ) as session:
+        session = get_http_session(url)
         try:
             headers = {
                 "Content-Type": "application/json",
@@ -599,55 +513,51 @@ async def verify_connection(
             }
 
             if api_config.get("azure", False):
-                headers["api-key"] = key
-                api_version = api_config.get("api_version", "") or "2023-03-15-preview"
-
-                async with session.get(
-                    url=f"{url}/openai/models?api-version={api_version}",
-                    headers=headers,
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                ) as r:
-                    try:
-                        response_data = await r.json()
-                    except Exception:
-                        response_data = await r.text()
-
-                    if r.status != 200:
-                        if isinstance(response_data, (dict, list)):
-                            return JSONResponse(
-                                status_code=r.status, content=response_data
-                            )
-                        else:
-                            return PlainTextResponse(
-                                status_code=r.status, content=response_data
-                            )
-
-                    return response_data
+                models = {
+                    "data": api_config.get("model_ids", []) or [],
+                    "object": "list",
+                }
             else:
                 headers["Authorization"] = f"Bearer {key}"
 
                 async with session.get(
                     f"{url}/models",
                     headers=headers,
+                    timeout=aiohttp.ClientTimeout(
+                        total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST
+                    ),
                     ssl=AIOHTTP_CLIENT_SESSION_SSL,
                 ) as r:
-                    try:
-                        response_data = await r.json()
-                    except Exception:
-                        response_data = await r.text()
-
                     if r.status != 200:
-                        if isinstance(response_data, (dict, list)):
-                            return JSONResponse(
-                                status_code=r.status, content=response_data
-                            )
-                        else:
-                            return PlainTextResponse(
-                                status_code=r.status, content=response_data
+                        # Extract response error details if available
+                        error_detail = f"HTTP Error: {r.status}"
+                        res = await r.json()
+                        if "error" in res:
+                            error_detail = f"External Error: {res['error']}"
+                        raise Exception(error_detail)
+
+                    response_data = await r.json()
+
+                    # Check if we're calling OpenAI API based on the URL
+                    if "api.openai.com" in url:
+                        # Filter models according to the specified conditions
+                        response_data["data"] = [
+                            model
+                            for model in response_data.get("data", [])
+                            if not any(
+                                name in model["id"]
+                                for name in [
+                                    "babbage",
+                                    "dall-e",
+                                    "davinci",
+                                    "embedding",
+                                    "tts",
+                                    "whisper",
+                                ]
                             )
+                        ]
 
-                    return response_data
-
+                    models = response_data
         except aiohttp.ClientError as e:
             # ClientError covers all aiohttp requests issues
             log.exception(f"Client error: {str(e)}")
@@ -656,9 +566,106 @@ async def verify_connection(
             )
         except Exception as e:
             log.exception(f"Unexpected error: {e}")
-            raise HTTPException(
-                status_code=500, detail="Open WebUI: Server Connection Error"
-            )
+            error_detail = f"Unexpected error: {str(e)}"
+            raise HTTPException(status_code=500, detail=error_detail)
+
+    if user.role == "user" and not BYPASS_MODEL_ACCESS_CONTROL:
+        models["data"] = await get_filtered_models(models, user)
+
+    return models
+
+
+class ConnectionVerificationForm(BaseModel):
+    url: str
+    key: str
+
+    config: Optional[dict] = None
+
+
+@router.post("/verify")
+async def verify_connection(
+    form_data: ConnectionVerificationForm, user=Depends(get_admin_user)
+):
+    url = form_data.url
+    key = form_data.key
+
+    api_config = form_data.config or {}
+
+    session = get_http_session(url)
+    try:
+        headers = {
+            "Content-Type": "application/json",
+            **(
+                {
+                    "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                    "X-OpenWebUI-User-Id": user.id,
+                    "X-OpenWebUI-User-Email": user.email,
+                    "X-OpenWebUI-User-Role": user.role,
+                }
+                if ENABLE_FORWARD_USER_INFO_HEADERS
+                else {}
+            ),
+        }
+
+        if api_config.get("azure", False):
+            headers["api-key"] = key
+            api_version = api_config.get("api_version", "") or "2023-03-15-preview"
+
+            async with session.get(
+                url=f"{url}/openai/models?api-version={api_version}",
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST),
+                ssl=AIOHTTP_CLIENT_SESSION_SSL,
+            ) as r:
+                try:
+                    response_data = await r.json()
+                except Exception:
+                    response_data = await r.text()
+
+                if r.status != 200:
+                    if isinstance(response_data, (dict, list)):
+                        return JSONResponse(status_code=r.status, content=response_data)
+                    else:
+                        return PlainTextResponse(
+                            status_code=r.status, content=response_data
+                        )
+
+                return response_data
+        else:
+            headers["Authorization"] = f"Bearer {key}"
+
+            async with session.get(
+                f"{url}/models",
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST),
+                ssl=AIOHTTP_CLIENT_SESSION_SSL,
+            ) as r:
+                try:
+                    response_data = await r.json()
+                except Exception:
+                    response_data = await r.text()
+
+                if r.status != 200:
+                    if isinstance(response_data, (dict, list)):
+                        return JSONResponse(status_code=r.status, content=response_data)
+                    else:
+                        return PlainTextResponse(
+                            status_code=r.status, content=response_data
+                        )
+
+                return response_data
+
+    except aiohttp.ClientError as e:
+        # ClientError covers all aiohttp requests issues
+        log.exception(f"Client error: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail="Open WebUI: Server Connection Error"
+        )
+    except Exception as e:
+        log.exception(f"Unexpected error: {e}")
+        raise HTTPException(
+            status_code=500, detail="Open WebUI: Server Connection Error"
+        )
 
 
 def get_azure_allowed_params(api_version: str) -> set[str]:
@@ -876,20 +883,18 @@ async def generate_chat_completion(
     payload = json.dumps(payload)
 
     r = None
-    session = None
     streaming = False
     response = None
 
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
+        session = get_http_session(request_url)
 
         r = await session.request(
             method="POST",
             url=request_url,
             data=payload,
             headers=headers,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
 
@@ -900,9 +905,7 @@ async def generate_chat_completion(
                 r.content,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(cleanup_response, response=r),
             )
         else:
             try:
@@ -927,7 +930,7 @@ async def generate_chat_completion(
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
 
 
 async def embeddings(request: Request, form_data: dict, user):
@@ -954,10 +957,9 @@ async def embeddings(request: Request, form_data: dict, user):
     url = request.app.state.config.OPENAI_API_BASE_URLS[idx]
     key = request.app.state.config.OPENAI_API_KEYS[idx]
     r = None
-    session = None
     streaming = False
     try:
-        session = aiohttp.ClientSession(trust_env=True)
+        session = get_http_session(url)
         r = await session.request(
             method="POST",
             url=f"{url}/embeddings",
@@ -984,9 +986,7 @@ async def embeddings(request: Request, form_data: dict, user):
                 r.content,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(cleanup_response, response=r),
             )
         else:
             try:
@@ -1011,7 +1011,7 @@ async def embeddings(request: Request, form_data: dict, user):
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
 
 
 @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
@@ -1033,7 +1033,6 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
     )
 
     r = None
-    session = None
     streaming = False
 
     try:
@@ -1065,7 +1064,7 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
             headers["Authorization"] = f"Bearer {key}"
             request_url = f"{url}/{path}"
 
-        session = aiohttp.ClientSession(trust_env=True)
+        session = get_http_session(request_url)
         r = await session.request(
             method=request.method,
             url=request_url,
@@ -1081,9 +1080,7 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
                 r.content,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(cleanup_response, response=r),
             )
         else:
             try:
@@ -1109,4 +1106,4 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
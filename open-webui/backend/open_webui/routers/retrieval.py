@@ -4,11 +4,14 @@ import mimetypes
 import os
 import shutil
 import asyncio
+import itertools
 
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Iterator, List, Optional, Sequence, Union
+from typing import Callable, Iterator, List, Optional, Sequence, Union
 
 from fastapi import (
     Depends,
@@ -37,6 +40,10 @@ from open_webui.storage.provider import Storage
 
 
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
+from open_webui.retrieval.query_cache import QUERY_RESULT_CACHE
+from open_webui.retrieval.rerank_cache import RERANK_CACHE
 
 # Document loaders
 from open_webui.retrieval.loaders.main import Loader
@@ -45,6 +52,7 @@ from open_webui.retrieval.loaders.youtube import YoutubeLoader
 # Web search engines
 from open_webui.retrieval.web.main import SearchResult
 from open_webui.retrieval.web.utils import get_web_loader
+from open_webui.retrieval.web.cache import WEB_PAGE_CACHE, load_web_documents
 from open_webui.retrieval.web.brave import search_brave
 from open_webui.retrieval.web.kagi import search_kagi
 from open_webui.retrieval.web.mojeek import search_mojeek
@@ -71,7 +79,7 @@ from open_webui.retrieval.utils import (
     get_embedding_function,
     get_reranking_function,
     get_model_path,
-    query_collection,
+    aquery_collection,
     query_collection_with_hybrid_search,
     query_doc,
     query_doc_with_hybrid_search,
@@ -91,6 +99,10 @@ from open_webui.config import (
     DEFAULT_LOCALE,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_QUERY_PREFIX,
+    ENABLE_RAG_STREAMING_INGESTION,
+    RAG_STREAMING_INGESTION_BATCH_SIZE,
+    RAG_STREAMING_INGESTION_QUEUE_SIZE,
+    ENABLE_RAG_INCREMENTAL_UPDATES,
 )
 from open_webui.env import (
     SRC_LOG_LEVELS,
@@ -248,6 +260,93 @@ async def get_embedding_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/embedding/cache")
+async def get_embedding_cache_stats(user=Depends(get_admin_user)):
+    return EMBEDDING_CACHE.stats()
+
+
+@router.post("/embedding/cache/reset")
+async def reset_embedding_cache(user=Depends(get_admin_user)):
+    EMBEDDING_CACHE.clear()
+    return EMBEDDING_CACHE.stats()
+
+
+@router.get("/reranking/cache")
+async def get_reranking_cache_stats(user=Depends(get_admin_user)):
+    return RERANK_CACHE.stats()
+
+
+@router.post("/reranking/cache/reset")
+async def reset_reranking_cache(user=Depends(get_admin_user)):
+    RERANK_CACHE.clear()
+    return RERANK_CACHE.stats()
+
+
+@router.get("/web/cache")
+async def get_web_page_cache_stats(user=Depends(get_admin_user)):
+    return await run_in_threadpool(WEB_PAGE_CACHE.stats)
+
+
+@router.post("/web/cache/reset")
+async def reset_web_page_cache(user=Depends(get_admin_user)):
+    await run_in_threadpool(WEB_PAGE_CACHE.clear)
+    return await run_in_threadpool(WEB_PAGE_CACHE.stats)
+
+
+@router.get("/query/cache")
+async def get_query_cache_stats(user=Depends(get_admin_user)):
+    return QUERY_RESULT_CACHE.stats()
+
+
+@router.post("/query/cache/reset")
+async def reset_query_cache(user=Depends(get_admin_user)):
+    QUERY_RESULT_CACHE.bump_all()
+    return QUERY_RESULT_CACHE.stats()
+
+
+def get_vector_index_method(name: str) -> Callable:
+    method = getattr(VECTOR_DB_CLIENT, name, None)
+    if method is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(
+                "Vector index management is not supported by the configured vector database"
+            ),
+        )
+    return method
+
+
+@router.get("/vector/index")
+async def get_vector_index_info(user=Depends(get_admin_user)):
+    return await run_in_threadpool(get_vector_index_method("get_index_info"))
+
+
+@router.post("/vector/index/rebuild")
+async def rebuild_vector_index(user=Depends(get_admin_user)):
+    rebuild_index = get_vector_index_method("rebuild_index")
+    try:
+        return await run_in_threadpool(rebuild_index)
+    except Exception as e:
+        log.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
+
+
+@router.get("/vector/index/benchmark")
+async def benchmark_vector_index(
+    collection_name: str,
+    k: int = 10,
+    samples: int = 20,
+    user=Depends(get_admin_user),
+):
+    benchmark_index = get_vector_index_method("benchmark_index")
+    return await run_in_threadpool(
+        benchmark_index, collection_name, k=k, samples=min(max(samples, 1), 1000)
+    )
+
+
 class OpenAIConfigForm(BaseModel):
     url: str
     key: str
@@ -1153,6 +1252,252 @@ async def update_rag_config(
 ####################################
 
 
+def split_docs(request: Request, docs: list[Document]) -> list[Document]:
+    if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+        return text_splitter.split_documents(docs)
+    elif request.app.state.config.TEXT_SPLITTER == "token":
+        log.info(
+            f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
+        )
+
+        tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
+        text_splitter = TokenTextSplitter(
+            encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+        return text_splitter.split_documents(docs)
+    elif request.app.state.config.TEXT_SPLITTER == "markdown_header":
+        log.info("Using markdown header text splitter")
+
+        # Define headers to split on - covering most common markdown header levels
+        headers_to_split_on = [
+            ("#", "Header 1"),
+            ("##", "Header 2"),
+            ("###", "Header 3"),
+            ("####", "Header 4"),
+            ("#####", "Header 5"),
+            ("######", "Header 6"),
+        ]
+
+        markdown_splitter = MarkdownHeaderTextSplitter(
+            headers_to_split_on=headers_to_split_on,
+            strip_headers=False,  # Keep headers in content for context
+        )
+
+        md_split_docs = []
+        for doc in docs:
+            md_header_splits = markdown_splitter.split_text(doc.page_content)
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=request.app.state.config.CHUNK_SIZE,
+                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+                add_start_index=True,
+            )
+            md_header_splits = text_splitter.split_documents(md_header_splits)
+
+            # Convert back to Document objects, preserving original metadata
+            for split_chunk in md_header_splits:
+                headings_list = []
+                # Extract header values in order based on headers_to_split_on
+                for _, header_meta_key_name in headers_to_split_on:
+                    if header_meta_key_name in split_chunk.metadata:
+                        headings_list.append(split_chunk.metadata[header_meta_key_name])
+
+                md_split_docs.append(
+                    Document(
+                        page_content=split_chunk.page_content,
+                        metadata={**doc.metadata, "headings": headings_list},
+                    )
+                )
+
+        return md_split_docs
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+
+def get_chunk_hash(text: str, engine: str, model: str) -> str:
+    # Vectors are only reusable for the same text under the same embedding model
+    return calculate_sha256_string(f"{engine}\x00{model}\x00{text}")
+
+
+def get_chunk_changes(
+    collection_name: str, file_id: str, metadatas: list[dict]
+) -> tuple[list[int], dict[int, str], list[str]]:
+    """
+    Diff the chunks of a file against the chunks stored for it by chunk_hash.
+    Returns the indices of chunks that need to be embedded, the stored ids of
+    the unchanged chunks by index, and the ids of stored chunks that are no
+    longer part of the file.
+    """
+    stored = {}
+    stale_ids = []
+
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=collection_name, filter={"file_id": file_id}
+    )
+    if result is not None:
+        for id, stored_metadata in zip(result.ids[0], result.metadatas[0]):
+            chunk_hash = (stored_metadata or {}).get("chunk_hash")
+            if chunk_hash:
+                stored.setdefault(chunk_hash, []).append(id)
+            else:
+                # Stored before chunks were fingerprinted
+                stale_ids.append(id)
+
+    new_indices = []
+    retained = {}
+    for idx, chunk_metadata in enumerate(metadatas):
+        ids = stored.get(chunk_metadata["chunk_hash"])
+        if ids:
+            retained[idx] = ids.pop()
+        else:
+            new_indices.append(idx)
+
+    stale_ids.extend(id for ids in stored.values() for id in ids)
+    return new_indices, retained, stale_ids
+
+
+def update_retained_chunks(
+    collection_name: str, retained: dict[int, str], texts: list, metadatas: list
+) -> bool:
+    """
+    Give the unchanged chunks of an updated file the metadata of its new
+    version, so that all its chunks carry the same file hash and name.
+    Returns False when the vector DB cannot update metadata on its own.
+    """
+    ids = list(retained.values())
+    try:
+        VECTOR_DB_CLIENT.update_metadata(
+            collection_name=collection_name,
+            ids=ids,
+            metadatas=[metadatas[idx] for idx in retained],
+        )
+    except NotImplementedError:
+        return False
+
+    BM25_INDEX.delete(collection_name=collection_name, ids=ids)
+    BM25_INDEX.add(
+        collection_name=collection_name,
+        items=[
+            {"id": id, "text": texts[idx], "metadata": metadatas[idx]}
+            for idx, id in retained.items()
+        ],
+    )
+    return True
+
+
+def stream_docs_to_vector_db(
+    collection_name: str,
+    chunks: Iterator[tuple[int, Document]],
+    embedding_function: Callable,
+    get_metadata: Callable[[Document], dict],
+    new_collection: bool = True,
+    total_docs: Optional[int] = None,
+    user=None,
+    progress_callback: Optional[Callable[[dict], None]] = None,
+) -> None:
+    """
+    Embed and insert (document index, chunk) pairs in bounded batches.
+
+    Chunks are embedded RAG_STREAMING_INGESTION_BATCH_SIZE at a time and handed
+    to a single insert worker, so embedding the next batch overlaps with
+    inserting the previous one. Once RAG_STREAMING_INGESTION_QUEUE_SIZE batches
+    are waiting to be inserted the producer blocks, which keeps the memory
+    used by chunks and vectors flat regardless of the document size (the
+    extracted documents themselves are loaded in full by the callers). If any
+    batch fails, everything inserted so far is removed again.
+    """
+    progress = {
+        "documents": 0,
+        "total_documents": total_docs,
+        "embedded": 0,
+        "inserted": 0,
+    }
+    inserted_ids = []
+
+    def embed_batch(batch: list[tuple[int, Document]]) -> list[dict]:
+        embeddings = embedding_function(
+            [doc.page_content.replace("\n", " ") for _, doc in batch],
+            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+            user=user,
+        )
+        if embeddings is None or len(embeddings) != len(batch):
+            raise Exception("Failed to generate embeddings")
+
+        return [
+            {
+                "id": str(uuid.uuid4()),
+                "text": doc.page_content,
+                "vector": embeddings[idx],
+                "metadata": get_metadata(doc),
+            }
+            for idx, (_, doc) in enumerate(batch)
+        ]
+
+    def insert_batch(items: list[dict], first: bool) -> None:
+        VECTOR_DB_CLIENT.insert(collection_name=collection_name, items=items)
+        inserted_ids.extend(item["id"] for item in items)
+
+        if first and new_collection:
+            BM25_INDEX.create_collection(collection_name=collection_name, items=items)
+        else:
+            BM25_INDEX.add(collection_name=collection_name, items=items)
+
+        progress["inserted"] += len(items)
+        if progress_callback:
+            progress_callback(dict(progress))
+
+    # A single worker keeps inserts in order
+    executor = ThreadPoolExecutor(max_workers=1)
+    pending = deque()
+    try:
+        first = True
+        while batch := list(
+            itertools.islice(chunks, max(1, RAG_STREAMING_INGESTION_BATCH_SIZE))
+        ):
+            items = embed_batch(batch)
+            progress["documents"] = batch[-1][0] + 1
+            progress["embedded"] += len(items)
+
+            while len(pending) >= max(1, RAG_STREAMING_INGESTION_QUEUE_SIZE):
+                pending.popleft().result()
+            pending.append(executor.submit(insert_batch, items, first))
+            first = False
+
+        while pending:
+            pending.popleft().result()
+
+        log.info(
+            f"stream_docs_to_vector_db: inserted {progress['inserted']} chunks into {collection_name}"
+        )
+    except Exception:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+        try:
+            if new_collection:
+                if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+                    VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+                BM25_INDEX.delete_collection(collection_name=collection_name)
+            elif inserted_ids:
+                VECTOR_DB_CLIENT.delete(
+                    collection_name=collection_name, ids=inserted_ids
+                )
+                BM25_INDEX.delete(collection_name=collection_name, ids=inserted_ids)
+        except Exception as e:
+            log.exception(f"Failed to remove partially inserted chunks: {e}")
+        raise
+    finally:
+        executor.shutdown(wait=True)
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -1162,6 +1507,8 @@ def save_docs_to_vector_db(
     split: bool = True,
     add: bool = False,
     user=None,
+    progress_callback: Optional[Callable[[dict], None]] = None,
+    incremental: bool = False,
 ) -> bool:
     def _get_docs_info(docs: list[Document]) -> str:
         docs_info = set()
@@ -1183,8 +1530,11 @@ def save_docs_to_vector_db(
         f"save_docs_to_vector_db: document {_get_docs_info(docs)} {collection_name}"
     )
 
+    # Updates of a file are diffed against its stored chunks instead
+    incremental = incremental and bool(metadata and metadata.get("file_id"))
+
     # Check if entries with the same hash (metadata.hash) already exist
-    if metadata and "hash" in metadata:
+    if metadata and "hash" in metadata and not incremental:
         result = VECTOR_DB_CLIENT.query(
             collection_name=collection_name,
             filter={"hash": metadata["hash"]},
@@ -1196,104 +1546,59 @@ def save_docs_to_vector_db(
                 log.info(f"Document with hash {metadata['hash']} already exists")
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
-    if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        elif request.app.state.config.TEXT_SPLITTER == "markdown_header":
-            log.info("Using markdown header text splitter")
-
-            # Define headers to split on - covering most common markdown header levels
-            headers_to_split_on = [
-                ("#", "Header 1"),
-                ("##", "Header 2"),
-                ("###", "Header 3"),
-                ("####", "Header 4"),
-                ("#####", "Header 5"),
-                ("######", "Header 6"),
-            ]
-
-            markdown_splitter = MarkdownHeaderTextSplitter(
-                headers_to_split_on=headers_to_split_on,
-                strip_headers=False,  # Keep headers in content for context
-            )
-
-            md_split_docs = []
-            for doc in docs:
-                md_header_splits = markdown_splitter.split_text(doc.page_content)
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=request.app.state.config.CHUNK_SIZE,
-                    chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                    add_start_index=True,
-                )
-                md_header_splits = text_splitter.split_documents(md_header_splits)
-
-                # Convert back to Document objects, preserving original metadata
-                for split_chunk in md_header_splits:
-                    headings_list = []
-                    # Extract header values in order based on headers_to_split_on
-                    for _, header_meta_key_name in headers_to_split_on:
-                        if header_meta_key_name in split_chunk.metadata:
-                            headings_list.append(
-                                split_chunk.metadata[header_meta_key_name]
-                            )
-
-                    md_split_docs.append(
-                        Document(
-                            page_content=split_chunk.page_content,
-                            metadata={**doc.metadata, "headings": headings_list},
-                        )
-                    )
-
-            docs = md_split_docs
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
-
-    if len(docs) == 0:
-        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
-
-    texts = [doc.page_content for doc in docs]
-    metadatas = [
-        {
+    def _get_metadata(doc: Document) -> dict:
+        return {
             **doc.metadata,
             **(metadata if metadata else {}),
             "embedding_config": {
                 "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
                 "model": request.app.state.config.RAG_EMBEDDING_MODEL,
             },
+            "chunk_hash": get_chunk_hash(
+                doc.page_content,
+                request.app.state.config.RAG_EMBEDDING_ENGINE,
+                request.app.state.config.RAG_EMBEDDING_MODEL,
+            ),
         }
-        for doc in docs
-    ]
+
+    if ENABLE_RAG_STREAMING_INGESTION and not incremental:
+        # Split lazily, one source document at a time
+        chunks = (
+            (idx, chunk)
+            for idx, doc in enumerate(docs)
+            for chunk in (split_docs(request, [doc]) if split else [doc])
+        )
+
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+        chunks = itertools.chain([first_chunk], chunks)
+    else:
+        if split:
+            docs = split_docs(request, docs)
+
+        if len(docs) == 0:
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+        texts = [doc.page_content for doc in docs]
+        metadatas = [_get_metadata(doc) for doc in docs]
 
     try:
+        new_collection = True
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
             log.info(f"collection {collection_name} already exists")
 
             if overwrite:
                 VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+                BM25_INDEX.delete_collection(collection_name=collection_name)
                 log.info(f"deleting existing collection {collection_name}")
-            elif add is False:
+            elif add is False and not incremental:
                 log.info(
                     f"collection {collection_name} already exists, overwrite is False and add is False"
                 )
                 return True
+            else:
+                new_collection = False
 
         log.info(f"adding to collection {collection_name}")
         embedding_function = get_embedding_function(
@@ -1326,26 +1631,70 @@ def save_docs_to_vector_db(
             ),
         )
 
-        embeddings = embedding_function(
-            list(map(lambda x: x.replace("\n", " "), texts)),
-            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
-            user=user,
-        )
+        stale_ids = []
+        if incremental and not new_collection:
+            new_indices, retained, stale_ids = get_chunk_changes(
+                collection_name, metadata["file_id"], metadatas
+            )
+            if retained and not update_retained_chunks(
+                collection_name, retained, texts, metadatas
+            ):
+                # Their vectors cannot be kept with stale metadata, embed them again
+                new_indices = sorted(new_indices + list(retained))
+                stale_ids.extend(retained.values())
+                retained = {}
+            log.info(
+                f"updating file {metadata['file_id']} in {collection_name}: "
+                f"{len(retained)} chunks unchanged, {len(new_indices)} new, {len(stale_ids)} removed"
+            )
+            texts = [texts[idx] for idx in new_indices]
+            metadatas = [metadatas[idx] for idx in new_indices]
+        elif ENABLE_RAG_STREAMING_INGESTION and not incremental:
+            stream_docs_to_vector_db(
+                collection_name,
+                chunks,
+                embedding_function,
+                _get_metadata,
+                new_collection=new_collection,
+                total_docs=len(docs),
+                user=user,
+                progress_callback=progress_callback,
+            )
+            return True
 
-        items = [
-            {
-                "id": str(uuid.uuid4()),
-                "text": text,
-                "vector": embeddings[idx],
-                "metadata": metadatas[idx],
-            }
-            for idx, text in enumerate(texts)
-        ]
+        if texts:
+            embeddings = embedding_function(
+                list(map(lambda x: x.replace("\n", " "), texts)),
+                prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+                user=user,
+            )
 
-        VECTOR_DB_CLIENT.insert(
-            collection_name=collection_name,
-            items=items,
-        )
+            items = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "text": text,
+                    "vector": embeddings[idx],
+                    "metadata": metadatas[idx],
+                }
+                for idx, text in enumerate(texts)
+            ]
+
+            VECTOR_DB_CLIENT.insert(
+                collection_name=collection_name,
+                items=items,
+            )
+
+            # Keep the sparse index in sync so hybrid search never rebuilds it per query
+            if new_collection:
+                BM25_INDEX.create_collection(
+                    collection_name=collection_name, items=items
+                )
+            else:
+                BM25_INDEX.add(collection_name=collection_name, items=items)
+
+        if stale_ids:
+            VECTOR_DB_CLIENT.delete(collection_name=collection_name, ids=stale_ids)
+            BM25_INDEX.delete(collection_name=collection_name, ids=stale_ids)
 
         return True
     except Exception as e:
@@ -1357,6 +1706,8 @@ class ProcessFileForm(BaseModel):
     file_id: str
     content: Optional[str] = None
     collection_name: Optional[str] = None
+    # Replace the file's existing chunks in collection_name, see ENABLE_RAG_INCREMENTAL_UPDATES
+    update: bool = False
 
 
 @router.post("/process/file")
@@ -1377,12 +1728,16 @@ def process_file(
             # Update the content in the file
             # Usage: /files/{file_id}/data/content/update, /files/ (audio file upload pipeline)
 
-            try:
-                # /files/{file_id}/data/content/update
-                VECTOR_DB_CLIENT.delete_collection(collection_name=f"file-{file.id}")
-            except:
-                # Audio file upload pipeline
-                pass
+            if not ENABLE_RAG_INCREMENTAL_UPDATES:
+                try:
+                    # /files/{file_id}/data/content/update
+                    VECTOR_DB_CLIENT.delete_collection(
+                        collection_name=f"file-{file.id}"
+                    )
+                    BM25_INDEX.delete_collection(collection_name=f"file-{file.id}")
+                except:
+                    # Audio file upload pipeline
+                    pass
 
             docs = [
                 Document(
@@ -1498,9 +1853,21 @@ def process_file(
             text_content = " ".join([doc.page_content for doc in docs])
 
         log.debug(f"text_content: {text_content}")
+
+        # With streaming ingestion a file being processed on its own stays
+        # "processing" until every chunk is inserted, reporting progress
+        # through /files/{id}/process/status
+        streaming = (
+            ENABLE_RAG_STREAMING_INGESTION
+            and not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
+            and not form_data.collection_name
+        )
         Files.update_file_data_by_id(
             file.id,
-            {"status": "completed", "content": text_content},
+            {
+                "status": "processing" if streaming else "completed",
+                "content": text_content,
+            },
         )
 
         hash = calculate_sha256_string(text_content)
@@ -1519,8 +1886,24 @@ def process_file(
                     },
                     add=(True if form_data.collection_name else False),
                     user=user,
+                    progress_callback=(
+                        (
+                            lambda progress: Files.update_file_data_by_id(
+                                file.id, {"progress": progress}
+                            )
+                        )
+                        if streaming
+                        else None
+                    ),
+                    incremental=(
+                        ENABLE_RAG_INCREMENTAL_UPDATES
+                        and bool(form_data.content or form_data.update)
+                    ),
                 )
 
+                if streaming:
+                    Files.update_file_data_by_id(file.id, {"status": "completed"})
+
                 if result:
                     Files.update_file_metadata_by_id(
                         file.id,
@@ -1536,6 +1919,10 @@ def process_file(
                         "content": text_content,
                     }
             except Exception as e:
+                if streaming:
+                    Files.update_file_data_by_id(
+                        file.id, {"status": "failed", "error": str(e)}
+                    )
                 raise e
         else:
             return {
@@ -1999,13 +2386,13 @@ async def process_web_search(
                 if hasattr(result, "snippet") and result.snippet is not None
             ]
         else:
-            loader = get_web_loader(
+            # Only pages that are new, or expired and changed, are fetched again
+            docs = await load_web_documents(
                 urls,
                 verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
                 requests_per_second=request.app.state.config.WEB_LOADER_CONCURRENT_REQUESTS,
                 trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
             )
-            docs = await loader.aload()
 
         urls = [
             doc.metadata.get("source") for doc in docs if doc.metadata.get("source")
@@ -2078,13 +2465,9 @@ def query_doc_handler(
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH and (
             form_data.hybrid is None or form_data.hybrid
         ):
-            collection_results = {}
-            collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=form_data.collection_name
-            )
             return query_doc_with_hybrid_search(
                 collection_name=form_data.collection_name,
-                collection_result=collection_results[form_data.collection_name],
+                collection_result=None,
                 query=form_data.query,
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
                     query, prefix=prefix, user=user
@@ -2141,7 +2524,7 @@ class QueryCollectionsForm(BaseModel):
 
 
 @router.post("/query/collection")
-def query_collection_handler(
+async def query_collection_handler(
     request: Request,
     form_data: QueryCollectionsForm,
     user=Depends(get_verified_user),
@@ -2150,7 +2533,8 @@ def query_collection_handler(
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH and (
             form_data.hybrid is None or form_data.hybrid
         ):
-            return query_collection_with_hybrid_search(
+            return await run_in_threadpool(
+                query_collection_with_hybrid_search,
                 collection_names=form_data.collection_names,
                 queries=[form_data.query],
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
@@ -2180,7 +2564,7 @@ def query_collection_handler(
                 ),
             )
         else:
-            return query_collection(
+            return await aquery_collection(
                 collection_names=form_data.collection_names,
                 queries=[form_data.query],
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
@@ -2213,12 +2597,14 @@ class DeleteForm(BaseModel):
 def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin_user)):
     try:
         if VECTOR_DB_CLIENT.has_collection(collection_name=form_data.collection_name):
-            file = Files.get_file_by_id(form_data.file_id)
-            hash = file.hash
-
+            # Match on the file id, which every chunk of the file carries
             VECTOR_DB_CLIENT.delete(
                 collection_name=form_data.collection_name,
-                metadata={"hash": hash},
+                filter={"file_id": form_data.file_id},
+            )
+            BM25_INDEX.delete(
+                collection_name=form_data.collection_name,
+                filter={"file_id": form_data.file_id},
             )
             return {"status": True}
         else:
@@ -2231,6 +2617,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    BM25_INDEX.reset()
     Knowledges.delete_all_knowledge()
 
 
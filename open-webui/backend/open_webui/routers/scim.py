@@ -23,6 +23,7 @@ from open_webui.utils.auth import (
     decode_token,
     get_verified_user,
 )
+from open_webui.utils.access_control import invalidate_principals
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -798,6 +799,7 @@ async def create_group(
             user_ids=member_ids,
         )
         Groups.update_group_by_id(new_group.id, update_form)
+        invalidate_principals()
         new_group = Groups.get_group_by_id(new_group.id)
 
     return group_to_scim(new_group, request)
@@ -833,6 +835,7 @@ async def update_group(
 
     # Update group
     updated_group = Groups.update_group_by_id(group_id, update_form)
+    invalidate_principals()
     if not updated_group:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -893,6 +896,7 @@ async def patch_group(
 
     # Update group
     updated_group = Groups.update_group_by_id(group_id, update_form)
+    invalidate_principals()
     if not updated_group:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -917,6 +921,7 @@ async def delete_group(
         )
 
     success = Groups.delete_group_by_id(group_id)
+    invalidate_principals()
     if not success:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
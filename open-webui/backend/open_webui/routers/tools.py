@@ -18,7 +18,7 @@ from open_webui.models.tools import (
 from open_webui.utils.plugin import load_tool_module_by_id, replace_imports
 from open_webui.utils.tools import get_tool_specs
 from open_webui.utils.auth import get_admin_user, get_verified_user
-from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.access_control import AccessIndex, has_access, has_permission
 from open_webui.utils.tools import get_tool_servers
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -71,12 +71,12 @@ async def get_tools(request: Request, user=Depends(get_verified_user)):
         # Admin can see all tools
         return tools
     else:
-        tools = [
-            tool
-            for tool in tools
-            if tool.user_id == user.id
-            or has_access(user.id, "read", tool.access_control)
-        ]
+        access_index = AccessIndex("read")
+        for tool in tools:
+            access_index.add(tool.id, tool.access_control, tool.user_id)
+        accessible_ids = access_index.get_accessible_ids(user.id)
+
+        tools = [tool for tool in tools if tool.id in accessible_ids]
         return tools
 
 
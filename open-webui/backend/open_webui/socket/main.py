@@ -27,9 +27,16 @@ from open_webui.env import (
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
     REDIS_KEY_PREFIX,
+    CHAT_EVENT_FLUSH_INTERVAL,
+    CHAT_EVENT_FLUSH_SIZE,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock, YdocManager
+from open_webui.socket.utils import (
+    AsyncRedisDict,
+    RedisLock,
+    YdocManager,
+    MessageEventBuffer,
+)
 from open_webui.tasks import create_task, stop_item_tasks
 from open_webui.utils.redis import get_redis_connection
 from open_webui.utils.access_control import has_access, get_users_with_access
@@ -47,6 +54,7 @@ log.setLevel(SRC_LOG_LEVELS["SOCKET"])
 
 
 REDIS = None
+YDOC_REDIS = None
 
 if WEBSOCKET_MANAGER == "redis":
     if WEBSOCKET_SENTINEL_HOSTS:
@@ -90,23 +98,33 @@ if WEBSOCKET_MANAGER == "redis":
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
         async_mode=True,
     )
+    # Yjs updates are stored as raw bytes
+    YDOC_REDIS = get_redis_connection(
+        redis_url=WEBSOCKET_REDIS_URL,
+        redis_sentinels=get_sentinels_from_env(
+            WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
+        ),
+        redis_cluster=WEBSOCKET_REDIS_CLUSTER,
+        async_mode=True,
+        decode_responses=False,
+    )
 
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
     )
-    SESSION_POOL = RedisDict(
+    SESSION_POOL = AsyncRedisDict(
         f"{REDIS_KEY_PREFIX}:session_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
     )
-    USER_POOL = RedisDict(
+    USER_POOL = AsyncRedisDict(
         f"{REDIS_KEY_PREFIX}:user_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
     )
-    USAGE_POOL = RedisDict(
+    USAGE_POOL = AsyncRedisDict(
         f"{REDIS_KEY_PREFIX}:usage_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
@@ -124,9 +142,9 @@ if WEBSOCKET_MANAGER == "redis":
     renew_func = clean_up_lock.renew_lock
     release_func = clean_up_lock.release_lock
 else:
-    SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
+    SESSION_POOL = AsyncRedisDict(f"{REDIS_KEY_PREFIX}:session_pool")
+    USER_POOL = AsyncRedisDict(f"{REDIS_KEY_PREFIX}:user_pool")
+    USAGE_POOL = AsyncRedisDict(f"{REDIS_KEY_PREFIX}:usage_pool")
 
     aquire_func = release_func = renew_func = lambda: True
 
@@ -134,6 +152,7 @@ else:
 YDOC_MANAGER = YdocManager(
     redis=REDIS,
     redis_key_prefix=f"{REDIS_KEY_PREFIX}:ydoc:documents",
+    redis_binary=YDOC_REDIS,
 )
 
 
@@ -166,7 +185,9 @@ async def periodic_usage_pool_cleanup():
 
             now = int(time.time())
             send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
+            expired_model_ids = []
+            updated_connections = {}
+            for model_id, connections in await USAGE_POOL.items():
                 # Creating a list of sids to remove if they have timed out
                 expired_sids = [
                     sid
@@ -179,11 +200,14 @@ async def periodic_usage_pool_cleanup():
 
                 if not connections:
                     log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
+                    expired_model_ids.append(model_id)
                 else:
-                    USAGE_POOL[model_id] = connections
+                    updated_connections[model_id] = connections
 
                 send_usage = True
+
+            await USAGE_POOL.delete(*expired_model_ids)
+            await USAGE_POOL.set_many(updated_connections)
             await asyncio.sleep(TIMEOUT_DURATION)
     finally:
         release_func()
@@ -195,24 +219,29 @@ app = socketio.ASGIApp(
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
+    models_in_use = await USAGE_POOL.keys()
     return models_in_use
 
 
-def get_active_user_ids():
+async def get_active_user_ids():
     """Get the list of active user IDs."""
-    return list(USER_POOL.keys())
+    return await USER_POOL.keys()
 
 
-def get_user_active_status(user_id):
+def get_active_user_count():
+    """Number of active users, for callers outside of the event loop."""
+    return USER_POOL.length_sync()
+
+
+async def get_user_active_status(user_id):
     """Check if a user is currently active."""
-    return user_id in USER_POOL
+    return await USER_POOL.contains(user_id)
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await SESSION_POOL.get(sid)
     if user:
         return user["id"]
     return None
@@ -227,33 +256,49 @@ def get_session_ids_from_room(room):
     return [session_id[0] for session_id in active_session_ids]
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = get_session_ids_from_room(room)
 
     active_user_ids = list(
-        set([SESSION_POOL.get(session_id)["id"] for session_id in active_session_ids])
+        set(
+            [
+                user["id"]
+                for user in await SESSION_POOL.get_many(active_session_ids)
+                if user
+            ]
+        )
     )
     return active_user_ids
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
+async def get_active_status_by_user_id(user_id):
+    if await USER_POOL.contains(user_id):
         return True
     return False
 
 
+async def add_session_to_pools(sid, user):
+    await SESSION_POOL.set(
+        sid, user.model_dump(exclude=["date_of_birth", "bio", "gender"])
+    )
+    await USER_POOL.append(user.id, sid)
+
+
 @sio.on("usage")
 async def usage(sid, data):
-    if sid in SESSION_POOL:
+    if await SESSION_POOL.contains(sid):
         model_id = data["model"]
         # Record the timestamp for the last update
         current_time = int(time.time())
 
         # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
+        await USAGE_POOL.set(
+            model_id,
+            {
+                **(await USAGE_POOL.get(model_id, {})),
+                sid: {"updated_at": current_time},
+            },
+        )
 
 
 @sio.event
@@ -266,13 +311,7 @@ async def connect(sid, environ, auth):
             user = Users.get_user_by_id(data["id"])
 
         if user:
-            SESSION_POOL[sid] = user.model_dump(
-                exclude=["date_of_birth", "bio", "gender"]
-            )
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await add_session_to_pools(sid, user)
 
 
 @sio.on("user-join")
@@ -290,11 +329,7 @@ async def user_join(sid, data):
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump(exclude=["date_of_birth", "bio", "gender"])
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    await add_session_to_pools(sid, user)
 
     # Join all the channels
     channels = Channels.get_channels_by_user_id(user.id)
@@ -378,7 +413,7 @@ async def channel_events(sid, data):
                 "channel_id": data["channel_id"],
                 "message_id": data.get("message_id", None),
                 "data": event_data,
-                "user": UserNameResponse(**SESSION_POOL[sid]).model_dump(),
+                "user": UserNameResponse(**(await SESSION_POOL.get(sid))).model_dump(),
             },
             room=room,
         )
@@ -387,7 +422,7 @@ async def channel_events(sid, data):
 @sio.on("ydoc:document:join")
 async def ydoc_document_join(sid, data):
     """Handle user joining a document"""
-    user = SESSION_POOL.get(sid)
+    user = await SESSION_POOL.get(sid)
 
     try:
         document_id = data["document_id"]
@@ -557,7 +592,7 @@ async def yjs_document_update(sid, data):
         async def debounced_save():
             await asyncio.sleep(0.5)
             await document_save_handler(
-                document_id, data.get("data", {}), SESSION_POOL.get(sid)
+                document_id, data.get("data", {}), await SESSION_POOL.get(sid)
             )
 
         if data.get("data"):
@@ -622,15 +657,11 @@ async def yjs_awareness_update(sid, data):
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
-
-        user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
+    user = await SESSION_POOL.get(sid)
+    if user:
+        await SESSION_POOL.delete(sid)
 
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
+        await USER_POOL.remove(user["id"], sid)
 
         await YDOC_MANAGER.remove_user_from_all_documents(sid)
     else:
@@ -638,13 +669,25 @@ async def disconnect(sid):
         # print(f"Unknown session ID {sid} disconnected")
 
 
+# Message events are persisted write-behind, see MessageEventBuffer
+MESSAGE_EVENT_BUFFER = MessageEventBuffer(
+    Chats, interval=CHAT_EVENT_FLUSH_INTERVAL, max_size=CHAT_EVENT_FLUSH_SIZE
+)
+
+
+async def flush_message_events(chat_id, message_id):
+    """Persist the buffered events of the message before it is read or saved."""
+    if chat_id and message_id:
+        await MESSAGE_EVENT_BUFFER.flush(chat_id, message_id)
+
+
 def get_event_emitter(request_info, update_db=True):
     async def __event_emitter__(event_data):
         user_id = request_info["user_id"]
 
         session_ids = list(
             set(
-                USER_POOL.get(user_id, [])
+                await USER_POOL.get(user_id, [])
                 + (
                     [request_info.get("session_id")]
                     if request_info.get("session_id")
@@ -670,76 +713,52 @@ def get_event_emitter(request_info, update_db=True):
 
         if update_db:
             if "type" in event_data and event_data["type"] == "status":
-                Chats.add_message_status_to_chat_by_id_and_message_id(
+                # Serialized with the buffered writes of the chat
+                await MESSAGE_EVENT_BUFFER.write(
+                    request_info["chat_id"],
+                    Chats.add_message_status_to_chat_by_id_and_message_id,
                     request_info["chat_id"],
                     request_info["message_id"],
                     event_data.get("data", {}),
                 )
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
+                await MESSAGE_EVENT_BUFFER.append_content(
                     request_info["chat_id"],
                     request_info["message_id"],
+                    event_data.get("data", {}).get("content", ""),
                 )
 
-                if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "content": content,
-                        },
-                    )
-
             if "type" in event_data and event_data["type"] == "replace":
-                content = event_data.get("data", {}).get("content", "")
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await MESSAGE_EVENT_BUFFER.replace_content(
                     request_info["chat_id"],
                     request_info["message_id"],
-                    {
-                        "content": content,
-                    },
+                    event_data.get("data", {}).get("content", ""),
                 )
 
             if "type" in event_data and event_data["type"] == "files":
-                message = Chats.get_message_by_id_and_message_id(
+                await MESSAGE_EVENT_BUFFER.add_files(
                     request_info["chat_id"],
                     request_info["message_id"],
-                )
-
-                files = event_data.get("data", {}).get("files", [])
-                files.extend(message.get("files", []))
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "files": files,
-                    },
+                    event_data.get("data", {}).get("files", []),
                 )
 
             if event_data.get("type") in ["source", "citation"]:
                 data = event_data.get("data", {})
                 if data.get("type") == None:
-                    message = Chats.get_message_by_id_and_message_id(
+                    await MESSAGE_EVENT_BUFFER.add_source(
                         request_info["chat_id"],
                         request_info["message_id"],
+                        data,
                     )
 
-                    sources = message.get("sources", [])
-                    sources.append(data)
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "sources": sources,
-                        },
-                    )
+            if (
+                event_data.get("type") == "chat:completion"
+                and event_data.get("data", {}).get("done")
+            ) or event_data.get("type") == "task-cancelled":
+                await flush_message_events(
+                    request_info["chat_id"], request_info["message_id"]
+                )
 
     return __event_emitter__
 
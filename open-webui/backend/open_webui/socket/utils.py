@@ -1,10 +1,22 @@
+import asyncio
 import json
+import logging
+import time
 import uuid
+from contextlib import asynccontextmanager
 from open_webui.utils.redis import get_redis_connection
-from open_webui.env import REDIS_KEY_PREFIX
+from open_webui.env import (
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+    WEBSOCKET_POOL_CACHE_TTL,
+    YDOC_COMPACTION_THRESHOLD,
+)
 from typing import Optional, List, Tuple
 import pycrdt as Y
 
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
+
 
 class RedisLock:
     def __init__(
@@ -108,34 +120,603 @@ class RedisDict:
         return self[key]
 
 
+class AsyncRedisDict:
+    """
+    Asyncio dict stored in a Redis hash, or in process memory without a Redis
+    URL.
+
+    Values are compact JSON. Reads are served from a local cache for
+    `cache_ttl` seconds, writes publish the key on a pub/sub channel so that
+    the other workers drop it from their cache right away. Where pub/sub is
+    not available (Redis Cluster) the TTL bounds how stale a read can be.
+    """
+
+    def __init__(
+        self,
+        name,
+        redis_url=None,
+        redis_sentinels=[],
+        redis_cluster=False,
+        cache_ttl: float = WEBSOCKET_POOL_CACHE_TTL,
+    ):
+        self.name = name
+        self.redis_url = redis_url
+        self.redis_sentinels = redis_sentinels
+        self.redis_cluster = redis_cluster
+        self.cache_ttl = cache_ttl
+
+        self.redis = None
+        if redis_url:
+            self.redis = get_redis_connection(
+                redis_url,
+                redis_sentinels,
+                redis_cluster=redis_cluster,
+                async_mode=True,
+                decode_responses=True,
+            )
+
+        self._data = {}
+        self._cache = {}
+        self._channel = f"{name}:invalidate"
+        self._origin = uuid.uuid4().hex
+        self._listener = None
+        # Reads are only cached once invalidations are received
+        self._caching = False
+
+    @staticmethod
+    def _dumps(value) -> str:
+        return json.dumps(value, separators=(",", ":"))
+
+    ####################
+    # Local cache
+    ####################
+
+    def _ensure_listener(self):
+        if self.redis is None or self.cache_ttl <= 0 or self._listener is not None:
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        delay = 1
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(self._channel)
+                # Invalidations published while unsubscribed were missed
+                self._cache.clear()
+                self._caching = True
+                delay = 1
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    origin, _, key = message["data"].partition(":")
+                    if origin != self._origin:
+                        self._cache.pop(key, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.debug(
+                    f"No cache invalidation for {self.name}, TTL only until resubscribed: {e}"
+                )
+                self._caching = True
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    def _get_cached(self, key):
+        entry = self._cache.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                return entry
+            del self._cache[key]
+        return None
+
+    def _set_cached(self, key, value):
+        if self._caching:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, value)
+
+    async def _invalidate(self, *keys):
+        for key in keys:
+            self._cache.pop(key, None)
+        if self.redis is None or self.cache_ttl <= 0:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.publish(self._channel, f"{self._origin}:{key}")
+            await pipe.execute()
+        except Exception as e:
+            log.debug(f"Failed to publish invalidations of {self.name}: {e}")
+
+    ####################
+    # Items
+    ####################
+
+    async def get(self, key, default=None):
+        if self.redis is None:
+            return self._data.get(key, default)
+
+        self._ensure_listener()
+        entry = self._get_cached(key)
+        if entry is not None:
+            value = entry[1]
+        else:
+            value = await self.redis.hget(self.name, key)
+            value = json.loads(value) if value is not None else None
+            self._set_cached(key, value)
+        return value if value is not None else default
+
+    async def get_many(self, keys) -> list:
+        """Values of `keys` (None where missing), in a single round trip."""
+        keys = list(keys)
+        if self.redis is None:
+            return [self._data.get(key) for key in keys]
+
+        self._ensure_listener()
+        values = {}
+        missing = []
+        for key in keys:
+            entry = self._get_cached(key)
+            if entry is not None:
+                values[key] = entry[1]
+            else:
+                missing.append(key)
+
+        if missing:
+            for key, value in zip(missing, await self.redis.hmget(self.name, missing)):
+                values[key] = json.loads(value) if value is not None else None
+                self._set_cached(key, values[key])
+        return [values[key] for key in keys]
+
+    async def contains(self, key) -> bool:
+        return await self.get(key) is not None
+
+    async def set(self, key, value):
+        if self.redis is None:
+            self._data[key] = value
+            return
+
+        await self.redis.hset(self.name, key, self._dumps(value))
+        await self._invalidate(key)
+        self._set_cached(key, value)
+
+    async def set_many(self, mapping: dict):
+        if not mapping:
+            return
+        if self.redis is None:
+            self._data.update(mapping)
+            return
+
+        await self.redis.hset(
+            self.name,
+            mapping={key: self._dumps(value) for key, value in mapping.items()},
+        )
+        await self._invalidate(*mapping.keys())
+        for key, value in mapping.items():
+            self._set_cached(key, value)
+
+    # Read-modify-write of a list value in one step, so that concurrent updates
+    # from other workers are not lost (and the local cache is not involved)
+    LIST_APPEND_SCRIPT = """
+    local value = redis.call('HGET', KEYS[1], ARGV[1])
+    local items = value and cjson.decode(value) or {}
+    table.insert(items, ARGV[2])
+    redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(items))
+    return #items
+    """
+
+    LIST_REMOVE_SCRIPT = """
+    local value = redis.call('HGET', KEYS[1], ARGV[1])
+    if not value then
+        return 0
+    end
+    local items = {}
+    for _, item in ipairs(cjson.decode(value)) do
+        if item ~= ARGV[2] then
+            table.insert(items, item)
+        end
+    end
+    if #items == 0 then
+        redis.call('HDEL', KEYS[1], ARGV[1])
+    else
+        redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(items))
+    end
+    return #items
+    """
+
+    async def append(self, key, item: str) -> int:
+        """Append `item` to the list stored at `key`, returns its new length."""
+        if self.redis is None:
+            self._data[key] = self._data.get(key, []) + [item]
+            return len(self._data[key])
+
+        length = await self.redis.eval(self.LIST_APPEND_SCRIPT, 1, self.name, key, item)
+        await self._invalidate(key)
+        return int(length)
+
+    async def remove(self, key, item: str) -> int:
+        """
+        Remove `item` from the list stored at `key`, deleting the key once the
+        list is empty. Returns the new length.
+        """
+        if self.redis is None:
+            items = [_item for _item in self._data.get(key, []) if _item != item]
+            if items:
+                self._data[key] = items
+            else:
+                self._data.pop(key, None)
+            return len(items)
+
+        length = await self.redis.eval(self.LIST_REMOVE_SCRIPT, 1, self.name, key, item)
+        await self._invalidate(key)
+        return int(length)
+
+    async def delete(self, *keys) -> int:
+        if not keys:
+            return 0
+        if self.redis is None:
+            return len([self._data.pop(key) for key in keys if key in self._data])
+
+        result = await self.redis.hdel(self.name, *keys)
+        await self._invalidate(*keys)
+        return result
+
+    ####################
+    # Whole pool, not cached
+    ####################
+
+    async def keys(self) -> list:
+        if self.redis is None:
+            return list(self._data.keys())
+        return list(await self.redis.hkeys(self.name))
+
+    async def items(self) -> list:
+        if self.redis is None:
+            return list(self._data.items())
+        return [
+            (key, json.loads(value))
+            for key, value in (await self.redis.hgetall(self.name)).items()
+        ]
+
+    async def length(self) -> int:
+        if self.redis is None:
+            return len(self._data)
+        return await self.redis.hlen(self.name)
+
+    def length_sync(self) -> int:
+        """Size of the pool for callers outside of the event loop."""
+        if self.redis is None:
+            return len(self._data)
+        return get_redis_connection(
+            self.redis_url,
+            self.redis_sentinels,
+            redis_cluster=self.redis_cluster,
+            decode_responses=True,
+        ).hlen(self.name)
+
+    async def clear(self):
+        if self.redis is None:
+            self._data.clear()
+            return
+        await self.redis.delete(self.name)
+        self._cache.clear()
+
+
+class MessageEventBuffer:
+    """
+    Write-behind buffer of the message events emitted while a response is
+    generated. Content deltas, files and sources are accumulated per message
+    and written with a single read-modify-write once `interval` seconds passed
+    since the first pending event, once `max_size` characters of content are
+    pending, or when the message is flushed explicitly (on completion). It
+    also debounces the realtime saves of streamed content.
+
+    A failed write keeps the pending events, ahead of the newer ones, for the
+    next flush. After `max_retries` failed writes in a row they are dropped.
+
+    Writes rewrite the whole chat in a thread, so they are serialized per
+    chat. Other writes of the chat must go through `write` to not overwrite,
+    or be overwritten by, a flush running concurrently.
+    """
+
+    def __init__(
+        self,
+        chats,
+        interval: float = 1.0,
+        max_size: int = 16384,
+        max_retries: int = 5,
+    ):
+        self.chats = chats
+        self.interval = interval
+        self.max_size = max_size
+        self.max_retries = max_retries
+
+        self._pending = {}
+        self._locks = {}
+        self._timers = {}
+
+    @staticmethod
+    def _new_entry() -> dict:
+        return {
+            "replace": None,
+            "content": [],
+            "size": 0,
+            "files": [],
+            "sources": [],
+            "failures": 0,
+        }
+
+    def _get_entry(self, key: Tuple[str, str]) -> dict:
+        if key not in self._pending:
+            self._pending[key] = self._new_entry()
+        return self._pending[key]
+
+    async def _updated(self, key: Tuple[str, str]):
+        entry = self._pending.get(key)
+        if entry is None:
+            return
+
+        if self.interval <= 0 or entry["size"] >= self.max_size:
+            await self.flush(*key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._flush_later(key))
+
+    async def _flush_later(self, key: Tuple[str, str]):
+        try:
+            await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            return
+        self._timers.pop(key, None)
+        await self.flush(*key)
+
+    ####################
+    # Events
+    ####################
+
+    async def append_content(self, chat_id: str, message_id: str, content: str):
+        if not content:
+            return
+        entry = self._get_entry((chat_id, message_id))
+        entry["content"].append(content)
+        entry["size"] += len(content)
+        await self._updated((chat_id, message_id))
+
+    async def replace_content(self, chat_id: str, message_id: str, content: str):
+        entry = self._get_entry((chat_id, message_id))
+        # The size is the growth of the content since the last write, so that
+        # repeatedly replacing a long message is not written on every call
+        if entry["replace"] is None:
+            entry["size"] = 0
+        else:
+            entry["size"] += max(0, len(content) - len(entry["replace"]))
+        entry["replace"] = content
+        entry["content"] = []
+        await self._updated((chat_id, message_id))
+
+    async def add_files(self, chat_id: str, message_id: str, files: list):
+        entry = self._get_entry((chat_id, message_id))
+        # Each event's files go in front of those already attached
+        entry["files"] = list(files) + entry["files"]
+        await self._updated((chat_id, message_id))
+
+    async def add_source(self, chat_id: str, message_id: str, source: dict):
+        entry = self._get_entry((chat_id, message_id))
+        entry["sources"].append(source)
+        await self._updated((chat_id, message_id))
+
+    ####################
+    # Flushing
+    ####################
+
+    def _write(self, chat_id: str, message_id: str, entry: dict):
+        message = self.chats.get_message_by_id_and_message_id(chat_id, message_id)
+        if message is None and entry["replace"] is None:
+            # Appending to a message which does not exist (anymore) is a no-op
+            entry = {**entry, "content": []}
+
+        update = {}
+        if entry["replace"] is not None or entry["content"]:
+            content = (
+                entry["replace"]
+                if entry["replace"] is not None
+                else (message or {}).get("content", "")
+            )
+            update["content"] = content + "".join(entry["content"])
+        if entry["files"]:
+            update["files"] = entry["files"] + (message or {}).get("files", [])
+        if entry["sources"]:
+            update["sources"] = (message or {}).get("sources", []) + entry["sources"]
+
+        if update:
+            self.chats.upsert_message_to_chat_by_id_and_message_id(
+                chat_id, message_id, update
+            )
+
+    def _restore(self, key: Tuple[str, str], entry: dict):
+        entry["failures"] += 1
+        newer = self._pending.get(key)
+        if newer is None:
+            self._pending[key] = entry
+            return
+
+        if newer["replace"] is None:
+            newer["replace"] = entry["replace"]
+            newer["content"] = entry["content"] + newer["content"]
+            newer["size"] += entry["size"]
+        newer["files"] = newer["files"] + entry["files"]
+        newer["sources"] = entry["sources"] + newer["sources"]
+        newer["failures"] = entry["failures"]
+
+    @asynccontextmanager
+    async def _lock(self, chat_id: str):
+        # The lock is dropped once no write of the chat is running or waiting
+        lock = self._locks.setdefault(chat_id, [asyncio.Lock(), 0])
+        lock[1] += 1
+        try:
+            async with lock[0]:
+                yield
+        finally:
+            lock[1] -= 1
+            if lock[1] == 0:
+                self._locks.pop(chat_id, None)
+
+    async def write(self, chat_id: str, func, *args):
+        """
+        Run a synchronous write of the chat, e.g.
+        Chats.upsert_message_to_chat_by_id_and_message_id, in a thread once
+        no other write of the chat is running.
+        """
+        async with self._lock(chat_id):
+            return await asyncio.to_thread(func, *args)
+
+    async def flush(self, chat_id: str, message_id: str):
+        """Write the pending events of the message, waiting for the write."""
+        key = (chat_id, message_id)
+        timer = self._timers.pop(key, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+
+        async with self._lock(chat_id):
+            entry = self._pending.pop(key, None)
+            if entry is None:
+                return
+            try:
+                await asyncio.to_thread(self._write, chat_id, message_id, entry)
+            except Exception as e:
+                if entry["failures"] + 1 >= self.max_retries:
+                    # Keeping them would retry, and grow, forever
+                    log.error(
+                        f"Dropping the events of message {message_id} "
+                        f"after {self.max_retries} failed writes: {e}"
+                    )
+                    return
+                log.error(f"Failed to write the events of message {message_id}: {e}")
+                self._restore(key, entry)
+                if self.interval > 0 and key not in self._timers:
+                    self._timers[key] = asyncio.create_task(self._flush_later(key))
+
+    async def flush_all(self):
+        await asyncio.gather(*[self.flush(*key) for key in list(self._pending.keys())])
+
+
 class YdocManager:
+    """
+    Storage of the Yjs updates of the collaborative documents.
+
+    Updates are kept as raw bytes in a log. Once the log holds
+    `compaction_threshold` updates, they are merged into a single snapshot,
+    so that joining a document only replays the snapshot and a short tail.
+    Yjs updates are idempotent, so an update which is both in the snapshot
+    and the log (e.g. during a compaction) is harmless.
+
+    With Redis, the updates are read and written through `redis_binary`, a
+    connection which does not decode responses; the users through `redis`.
+    """
+
     def __init__(
         self,
         redis=None,
         redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:ydoc:documents",
+        redis_binary=None,
+        compaction_threshold: int = YDOC_COMPACTION_THRESHOLD,
     ):
         self._updates = {}
         self._users = {}
+        self._user_documents = {}
         self._redis = redis
+        self._redis_binary = redis_binary
         self._redis_key_prefix = redis_key_prefix
+        self._compaction_threshold = compaction_threshold
+
+    def _get_keys(self, document_id: str) -> dict:
+        prefix = f"{self._redis_key_prefix}:{document_id}"
+        return {
+            "log": f"{prefix}:log",
+            "snapshot": f"{prefix}:snapshot",
+            "lock": f"{prefix}:compaction_lock",
+            # JSON encoded updates, as stored by earlier versions
+            "legacy": f"{prefix}:updates",
+        }
 
     async def append_to_updates(self, document_id: str, update: bytes):
         document_id = document_id.replace(":", "_")
+        update = bytes(update)
+
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.rpush(redis_key, json.dumps(list(update)))
+            log_key = self._get_keys(document_id)["log"]
+            length = await self._redis_binary.rpush(log_key, update)
+            if self._compaction_threshold > 0 and length >= self._compaction_threshold:
+                await self.compact(document_id)
         else:
             if document_id not in self._updates:
                 self._updates[document_id] = []
             self._updates[document_id].append(update)
+            if (
+                self._compaction_threshold > 0
+                and len(self._updates[document_id]) >= self._compaction_threshold
+            ):
+                await self.compact(document_id)
+
+    async def compact(self, document_id: str):
+        """Merge the snapshot and the logged updates into a new snapshot."""
+        document_id = document_id.replace(":", "_")
+
+        if not self._redis:
+            updates = self._updates.get(document_id, [])
+            if len(updates) > 1:
+                self._updates[document_id] = [Y.merge_updates(*updates)]
+            return
+
+        keys = self._get_keys(document_id)
+        # A single compaction per document at a time, others skip it
+        if not await self._redis.set(keys["lock"], "1", nx=True, ex=30):
+            return
+        try:
+            updates = await self._redis_binary.lrange(keys["log"], 0, -1)
+            snapshot = await self._redis_binary.get(keys["snapshot"])
+
+            legacy = await self._redis.lrange(keys["legacy"], 0, -1)
+            legacy = [bytes(json.loads(update)) for update in legacy]
+
+            merged = [snapshot] if snapshot else []
+            merged.extend(legacy + updates)
+            if len(merged) <= 1 and not legacy:
+                return
+
+            # The snapshot is written before the merged updates are removed
+            # from the log; appends in between stay at its tail
+            await self._redis_binary.set(keys["snapshot"], Y.merge_updates(*merged))
+            await self._redis_binary.ltrim(keys["log"], len(updates), -1)
+            if legacy:
+                await self._redis.delete(keys["legacy"])
+        except Exception as e:
+            log.error(f"Failed to compact the updates of document {document_id}: {e}")
+        finally:
+            await self._redis.delete(keys["lock"])
 
     async def get_updates(self, document_id: str) -> List[bytes]:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            updates = await self._redis.lrange(redis_key, 0, -1)
-            return [bytes(json.loads(update)) for update in updates]
+            keys = self._get_keys(document_id)
+            # The log is read before the snapshot, a compaction in between
+            # only moves updates into the snapshot read afterwards
+            updates = await self._redis_binary.lrange(keys["log"], 0, -1)
+            snapshot = await self._redis_binary.get(keys["snapshot"])
+            legacy = await self._redis.lrange(keys["legacy"], 0, -1)
+
+            return (
+                ([snapshot] if snapshot else [])
+                + [bytes(json.loads(update)) for update in legacy]
+                + list(updates)
+            )
         else:
             return self._updates.get(document_id, [])
 
@@ -143,8 +724,11 @@ class YdocManager:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            return await self._redis.exists(redis_key) > 0
+            keys = self._get_keys(document_id)
+            for key in ("log", "snapshot", "legacy"):
+                if await self._redis.exists(keys[key]) > 0:
+                    return True
+            return False
         else:
             return document_id in self._updates
 
@@ -158,41 +742,65 @@ class YdocManager:
         else:
             return self._users.get(document_id, [])
 
+    def _get_user_documents_key(self, user_id: str) -> str:
+        # Reverse index of the documents each user (session) has joined
+        return f"{self._redis_key_prefix}:user_documents:{user_id}"
+
     async def add_user(self, document_id: str, user_id: str):
         document_id = document_id.replace(":", "_")
 
         if self._redis:
             redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.sadd(redis_key, user_id)
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.sadd(redis_key, user_id)
+            pipe.sadd(self._get_user_documents_key(user_id), document_id)
+            await pipe.execute()
         else:
             if document_id not in self._users:
                 self._users[document_id] = set()
             self._users[document_id].add(user_id)
+            self._user_documents.setdefault(user_id, set()).add(document_id)
 
     async def remove_user(self, document_id: str, user_id: str):
         document_id = document_id.replace(":", "_")
 
         if self._redis:
             redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.srem(redis_key, user_id)
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.srem(redis_key, user_id)
+            pipe.srem(self._get_user_documents_key(user_id), document_id)
+            await pipe.execute()
         else:
             if document_id in self._users and user_id in self._users[document_id]:
                 self._users[document_id].remove(user_id)
+            if user_id in self._user_documents:
+                self._user_documents[user_id].discard(document_id)
+                if not self._user_documents[user_id]:
+                    del self._user_documents[user_id]
 
     async def remove_user_from_all_documents(self, user_id: str):
         if self._redis:
-            keys = await self._redis.keys(f"{self._redis_key_prefix}:*")
-            for key in keys:
-                if key.endswith(":users"):
-                    await self._redis.srem(key, user_id)
-
-                    document_id = key.split(":")[-2]
-                    if len(await self.get_users(document_id)) == 0:
-                        await self.clear_document(document_id)
+            user_documents_key = self._get_user_documents_key(user_id)
+            document_ids = list(await self._redis.smembers(user_documents_key))
+            if not document_ids:
+                return
+
+            # Leave all documents and count their remaining users at once
+            pipe = self._redis.pipeline(transaction=False)
+            for document_id in document_ids:
+                redis_key = f"{self._redis_key_prefix}:{document_id}:users"
+                pipe.srem(redis_key, user_id)
+                pipe.scard(redis_key)
+            pipe.delete(user_documents_key)
+            results = await pipe.execute()
+
+            for document_id, user_count in zip(document_ids, results[1::2]):
+                if user_count == 0:
+                    await self.clear_document(document_id)
 
         else:
-            for document_id in list(self._users.keys()):
-                if user_id in self._users[document_id]:
+            for document_id in self._user_documents.pop(user_id, set()):
+                if user_id in self._users.get(document_id, set()):
                     self._users[document_id].remove(user_id)
                     if not self._users[document_id]:
                         del self._users[document_id]
@@ -203,8 +811,9 @@ class YdocManager:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.delete(redis_key)
+            keys = self._get_keys(document_id)
+            for key in ("log", "snapshot", "legacy"):
+                await self._redis.delete(keys[key])
             redis_users_key = f"{self._redis_key_prefix}:{document_id}:users"
             await self._redis.delete(redis_users_key)
         else:
@@ -0,0 +1,199 @@
+import sqlite3
+
+from open_webui.retrieval.bm25 import BM25Index, tokenize
+
+
+def make_index(tmp_path):
+    return BM25Index(str(tmp_path / "bm25" / "index.db"))
+
+
+def items(*texts, **metadata):
+    return [
+        {"id": f"{i}", "text": text, "metadata": dict(metadata)}
+        for i, text in enumerate(texts)
+    ]
+
+
+def test_tokenize():
+    assert tokenize("Hello, World! hello") == ["hello", "world", "hello"]
+    assert tokenize("") == []
+
+
+def test_untracked_collection_is_not_indexed_on_add(tmp_path):
+    index = make_index(tmp_path)
+    index.add("c", items("apple"))
+    assert not index.has_collection("c")
+    assert index.search("c", "apple", 3) == []
+
+
+def test_search_ranks_by_bm25(tmp_path):
+    index = make_index(tmp_path)
+    index.create_collection(
+        "c", items("apple banana apple", "banana cherry", "cherry date")
+    )
+
+    assert index.count("c") == 3
+    results = index.search("c", "apple", 3)
+    assert [doc.page_content for doc in results] == ["apple banana apple"]
+
+    results = index.search("c", "Cherry banana", 2)
+    assert results[0].page_content == "banana cherry"
+
+
+def test_delete_by_filter_and_ids(tmp_path):
+    index = make_index(tmp_path)
+    index.create_collection("c", items("apple", "banana", file_id="a"))
+    index.add("c", [{"id": "x", "text": "cherry", "metadata": {"file_id": "b"}}])
+    assert index.count("c") == 3
+
+    index.delete("c", filter={"file_id": "a"})
+    assert index.count("c") == 1
+    assert index.search("c", "apple", 3) == []
+
+    index.delete("c", ids=["x"])
+    assert index.count("c") == 0
+    assert index.has_collection("c")
+
+    index.delete("c")
+    assert not index.has_collection("c")
+
+
+def test_add_replaces_existing_ids(tmp_path):
+    index = make_index(tmp_path)
+    index.create_collection("c", items("apple"))
+    index.add("c", items("banana"))
+
+    assert index.count("c") == 1
+    assert index.search("c", "apple", 3) == []
+    assert index.search("c", "banana", 3)[0].page_content == "banana"
+
+
+def test_ensure_collection_backfills_once(tmp_path):
+    class Result:
+        ids = [["1", "2"]]
+        documents = [["hello world", "goodbye"]]
+        metadatas = [[{"name": "a"}, {"name": "b"}]]
+
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return Result()
+
+    index = make_index(tmp_path)
+    assert index.ensure_collection("c", fetch)
+    assert index.ensure_collection("c", fetch)
+    assert len(calls) == 1
+
+    results = index.search("c", "world", 3)
+    assert results[0].metadata == {"name": "a"}
+
+
+def test_disabled_index_is_a_noop(tmp_path):
+    index = BM25Index(str(tmp_path / "index.db"), enabled=False)
+    index.create_collection("c", items("apple"))
+    assert not index.has_collection("c")
+    assert not (tmp_path / "index.db").exists()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def hincrby(self, name, key, amount=1):
+        values = self.hashes.setdefault(name, {})
+        values[key] = values.get(key, 0) + amount
+        return values[key]
+
+    def hmget(self, name, keys):
+        values = self.hashes.get(name, {})
+        return [values.get(key) for key in keys]
+
+
+def test_writes_of_other_nodes_trigger_a_rebuild(tmp_path):
+    redis = FakeRedis()
+    node_a = BM25Index(str(tmp_path / "a" / "index.db"), redis=redis)
+    node_b = BM25Index(str(tmp_path / "b" / "index.db"), redis=redis)
+
+    # The vector DB, as every node sees it
+    collection = {"1": "apple", "2": "banana"}
+
+    class Result:
+        def __init__(self):
+            self.ids = [list(collection)]
+            self.documents = [list(collection.values())]
+            self.metadatas = [[{} for _ in collection]]
+
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return Result()
+
+    assert node_a.ensure_collection("c", fetch)
+    assert node_b.ensure_collection("c", fetch)
+    assert len(calls) == 2
+
+    # A node's own writes keep its index current
+    collection["3"] = "cherry"
+    node_a.add("c", [{"id": "3", "text": "cherry", "metadata": {}}])
+    assert node_a.ensure_collection("c", fetch)
+    assert len(calls) == 2
+
+    # The other node rebuilds once, then sees the new chunk
+    assert node_b.ensure_collection("c", fetch)
+    assert node_b.ensure_collection("c", fetch)
+    assert len(calls) == 3
+    assert node_b.search("c", "cherry", 3)[0].page_content == "cherry"
+
+    del collection["1"]
+    node_b.delete("c", ids=["1"])
+    assert node_a.ensure_collection("c", fetch)
+    assert node_a.search("c", "apple", 3) == []
+
+
+def test_created_collection_is_current(tmp_path):
+    redis = FakeRedis()
+    # A reset before this node started must not drop what it creates
+    BM25Index(str(tmp_path / "a" / "index.db"), redis=redis).reset()
+
+    index = BM25Index(str(tmp_path / "b" / "index.db"), redis=redis)
+    index.create_collection("c", items("apple pie", "banana split"))
+
+    def fetch():
+        raise AssertionError("a created collection must not be refetched")
+
+    assert index.is_current("c")
+    assert index.ensure_collection("c", fetch)
+    assert index.search("c", "apple", 3)[0].page_content == "apple pie"
+
+    index.add("c", [{"id": "3", "text": "cherry", "metadata": {}}])
+    assert index.ensure_collection("c", fetch)
+
+
+def test_reset_on_another_node_drops_the_index(tmp_path):
+    redis = FakeRedis()
+    node_a = BM25Index(str(tmp_path / "a" / "index.db"), redis=redis)
+    node_b = BM25Index(str(tmp_path / "b" / "index.db"), redis=redis)
+    node_a.create_collection("c", items("apple"))
+    node_a.create_collection("d", items("banana"))
+
+    node_b.reset()
+    assert not node_a.is_current("c")
+    assert not node_a.has_collection("d")
+
+
+def test_index_without_versions_is_migrated(tmp_path):
+    path = tmp_path / "index.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE bm25_collection (name TEXT PRIMARY KEY, doc_count INTEGER NOT NULL DEFAULT 0, total_length INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.execute("INSERT INTO bm25_collection (name) VALUES ('c')")
+    conn.commit()
+    conn.close()
+
+    index = BM25Index(str(path), redis=FakeRedis())
+    assert index.has_collection("c")
+    # Unknown version, rebuilt on next search
+    assert not index.is_current("c")
@@ -0,0 +1,67 @@
+from open_webui.retrieval.embedding_cache import EmbeddingCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return EmbeddingCache(str(tmp_path / "embeddings" / "cache.db"), **kwargs)
+
+
+def test_key_depends_on_engine_model_and_prefix():
+    key = EmbeddingCache.make_key("openai", "m", None, "text")
+    assert key == EmbeddingCache.make_key("openai", "m", "", "text")
+    assert key != EmbeddingCache.make_key("ollama", "m", None, "text")
+    assert key != EmbeddingCache.make_key("openai", "n", None, "text")
+    assert key != EmbeddingCache.make_key("openai", "m", "passage: ", "text")
+    assert key != EmbeddingCache.make_key("openai", "m", None, "text", "http://a/v1")
+    assert EmbeddingCache.make_key(
+        "openai", "m", None, "text", "http://a/v1"
+    ) != EmbeddingCache.make_key("openai", "m", None, "text", "http://b/v1")
+
+
+def test_get_put_round_trip(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get_many("e", "m", None, ["a", "b"]) == [None, None]
+
+    cache.put_many("e", "m", None, ["a"], [[0.5, 1.0]])
+    assert cache.get_many("e", "m", None, ["a", "b"]) == [[0.5, 1.0], None]
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_disk_store_is_shared(tmp_path):
+    make_cache(tmp_path).put_many("e", "m", None, ["a"], [[0.25]])
+
+    cache = make_cache(tmp_path)
+    assert cache.get_many("e", "m", None, ["a"]) == [[0.25]]
+    assert cache.stats()["memory_hits"] == 0
+
+
+def test_memory_lru_holds_float32_arrays(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_many("e", "m", None, ["a"], [[0.1, 0.5]])
+    assert (
+        cache._memory_get(EmbeddingCache.make_key("e", "m", None, "a")).typecode == "f"
+    )
+
+    # Memory and disk hits return the same float32 values, as lists
+    vector = cache.get_many("e", "m", None, ["a"])[0]
+    assert isinstance(vector, list)
+    assert vector == make_cache(tmp_path).get_many("e", "m", None, ["a"])[0]
+    assert vector[1] == 0.5
+
+
+def test_memory_lru_is_bounded(tmp_path):
+    cache = make_cache(tmp_path, memory_size=2)
+    cache.put_many("e", "m", None, ["a", "b", "c"], [[1.0], [2.0], [3.0]])
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_size_based_eviction(tmp_path):
+    cache = make_cache(tmp_path, max_size_bytes=4 * 10)
+    for i in range(20):
+        cache.put_many("e", "m", None, [f"text {i}"], [[float(i)]])
+
+    assert cache.stats()["size_bytes"] <= 4 * 10
+    assert cache.stats()["evictions"] > 0
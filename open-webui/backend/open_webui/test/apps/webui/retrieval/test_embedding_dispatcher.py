@@ -0,0 +1,157 @@
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from open_webui.retrieval.embedding_dispatcher import (
+    EmbeddingDispatcher,
+    EmbeddingRequestError,
+    get_retry_delay,
+)
+
+TEXTS = [f"t{i}" for i in range(20)]
+
+
+def embedding(text):
+    return [float(text[1:])]
+
+
+class EmbeddingServer:
+    """
+    OpenAI compatible embeddings endpoint, on a loop of its own so that the
+    dispatcher can be called blocking. The first path segment picks the
+    behavior: ok, retry (429 once, retry after 0.2s), split (413 above 2 texts) or fail (503).
+    """
+
+    def __init__(self):
+        self.requests = Counter()
+        self.batch_sizes = []
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self.server = asyncio.run_coroutine_threadsafe(self.start(), self.loop).result()
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/{mode}/embeddings", self.handler)
+        server = TestServer(app)
+        await server.start_server()
+        return server
+
+    async def handler(self, request):
+        mode = request.match_info["mode"]
+        texts = (await request.json())["input"]
+        self.requests[mode] += 1
+        self.batch_sizes.append(len(texts))
+
+        if mode == "retry" and self.requests[mode] == 1:
+            return web.json_response(
+                {"error": "rate limited"}, status=429, headers={"Retry-After": "0.2"}
+            )
+        if mode == "split" and len(texts) > 2:
+            return web.json_response({"error": "too large"}, status=413)
+        if mode == "fail":
+            return web.json_response(
+                {"error": "unavailable"}, status=503, headers={"Retry-After": "0"}
+            )
+
+        # Finish out of order, and return the items unordered but indexed
+        await asyncio.sleep(random.random() / 50)
+        data = [
+            {"index": idx, "embedding": embedding(text)}
+            for idx, text in enumerate(texts)
+        ]
+        random.shuffle(data)
+        return web.json_response({"data": data})
+
+    def url(self, mode):
+        return str(self.server.make_url(f"/{mode}"))
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@pytest.fixture
+def server():
+    server = EmbeddingServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def make_dispatcher():
+    dispatchers = []
+
+    def make_dispatcher(**kwargs):
+        dispatchers.append(EmbeddingDispatcher(**kwargs))
+        return dispatchers[-1]
+
+    yield make_dispatcher
+    for dispatcher in dispatchers:
+        if dispatcher._session is not None:
+            asyncio.run_coroutine_threadsafe(
+                dispatcher._session.close(), dispatcher._loop
+            ).result()
+        dispatcher._loop.call_soon_threadsafe(dispatcher._loop.stop)
+
+
+def embed(dispatcher, server, mode, texts=TEXTS, batch_size=3):
+    return dispatcher.embed("openai", "m", texts, batch_size, server.url(mode))
+
+
+def test_results_keep_order_across_concurrent_batches(server, make_dispatcher):
+    dispatcher = make_dispatcher(max_concurrency=4)
+
+    assert embed(dispatcher, server, "ok") == [embedding(text) for text in TEXTS]
+    assert server.requests["ok"] == 7
+    # A single text returns a single embedding
+    assert dispatcher.embed("openai", "m", "t5", 3, server.url("ok")) == [5.0]
+
+
+def test_retry_after_is_honoured(server, make_dispatcher):
+    dispatcher = make_dispatcher(max_concurrency=1, max_retries=2)
+
+    started = time.monotonic()
+    assert embed(dispatcher, server, "retry", TEXTS[:3]) == [
+        embedding(text) for text in TEXTS[:3]
+    ]
+    # The backoff of a first retry without Retry-After is at least 0.5s
+    assert 0.2 <= time.monotonic() - started < 0.5
+    assert server.requests["retry"] == 2
+
+
+def test_retry_delay():
+    assert get_retry_delay("3", 0) == 3.0
+    assert get_retry_delay("3600", 0) == 60
+    assert get_retry_delay("Wed, 21 Oct 2015 07:28:00 GMT", 0) == 0
+    assert 2 <= get_retry_delay(None, 2) <= 4
+    assert 2 <= get_retry_delay("soon", 2) <= 4
+
+
+def test_rejected_batch_is_split_and_limit_remembered(server, make_dispatcher):
+    dispatcher = make_dispatcher(max_concurrency=1)
+
+    assert embed(dispatcher, server, "split", TEXTS[:8], batch_size=8) == [
+        embedding(text) for text in TEXTS[:8]
+    ]
+    # 8 -> 4 + 4 -> 2 + 2 + 2 + 2
+    assert server.batch_sizes == [8, 4, 2, 2, 4, 2, 2]
+    assert dispatcher._batch_size_limits[("openai", server.url("split"), "m")] == 2
+
+    server.batch_sizes.clear()
+    embed(dispatcher, server, "split", TEXTS[:4], batch_size=8)
+    assert server.batch_sizes == [2, 2]
+
+
+def test_error_once_retries_run_out(server, make_dispatcher):
+    dispatcher = make_dispatcher(max_concurrency=1, max_retries=2)
+
+    with pytest.raises(EmbeddingRequestError) as e:
+        embed(dispatcher, server, "fail", TEXTS[:2])
+    assert e.value.status == 503
+    assert server.requests["fail"] == 3
@@ -0,0 +1,66 @@
+import numpy as np
+
+from open_webui.retrieval.vector.dbs.numpy_vector import NumpyCollection
+
+
+def make_items(vectors, prefix="doc"):
+    return [
+        {
+            "id": f"{prefix}-{i}",
+            "text": f"text {i}",
+            "vector": vector,
+            "metadata": {"file_id": f"file-{i % 2}"},
+        }
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def test_search_matches_exact_cosine(tmp_path):
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(50, 16)).astype(np.float32)
+    collection = NumpyCollection(str(tmp_path / "c"), dtype="float16")
+    collection.add(make_items(vectors.tolist()))
+
+    query = vectors[7] + 0.01
+    [matches] = collection.search(np.asarray([query]), limit=3)
+    assert [match[0] for match in matches][0] == "doc-7"
+    assert matches[0][3] > 0.99
+
+    exact = vectors @ query / np.linalg.norm(vectors, axis=1) / np.linalg.norm(query)
+    assert [match[0] for match in matches] == [
+        f"doc-{i}" for i in np.argsort(-exact)[:3]
+    ]
+
+
+def test_delete_upsert_and_reopen(tmp_path):
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(10, 8)).astype(np.float32)
+    path = str(tmp_path / "c")
+    collection = NumpyCollection(path, dtype="int8")
+    collection.add(make_items(vectors.tolist()))
+
+    collection.remove(collection.filter_rows({"file_id": "file-0"}))
+    collection.add(make_items([vectors[1].tolist()], prefix="new"), replace=True)
+    collection.close()
+
+    reopened = NumpyCollection(path, dtype="int8")
+    [matches] = reopened.search(np.asarray([vectors[0]]), limit=20)
+    ids = {match[0] for match in matches}
+    assert len(ids) == 6
+    assert "doc-0" not in ids and "new-0" in ids
+
+
+def test_update_metadata_keeps_vectors(tmp_path):
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(4, 8)).astype(np.float32)
+    collection = NumpyCollection(str(tmp_path / "c"))
+    collection.add(make_items(vectors.tolist()))
+
+    collection.update_metadata(
+        ["doc-0", "doc-2"], [{"file_id": "file-0", "hash": "new"}] * 2
+    )
+
+    assert collection.filter_rows({"hash": "new"}) == [0, 2]
+    [matches] = collection.search(np.asarray([vectors[2]]), limit=1)
+    assert matches[0][0] == "doc-2"
+    assert matches[0][2] == {"file_id": "file-0", "hash": "new"}
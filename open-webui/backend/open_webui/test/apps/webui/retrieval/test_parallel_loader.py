@@ -0,0 +1,68 @@
+import pytest
+from fpdf import FPDF
+from langchain_community.document_loaders import PyPDFLoader
+
+from open_webui.retrieval.loaders import parallel
+from open_webui.retrieval.loaders.parallel import (
+    clean_documents,
+    extract_pdf_pages,
+    get_page_count,
+    lazy_load_parallel,
+    reset_extraction_pool,
+)
+
+
+@pytest.fixture(scope="module")
+def pdf_path(tmp_path_factory):
+    pdf = FPDF()
+    pdf.set_font("helvetica", size=12)
+    for page in range(5):
+        pdf.add_page()
+        pdf.multi_cell(0, 10, f"Page {page + 1}\nSome text on page {page + 1}.")
+    path = tmp_path_factory.mktemp("pdf") / "sample.pdf"
+    pdf.output(str(path))
+    return str(path)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def extraction_pool():
+    yield
+    reset_extraction_pool()
+
+
+def assert_same_documents(actual, expected):
+    assert [doc.page_content for doc in actual] == [
+        doc.page_content for doc in expected
+    ]
+    assert [doc.metadata for doc in actual] == [doc.metadata for doc in expected]
+
+
+def test_get_page_count(pdf_path):
+    assert get_page_count("pdf", pdf_path) == 5
+
+
+@pytest.mark.parametrize("pages_per_task", [1, 2])
+def test_lazy_load_parallel_matches_pypdf_loader(pdf_path, pages_per_task):
+    expected = clean_documents(PyPDFLoader(pdf_path).load())
+
+    docs = list(
+        lazy_load_parallel(
+            "pdf", pdf_path, 5, pages_per_task=pages_per_task, max_workers=2
+        )
+    )
+
+    assert len(docs) == 5
+    assert "Page 1" in docs[0].page_content
+    assert "Page 5" in docs[4].page_content
+    assert_same_documents(docs, expected)
+
+
+def test_extract_pdf_pages_falls_back_to_pypdf_loader(pdf_path, monkeypatch):
+    def unavailable(*args):
+        raise ImportError("cannot import name '_purge_metadata'")
+
+    monkeypatch.setattr(parallel, "_extract_pdf_pages", unavailable)
+
+    docs = extract_pdf_pages(pdf_path, 1, 3)
+
+    assert_same_documents(docs, clean_documents(PyPDFLoader(pdf_path).load()[1:3]))
@@ -0,0 +1,75 @@
+import asyncio
+
+from open_webui.retrieval.query_cache import QueryResultCache, VersionedVectorDBClient
+
+
+class FakeVectorDBClient:
+    def __init__(self):
+        self.updates = []
+
+    def insert(self, collection_name, items):
+        pass
+
+    def update_metadata(self, collection_name, ids, metadatas):
+        self.updates.append((collection_name, ids, metadatas))
+
+    def delete(self, collection_name, ids=None, filter=None):
+        pass
+
+    async def ainsert(self, collection_name, items):
+        pass
+
+
+def test_write_invalidates_only_that_collection():
+    cache = QueryResultCache(enabled=True)
+    client = VersionedVectorDBClient(FakeVectorDBClient(), cache)
+
+    key_a = cache.make_key(["a"], k=5)
+    key_b = cache.make_key(["b"], k=5)
+    cache.put(key_a, {"documents": [["x"]]})
+    cache.put(key_b, {"documents": [["y"]]})
+    assert cache.get(cache.make_key(["a"], k=5)) == {"documents": [["x"]]}
+
+    client.insert("a", [])
+    assert cache.get(cache.make_key(["a"], k=5)) is None
+    assert cache.get(cache.make_key(["b"], k=5)) == {"documents": [["y"]]}
+
+    client.delete("b", ids=["1"])
+    assert cache.get(cache.make_key(["b"], k=5)) is None
+
+
+def test_async_write_invalidates_the_collection():
+    cache = QueryResultCache(enabled=True)
+    client = VersionedVectorDBClient(FakeVectorDBClient(), cache)
+
+    cache.put(cache.make_key(["a"], k=5), {"documents": [["x"]]})
+    asyncio.run(client.ainsert("a", []))
+    assert cache.get(cache.make_key(["a"], k=5)) is None
+
+
+def test_update_metadata_is_forwarded_and_invalidates():
+    cache = QueryResultCache(enabled=True)
+    inner = FakeVectorDBClient()
+    client = VersionedVectorDBClient(inner, cache)
+
+    cache.put(cache.make_key(["a"], k=5), {"documents": [["x"]]})
+    client.update_metadata("a", ["1"], [{"hash": "new"}])
+
+    assert inner.updates == [("a", ["1"], [{"hash": "new"}])]
+    assert cache.get(cache.make_key(["a"], k=5)) is None
+
+
+def test_params_are_part_of_the_key_and_reset_clears_all():
+    cache = QueryResultCache(enabled=True)
+    cache.put(cache.make_key(["a"], k=5), {"documents": []})
+    assert cache.get(cache.make_key(["a"], k=10)) is None
+
+    cache.bump_all()
+    assert cache.get(cache.make_key(["a"], k=5)) is None
+
+
+def test_disabled_cache_never_stores():
+    cache = QueryResultCache(enabled=False)
+    key = cache.make_key(["a"], k=5)
+    cache.put(key, {"documents": []})
+    assert cache.get(key) is None
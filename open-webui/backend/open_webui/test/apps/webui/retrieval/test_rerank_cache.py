@@ -0,0 +1,29 @@
+from open_webui.retrieval.rerank_cache import RERANK_CACHE, with_rerank_cache
+
+
+def test_pairs_are_deduplicated_cached_and_batched():
+    RERANK_CACHE.clear()
+    calls = []
+
+    def reranking_function(sentences, user=None):
+        calls.append(list(sentences))
+        return [float(len(document)) for _, document in sentences]
+
+    rerank = with_rerank_cache(reranking_function, "", "model", batch_size=2)
+
+    scores = rerank([("q", "aa"), ("q", "b"), ("q", "aa"), ("q", "cccc")])
+    assert scores == [2.0, 1.0, 2.0, 4.0]
+    assert [len(batch) for batch in calls] == [2, 1]
+
+    calls.clear()
+    assert rerank([("q", "b"), ("other", "b")]) == [1.0, 1.0]
+    assert calls == [[("other", "b")]]
+
+
+def test_cache_is_keyed_by_model():
+    RERANK_CACHE.clear()
+    a = with_rerank_cache(lambda sentences, user=None: [1.0], "", "a")
+    b = with_rerank_cache(lambda sentences, user=None: [2.0], "", "b")
+
+    assert a([("q", "d")]) == [1.0]
+    assert b([("q", "d")]) == [2.0]
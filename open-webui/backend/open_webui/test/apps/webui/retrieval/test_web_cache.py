@@ -0,0 +1,71 @@
+import sqlite3
+
+from langchain_core.documents import Document
+
+from open_webui.retrieval.web.cache import WebPageCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return WebPageCache(str(tmp_path / "web" / "cache.db"), **kwargs)
+
+
+def pages(*urls, content="x" * 100):
+    return {
+        url: [Document(page_content=content, metadata={"source": url})] for url in urls
+    }
+
+
+def scanned_size(cache):
+    return (
+        sqlite3.connect(cache.path)
+        .execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM web_page_cache")
+        .fetchone()
+    )
+
+
+def test_get_put_round_trip(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_many("e", pages("http://a"), validators={"http://a": {"etag": '"1"'}})
+
+    entries = cache.get_many("e", ["http://a", "http://b"])
+    assert list(entries) == ["http://a"]
+    assert entries["http://a"]["documents"][0].page_content == "x" * 100
+    assert entries["http://a"]["etag"] == '"1"'
+    assert cache.is_fresh(entries["http://a"])
+    assert cache.get_many("other", ["http://a"]) == {}
+
+
+def test_size_is_tracked_incrementally(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_many("e", pages("http://a", "http://b"))
+    # Overwriting an entry replaces its size
+    cache.put_many("e", pages("http://a", content="y" * 500))
+    stats = cache.stats()
+    assert (stats["size_bytes"], stats["entries"]) == scanned_size(cache)
+
+    cache.clear()
+    stats = cache.stats()
+    assert (stats["size_bytes"], stats["entries"]) == (0, 0)
+
+
+def test_existing_cache_file_is_sized_on_open(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_many("e", pages("http://a", "http://b"))
+    conn = sqlite3.connect(cache.path)
+    conn.execute("DROP TABLE web_page_cache_size")
+    conn.commit()
+
+    stats = make_cache(tmp_path).stats()
+    assert (stats["size_bytes"], stats["entries"]) == scanned_size(cache)
+
+
+def test_size_based_eviction(tmp_path):
+    cache = make_cache(tmp_path, max_size_bytes=1000)
+    for i in range(20):
+        cache.put_many("e", pages(f"http://{i}"))
+
+    stats = cache.stats()
+    assert 0 < stats["size_bytes"] <= 1000
+    assert (stats["size_bytes"], stats["entries"]) == scanned_size(cache)
+    # The newest pages are kept
+    assert "http://19" in cache.get_many("e", ["http://19"])
@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+import pytest
+
+from open_webui.socket.utils import MessageEventBuffer
+
+
+class FakeChats:
+    def __init__(self, message=None, failures=0):
+        self.message = message
+        self.failures = failures
+        self.writes = []
+
+    def get_message_by_id_and_message_id(self, chat_id, message_id):
+        return dict(self.message) if self.message is not None else None
+
+    def upsert_message_to_chat_by_id_and_message_id(self, chat_id, message_id, update):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database is locked")
+        self.message = {**(self.message or {}), **update}
+        self.writes.append(update)
+
+
+@pytest.mark.asyncio
+async def test_flush_after_interval():
+    chats = FakeChats({"content": "Hello"})
+    buffer = MessageEventBuffer(chats, interval=0.05)
+
+    await buffer.append_content("c", "m", ", ")
+    await buffer.append_content("c", "m", "world")
+    assert chats.writes == []
+
+    await asyncio.sleep(0.2)
+    assert chats.writes == [{"content": "Hello, world"}]
+
+
+@pytest.mark.asyncio
+async def test_flush_once_max_size_is_pending():
+    chats = FakeChats({"content": ""})
+    buffer = MessageEventBuffer(chats, interval=60, max_size=6)
+
+    await buffer.append_content("c", "m", "abc")
+    assert chats.writes == []
+
+    await buffer.append_content("c", "m", "def")
+    assert chats.writes == [{"content": "abcdef"}]
+    assert ("c", "m") not in buffer._pending
+    assert ("c", "m") not in buffer._timers
+
+
+@pytest.mark.asyncio
+async def test_explicit_flush():
+    chats = FakeChats({"content": "", "files": [{"id": "a"}], "sources": [1]})
+    buffer = MessageEventBuffer(chats, interval=60)
+
+    await buffer.append_content("c", "m", "text")
+    await buffer.add_files("c", "m", [{"id": "b"}])
+    await buffer.add_files("c", "m", [{"id": "c"}])
+    await buffer.add_source("c", "m", 2)
+    await buffer.flush("c", "m")
+
+    assert chats.message == {
+        "content": "text",
+        "files": [{"id": "c"}, {"id": "b"}, {"id": "a"}],
+        "sources": [1, 2],
+    }
+    assert buffer._pending == {}
+    assert buffer._timers == {}
+    assert buffer._locks == {}
+
+
+def test_restore_keeps_failed_events_ahead_of_newer_ones():
+    buffer = MessageEventBuffer(FakeChats(), interval=60)
+    failed = buffer._new_entry()
+    failed.update(content=["a"], size=1, files=["f1"], sources=["s1"])
+    newer = buffer._get_entry(("c", "m"))
+    newer.update(content=["b"], size=1, files=["f2"], sources=["s2"])
+
+    buffer._restore(("c", "m"), failed)
+
+    entry = buffer._pending[("c", "m")]
+    assert entry["replace"] is None
+    assert entry["content"] == ["a", "b"]
+    assert entry["size"] == 2
+    # Newer files go in front, newer sources after
+    assert entry["files"] == ["f2", "f1"]
+    assert entry["sources"] == ["s1", "s2"]
+    assert entry["failures"] == 1
+
+
+def test_restore_keeps_replace_of_failed_events():
+    buffer = MessageEventBuffer(FakeChats(), interval=60)
+    failed = buffer._new_entry()
+    failed.update(replace="old", content=["a"], size=1)
+    buffer._get_entry(("c", "m"))["content"] = ["b"]
+
+    buffer._restore(("c", "m"), failed)
+
+    entry = buffer._pending[("c", "m")]
+    assert entry["replace"] == "old"
+    assert entry["content"] == ["a", "b"]
+
+
+def test_restore_drops_failed_content_replaced_since():
+    buffer = MessageEventBuffer(FakeChats(), interval=60)
+    failed = buffer._new_entry()
+    failed.update(replace="old", content=["a"], size=1, sources=["s1"])
+    newer = buffer._get_entry(("c", "m"))
+    newer.update(replace="new", sources=["s2"])
+
+    buffer._restore(("c", "m"), failed)
+
+    entry = buffer._pending[("c", "m")]
+    assert entry["replace"] == "new"
+    assert entry["content"] == []
+    assert entry["sources"] == ["s1", "s2"]
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_retried():
+    chats = FakeChats({"content": ""}, failures=1)
+    buffer = MessageEventBuffer(chats, interval=60)
+
+    await buffer.append_content("c", "m", "a")
+    await buffer.flush("c", "m")
+    assert chats.writes == []
+    await buffer.append_content("c", "m", "b")
+    await buffer.flush("c", "m")
+
+    assert chats.writes == [{"content": "ab"}]
+    assert buffer._timers == {}
+
+
+@pytest.mark.asyncio
+async def test_events_are_dropped_after_max_retries():
+    chats = FakeChats({"content": ""}, failures=10)
+    buffer = MessageEventBuffer(chats, interval=60, max_retries=3)
+
+    await buffer.append_content("c", "m", "a")
+    for _ in range(2):
+        await buffer.flush("c", "m")
+        assert buffer._pending[("c", "m")]["content"] == ["a"]
+
+    await buffer.flush("c", "m")
+    assert ("c", "m") not in buffer._pending
+    assert chats.writes == []
+
+
+@pytest.mark.asyncio
+async def test_writes_of_a_chat_are_serialized():
+    running, overlaps = [], []
+
+    def slow_write(*args):
+        overlaps.append(bool(running))
+        running.append(args)
+        time.sleep(0.05)
+        running.pop()
+
+    chats = FakeChats({"content": ""})
+    chats.upsert_message_to_chat_by_id_and_message_id = slow_write
+    buffer = MessageEventBuffer(chats, interval=60)
+
+    await buffer.append_content("c", "m1", "a")
+    await buffer.append_content("c", "m2", "b")
+    await asyncio.gather(
+        buffer.flush("c", "m1"),
+        buffer.flush("c", "m2"),
+        buffer.write("c", slow_write, "c", "m1", {"status": "done"}),
+    )
+
+    assert overlaps == [False, False, False]
+    assert buffer._locks == {}
+
+
+@pytest.mark.asyncio
+async def test_write_returns_the_result():
+    buffer = MessageEventBuffer(FakeChats(), interval=60)
+    assert await buffer.write("c", lambda a, b: a + b, 1, 2) == 3
@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils import access_control
+from open_webui.utils.access_control import (
+    AccessIndex,
+    get_permissions,
+    has_access,
+    invalidate_principals,
+    principal_cache,
+)
+
+GROUPS = {
+    "alice": [SimpleNamespace(id="g1", permissions={"chat": {"share": True}})],
+    "bob": [
+        SimpleNamespace(id="g1", permissions={}),
+        SimpleNamespace(id="g2", permissions={}),
+    ],
+    "carol": [],
+}
+
+ITEMS = [
+    # (id, owner, access_control)
+    ("public", "carol", None),
+    ("private", "carol", {}),
+    ("owned", "alice", {"read": {"user_ids": [], "group_ids": []}}),
+    ("user", "carol", {"read": {"user_ids": ["bob"], "group_ids": []}}),
+    ("group", "carol", {"read": {"user_ids": [], "group_ids": ["g1"]}}),
+    ("other_group", "carol", {"read": {"group_ids": ["g2"]}}),
+    (
+        "write",
+        "carol",
+        {
+            "read": {"user_ids": [], "group_ids": []},
+            "write": {"user_ids": ["alice"], "group_ids": ["g2"]},
+        },
+    ),
+]
+
+
+class FakeGroups:
+    def __init__(self):
+        self.calls = []
+
+    def get_groups_by_member_id(self, user_id):
+        self.calls.append(user_id)
+        return GROUPS.get(user_id, [])
+
+
+@pytest.fixture
+def groups(monkeypatch):
+    groups = FakeGroups()
+    monkeypatch.setattr(access_control, "Groups", groups)
+    return groups
+
+
+@pytest.mark.parametrize("type", ["read", "write"])
+@pytest.mark.parametrize("user_id", ["alice", "bob", "carol", "dave"])
+def test_access_index_matches_has_access(groups, user_id, type):
+    index = AccessIndex(type)
+    for id, owner_id, access_control in ITEMS:
+        index.add(id, access_control, owner_id)
+
+    expected = {
+        id
+        for id, owner_id, access_control in ITEMS
+        if owner_id == user_id or has_access(user_id, type, access_control)
+    }
+    assert index.get_accessible_ids(user_id) == expected
+
+
+def test_access_index_examples(groups):
+    read = AccessIndex("read")
+    write = AccessIndex("write")
+    for id, owner_id, access_control in ITEMS:
+        read.add(id, access_control, owner_id)
+        write.add(id, access_control, owner_id)
+
+    assert read.get_accessible_ids("dave") == {"public"}
+    assert read.get_accessible_ids("bob") == {"public", "user", "group", "other_group"}
+    # Resources without access control are not writable by everyone
+    assert write.get_accessible_ids("dave") == set()
+    assert write.get_accessible_ids("alice") == {"owned", "write"}
+    assert write.get_accessible_ids("bob") == {"write"}
+
+
+def test_principals_memoized_once_per_scope(groups):
+    with principal_cache():
+        for _ in range(3):
+            has_access("alice", "read", {"read": {"group_ids": ["g1"]}})
+            get_permissions("alice", {"chat": {"share": False}})
+        has_access("bob", "read", {})
+    assert groups.calls == ["alice", "bob"]
+
+    with principal_cache():
+        has_access("alice", "read", {})
+    assert groups.calls == ["alice", "bob", "alice"]
+
+
+def test_principals_not_memoized_outside_scope(groups):
+    has_access("alice", "read", {})
+    has_access("alice", "read", {})
+    assert groups.calls == ["alice", "alice"]
+
+
+def test_invalidate_principals_reloads_groups(groups):
+    with principal_cache():
+        has_access("alice", "read", {})
+        invalidate_principals()
+        has_access("alice", "read", {})
+        has_access("alice", "read", {})
+    assert groups.calls == ["alice", "alice"]
@@ -0,0 +1,68 @@
+from open_webui.utils.content_blocks import (
+    IncrementalContentSerializer,
+    serialize_content_blocks,
+)
+
+
+def test_incremental_matches_full_serialization():
+    serializer = IncrementalContentSerializer()
+    blocks = []
+    rendered = []
+
+    def check():
+        content = serializer.serialize(blocks)
+        assert content == serialize_content_blocks(blocks)
+        rendered.append(content)
+
+    check()
+
+    # Text growth, including whitespace only deltas
+    blocks.append({"type": "text", "content": ""})
+    for delta in ["  ", "Hello", " wor", "ld", "  \n", "!"]:
+        blocks[-1]["content"] += delta
+        check()
+
+    # A reasoning tag is streamed in and cut off the text
+    blocks[-1]["content"] += " <thi"
+    check()
+    blocks[-1]["content"] = "Hello world!"
+    blocks.append({"type": "reasoning", "start_tag": "<think>", "content": ""})
+    check()
+    for delta in ["Let me", " think\n", "> about it"]:
+        blocks[-1]["content"] += delta
+        check()
+
+    # The reasoning is done, its duration is set
+    blocks[-1]["end_tag"] = "</think>"
+    blocks[-1]["duration"] = 3
+    check()
+    blocks.append({"type": "text", "content": "Let me run it\n```"})
+    check()
+
+    # A code interpreter block, its output replaced once executed
+    blocks.append(
+        {
+            "type": "code_interpreter",
+            "attributes": {"lang": "python"},
+            "content": "print(1)",
+        }
+    )
+    check()
+    blocks.append({"type": "text", "content": ""})
+    check()
+    blocks[-2]["output"] = {"stdout": "1"}
+    check()
+    blocks[-2]["output"] = {"stdout": "2"}
+    check()
+    blocks[-2]["attributes"] = {"lang": "py"}
+    check()
+    blocks[-1]["content"] = "Done"
+    check()
+
+    # An in place edit of a previous block that keeps its length
+    blocks[0]["content"] = "Hello World!"
+    check()
+
+    assert "Hello World!" in rendered[-1]
+    assert "```py\nprint(1)" in rendered[-1]
+    assert "Thought for 3 seconds" in rendered[-1]
@@ -0,0 +1,61 @@
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from open_webui.utils.http_client import HTTPClientPool, release_response
+
+
+@pytest_asyncio.fixture
+async def server():
+    async def handler(request):
+        response = web.json_response({"cookie": request.headers.get("Cookie")})
+        response.set_cookie("session", "user-a")
+        return response
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused_and_released(server):
+    pool = HTTPClientPool()
+    url = str(server.make_url("/"))
+    try:
+        session = pool.get_session(url)
+        for _ in range(3):
+            response = await session.get(url)
+            assert response.status == 200
+            await response.read()
+            await release_response(response)
+
+        assert pool.get_session(url) is session
+        stats = pool.stats()["upstreams"][pool.get_origin(url)]
+        assert stats["requests"] == 3
+        assert stats["connections_created"] == 1
+        assert stats["connections_reused"] == 2
+        assert stats["in_flight"] == 0
+        assert stats["in_use"] == 0
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_upstream_cookies_are_not_shared(server):
+    pool = HTTPClientPool()
+    url = str(server.make_url("/"))
+    try:
+        session = pool.get_session(url)
+        assert isinstance(session.cookie_jar, aiohttp.DummyCookieJar)
+        for _ in range(2):
+            response = await session.get(url)
+            assert (await response.json())["cookie"] is None
+            await release_response(response)
+        assert len(session.cookie_jar) == 0
+    finally:
+        await pool.close()
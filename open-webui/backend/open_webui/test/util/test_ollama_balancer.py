@@ -0,0 +1,175 @@
+import time
+
+import pytest
+
+from open_webui.utils.ollama_balancer import OllamaBalancer, TrackedStream
+
+BACKENDS = [(0, "http://a", None), (1, "http://b", None)]
+
+
+def make_balancer():
+    # No running loop in the sync tests, so /api/ps is never fetched
+    return OllamaBalancer(
+        failure_threshold=2, cooldown=10.0, loaded_models_refresh_interval=3600
+    )
+
+
+def end_cooldown(balancer, url):
+    balancer.get_node(url).open_until = time.monotonic() - 1
+
+
+def test_score_is_expected_wait():
+    balancer = make_balancer()
+    a, b = balancer.get_node("http://a"), balancer.get_node("http://b")
+    a.ttft, b.ttft = 1.0, 2.0
+    assert balancer.select(BACKENDS, None) == 0
+
+    # Two requests queued on the faster backend make it the slower one
+    a.in_flight = 2
+    assert balancer.get_score(a, None, 1.0) == 3.0
+    assert balancer.select(BACKENDS, None) == 1
+
+
+def test_score_penalizes_unloaded_model_and_errors():
+    balancer = make_balancer()
+    a, b = balancer.get_node("http://a"), balancer.get_node("http://b")
+    a.ttft = b.ttft = 1.0
+    a.loaded_models = {"other"}
+    b.loaded_models = {"llama3"}
+
+    assert (
+        balancer.get_score(a, "llama3", 1.0) == OllamaBalancer.MODEL_NOT_LOADED_PENALTY
+    )
+    assert balancer.select(BACKENDS, "llama3") == 1
+    # Unknown loaded models are not penalized
+    a.loaded_models = None
+    assert balancer.get_score(a, "llama3", 1.0) == 1.0
+
+    b.error_rate = 0.5
+    assert balancer.get_score(b, "llama3", 1.0) == 2.0
+
+
+def test_backend_without_samples_scores_as_average():
+    balancer = make_balancer()
+    balancer.get_node("http://a").ttft = 3.0
+    node = balancer.get_node("http://b")
+    assert balancer.get_score(node, None, 3.0) == 3.0
+
+
+def test_circuit_breaker_probe_closes():
+    balancer = make_balancer()
+    node = balancer.get_node("http://a")
+    for _ in range(2):
+        balancer.request_started("http://a")
+        balancer.request_finished("http://a", success=False)
+
+    assert node.to_dict(time.monotonic())["state"] == "open"
+    assert node.cooldown == 10.0
+    assert balancer.select(BACKENDS, None) == 1
+
+    end_cooldown(balancer, "http://a")
+    assert node.to_dict(time.monotonic())["state"] == "half_open"
+    assert node.is_available(time.monotonic())
+
+    # A single probe at a time
+    balancer.request_started("http://a")
+    assert node.probing
+    assert not node.is_available(time.monotonic())
+
+    balancer.request_finished("http://a", success=True)
+    assert node.to_dict(time.monotonic())["state"] == "closed"
+    assert not node.probing
+    assert node.in_flight == 0
+    assert node.consecutive_failures == 0
+
+
+def test_circuit_breaker_failed_probe_doubles_cooldown():
+    balancer = make_balancer()
+    node = balancer.get_node("http://a")
+    for _ in range(2):
+        balancer.request_started("http://a")
+        balancer.request_finished("http://a", success=False)
+
+    end_cooldown(balancer, "http://a")
+    balancer.request_started("http://a")
+    balancer.request_finished("http://a", success=False)
+
+    assert node.to_dict(time.monotonic())["state"] == "open"
+    assert node.cooldown == 20.0
+    assert not node.probing
+
+
+def test_all_ejected_picks_first_back():
+    balancer = make_balancer()
+    for url in ("http://a", "http://b"):
+        for _ in range(2):
+            balancer.request_started(url)
+            balancer.request_finished(url, success=False)
+    balancer.get_node("http://b").open_until -= 5
+
+    assert balancer.select(BACKENDS, None) == 1
+
+
+async def chunks(*items, error=None):
+    for item in items:
+        yield item
+    if error:
+        raise error
+
+
+@pytest.mark.asyncio
+async def test_tracked_stream_reports_success():
+    balancer = make_balancer()
+    started_at = balancer.request_started("http://a")
+    stream = TrackedStream(balancer, "http://a", chunks(b"1", b"2"), started_at)
+
+    assert [chunk async for chunk in stream] == [b"1", b"2"]
+    # The response's background task finishes it again
+    stream.finish()
+
+    node = balancer.get_node("http://a")
+    assert node.in_flight == 0
+    assert node.requests == 1
+    assert node.failures == 0
+    assert node.ttft is not None
+
+
+@pytest.mark.asyncio
+async def test_tracked_stream_reports_failure():
+    balancer = make_balancer()
+    started_at = balancer.request_started("http://a")
+    stream = TrackedStream(
+        balancer, "http://a", chunks(b"1", error=ConnectionError()), started_at
+    )
+
+    with pytest.raises(ConnectionError):
+        async for _ in stream:
+            pass
+    stream.finish()
+
+    node = balancer.get_node("http://a")
+    assert node.in_flight == 0
+    assert node.failures == 1
+    assert node.consecutive_failures == 1
+
+
+@pytest.mark.asyncio
+async def test_unread_probe_stream_is_released():
+    balancer = make_balancer()
+    node = balancer.get_node("http://a")
+    for _ in range(2):
+        balancer.request_started("http://a")
+        balancer.request_finished("http://a", success=False)
+    end_cooldown(balancer, "http://a")
+
+    started_at = balancer.request_started("http://a")
+    stream = TrackedStream(balancer, "http://a", chunks(b"1"), started_at)
+    assert not node.is_available(time.monotonic())
+
+    # The client went away before the stream was read
+    stream.finish()
+
+    assert node.in_flight == 0
+    assert not node.probing
+    assert node.failures == 2
+    assert node.is_available(time.monotonic())
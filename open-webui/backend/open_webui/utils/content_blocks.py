@@ -0,0 +1,215 @@
+import html
+import json
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def render_content_blocks(content_blocks, raw=False, content=""):
+    for block in content_blocks:
+        if block["type"] == "text":
+            block_content = block["content"].strip()
+            if block_content:
+                content = f"{content}{block_content}\n"
+        elif block["type"] == "tool_calls":
+            attributes = block.get("attributes", {})
+
+            tool_calls = block.get("content", [])
+            results = block.get("results", [])
+
+            if content and not content.endswith("\n"):
+                content += "\n"
+
+            if results:
+
+                tool_calls_display_content = ""
+                for tool_call in tool_calls:
+
+                    tool_call_id = tool_call.get("id", "")
+                    tool_name = tool_call.get("function", {}).get("name", "")
+                    tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                    tool_result = None
+                    tool_result_files = None
+                    for result in results:
+                        if tool_call_id == result.get("tool_call_id", ""):
+                            tool_result = result.get("content", None)
+                            tool_result_files = result.get("files", None)
+                            break
+
+                    if tool_result:
+                        tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                    else:
+                        tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+
+                if not raw:
+                    content = f"{content}{tool_calls_display_content}"
+            else:
+                tool_calls_display_content = ""
+
+                for tool_call in tool_calls:
+                    tool_call_id = tool_call.get("id", "")
+                    tool_name = tool_call.get("function", {}).get("name", "")
+                    tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+
+                if not raw:
+                    content = f"{content}{tool_calls_display_content}"
+
+        elif block["type"] == "reasoning":
+            reasoning_display_content = "\n".join(
+                (f"> {line}" if not line.startswith(">") else line)
+                for line in block["content"].splitlines()
+            )
+
+            reasoning_duration = block.get("duration", None)
+
+            start_tag = block.get("start_tag", "")
+            end_tag = block.get("end_tag", "")
+
+            if content and not content.endswith("\n"):
+                content += "\n"
+
+            if reasoning_duration is not None:
+                if raw:
+                    content = f'{content}{start_tag}{block["content"]}{end_tag}\n'
+                else:
+                    content = f'{content}<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+            else:
+                if raw:
+                    content = f'{content}{start_tag}{block["content"]}{end_tag}\n'
+                else:
+                    content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+        elif block["type"] == "code_interpreter":
+            attributes = block.get("attributes", {})
+            output = block.get("output", None)
+            lang = attributes.get("lang", "")
+
+            content_stripped, original_whitespace = split_content_and_whitespace(
+                content
+            )
+            if is_opening_code_block(content_stripped):
+                # Remove trailing backticks that would open a new block
+                content = content_stripped.rstrip("`").rstrip() + original_whitespace
+            else:
+                # Keep content as is - either closing backticks or no backticks
+                content = content_stripped + original_whitespace
+
+            if content and not content.endswith("\n"):
+                content += "\n"
+
+            if output:
+                output = html.escape(json.dumps(output))
+
+                if raw:
+                    content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+                else:
+                    content = f'{content}<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+            else:
+                if raw:
+                    content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+                else:
+                    content = f'{content}<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+        else:
+            block_content = str(block["content"]).strip()
+            if block_content:
+                content = f"{content}{block['type']}: {block_content}\n"
+
+    return content
+
+
+def serialize_content_blocks(content_blocks, raw=False):
+    return render_content_blocks(content_blocks, raw).strip()
+
+
+def get_content_block_key(block):
+    # Blocks are mutated in place, so the key is built from every field that
+    # render_content_blocks reads rather than from the block's identity
+    return (
+        id(block),
+        block.get("type"),
+        json.dumps(block.get("content"), default=str),
+        json.dumps(block.get("attributes"), default=str),
+        block.get("duration"),
+        block.get("start_tag"),
+        block.get("end_tag"),
+        json.dumps(block.get("results"), default=str),
+        json.dumps(block.get("output"), default=str),
+    )
+
+
+class IncrementalContentSerializer:
+    """
+    serialize_content_blocks for the blocks of a single streamed response, only
+    the last (growing) block is rendered again while the blocks before it are
+    unchanged. A growing text block only has its new content appended.
+    """
+
+    def __init__(self):
+        self.prefix_keys = None
+        self.prefix = ""
+
+        # Rendering of the last text block
+        self.text = None
+        self.content = ""
+        self.whitespace = ""
+        self.started = False
+
+    def serialize(self, content_blocks):
+        keys = [get_content_block_key(block) for block in content_blocks[:-1]]
+        if keys != self.prefix_keys:
+            self.prefix_keys = keys
+            self.prefix = render_content_blocks(content_blocks[:-1])
+            self.text = None
+
+        block = content_blocks[-1] if content_blocks else None
+        if (
+            block is None
+            or block["type"] != "text"
+            or not isinstance(block["content"], str)
+        ):
+            self.text = None
+            return render_content_blocks(
+                content_blocks[-1:], content=self.prefix
+            ).strip()
+
+        # Equal to render_content_blocks(...).strip(), which is the lstripped
+        # prefix followed by the stripped text
+        text = block["content"]
+        previous = self.text
+        if previous is None or not text.startswith(previous):
+            # Not grown by appending (e.g. a tag was cut off), start over
+            self.content = self.prefix.lstrip()
+            self.whitespace = ""
+            self.started = False
+            previous = ""
+        self.text = text
+
+        delta = text[len(previous) :]
+        if not self.started:
+            delta = delta.lstrip()
+        stripped = delta.rstrip()
+        if stripped:
+            self.content += self.whitespace + stripped
+            self.whitespace = delta[len(stripped) :]
+            self.started = True
+        else:
+            self.whitespace += delta
+
+        if not self.started:
+            return self.prefix.strip()
+        return self.content
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class UpstreamPoolStats:
+    def __init__(self):
+        self.requests = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.connect_time_total = 0.0
+        self.connect_time_max = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "connect_time_avg": (
+                self.connect_time_total / self.connections_created
+                if self.connections_created
+                else 0.0
+            ),
+            "connect_time_max": self.connect_time_max,
+        }
+
+
+class HTTPClientPool:
+    """
+    Long-lived aiohttp sessions, one per upstream origin (scheme, host and
+    port), so that requests to the same upstream reuse kept-alive
+    connections instead of paying TCP and TLS setup every time.
+
+    Sessions are never closed by the callers: responses are released back to
+    the pool, and all sessions are closed with `close()` at shutdown.
+    Timeouts are set per request, the sessions only keep the aiohttp default.
+    Sessions serve every user, so they never store cookies set by upstreams.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+    ):
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+
+        self._sessions = {}
+        self._stats = {}
+
+    @staticmethod
+    def get_origin(url: str) -> str:
+        parsed_url = urlparse(url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+    def _get_trace_config(self, stats: UpstreamPoolStats) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            stats.requests += 1
+            stats.in_flight += 1
+
+        async def on_request_done(session, context, params):
+            stats.in_flight -= 1
+
+        async def on_connection_queued_start(session, context, params):
+            stats.queued += 1
+
+        async def on_connection_queued_end(session, context, params):
+            stats.queued -= 1
+
+        async def on_connection_create_start(session, context, params):
+            context.connect_started_at = time.monotonic()
+
+        async def on_connection_create_end(session, context, params):
+            connect_time = time.monotonic() - context.connect_started_at
+            stats.connections_created += 1
+            stats.connect_time_total += connect_time
+            stats.connect_time_max = max(stats.connect_time_max, connect_time)
+
+        async def on_connection_reuseconn(session, context, params):
+            stats.connections_reused += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_done)
+        trace_config.on_request_exception.append(on_request_done)
+        trace_config.on_connection_queued_start.append(on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(on_connection_queued_end)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        """Shared session for the upstream of `url`."""
+        origin = self.get_origin(url)
+        session = self._sessions.get(origin)
+        if session is None or session.closed:
+            stats = self._stats.setdefault(origin, UpstreamPoolStats())
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                    use_dns_cache=True,
+                ),
+                trust_env=True,
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trace_configs=[self._get_trace_config(stats)],
+            )
+            self._sessions[origin] = session
+        return session
+
+    def stats(self) -> dict:
+        upstreams = {}
+        for origin, stats in self._stats.items():
+            session = self._sessions.get(origin)
+            connector = session.connector if session and not session.closed else None
+            upstreams[origin] = {
+                **stats.to_dict(),
+                # Connections handed out to requests, including streams
+                "in_use": len(getattr(connector, "_acquired", ())),
+                "limit": self.limit,
+            }
+        return {
+            "keepalive_timeout": self.keepalive_timeout,
+            "dns_cache_ttl": self.dns_cache_ttl,
+            "upstreams": upstreams,
+        }
+
+    async def close(self):
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(
+            *[session.close() for session in sessions if not session.closed],
+            return_exceptions=True,
+        )
+
+
+HTTP_CLIENT_POOL = HTTPClientPool(
+    limit=AIOHTTP_CLIENT_POOL_LIMIT,
+    keepalive_timeout=AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT,
+    dns_cache_ttl=AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL,
+)
+
+
+def get_http_session(url: str) -> aiohttp.ClientSession:
+    return HTTP_CLIENT_POOL.get_session(url)
+
+
+async def release_response(response: Optional[aiohttp.ClientResponse]):
+    """
+    Return the connection of `response` to its pool. A response whose body
+    was not read to the end closes its connection instead.
+    """
+    if response:
+        response.release()
@@ -16,7 +16,6 @@ import re
 import ast
 
 from uuid import uuid4
-from concurrent.futures import ThreadPoolExecutor
 
 
 from fastapi import Request, HTTPException
@@ -30,6 +29,8 @@ from open_webui.socket.main import (
     get_event_call,
     get_event_emitter,
     get_active_status_by_user_id,
+    flush_message_events,
+    MESSAGE_EVENT_BUFFER,
 )
 from open_webui.routers.tasks import (
     generate_queries,
@@ -85,6 +86,10 @@ from open_webui.utils.filter import (
     process_filter_functions,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
+from open_webui.utils.content_blocks import (
+    IncrementalContentSerializer,
+    serialize_content_blocks,
+)
 from open_webui.utils.payload import apply_system_prompt_to_body
 
 
@@ -662,36 +667,30 @@ async def chat_completion_files_handler(
             queries = [get_last_user_message(body["messages"])]
 
         try:
-            # Offload get_sources_from_items to a separate thread
-            loop = asyncio.get_running_loop()
-            with ThreadPoolExecutor() as executor:
-                sources = await loop.run_in_executor(
-                    executor,
-                    lambda: get_sources_from_items(
-                        request=request,
-                        items=files,
-                        queries=queries,
-                        embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
-                            query, prefix=prefix, user=user
-                        ),
-                        k=request.app.state.config.TOP_K,
-                        reranking_function=(
-                            (
-                                lambda sentences: request.app.state.RERANKING_FUNCTION(
-                                    sentences, user=user
-                                )
-                            )
-                            if request.app.state.RERANKING_FUNCTION
-                            else None
-                        ),
-                        k_reranker=request.app.state.config.TOP_K_RERANKER,
-                        r=request.app.state.config.RELEVANCE_THRESHOLD,
-                        hybrid_bm25_weight=request.app.state.config.HYBRID_BM25_WEIGHT,
-                        hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
-                        full_context=request.app.state.config.RAG_FULL_CONTEXT,
-                        user=user,
-                    ),
-                )
+            sources = await get_sources_from_items(
+                request=request,
+                items=files,
+                queries=queries,
+                embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
+                    query, prefix=prefix, user=user
+                ),
+                k=request.app.state.config.TOP_K,
+                reranking_function=(
+                    (
+                        lambda sentences: request.app.state.RERANKING_FUNCTION(
+                            sentences, user=user
+                        )
+                    )
+                    if request.app.state.RERANKING_FUNCTION
+                    else None
+                ),
+                k_reranker=request.app.state.config.TOP_K_RERANKER,
+                r=request.app.state.config.RELEVANCE_THRESHOLD,
+                hybrid_bm25_weight=request.app.state.config.HYBRID_BM25_WEIGHT,
+                hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
+                full_context=request.app.state.config.RAG_FULL_CONTEXT,
+                user=user,
+            )
         except Exception as e:
             log.exception(e)
 
@@ -1146,7 +1145,9 @@ async def process_chat_response(
                                 "follow_ups", []
                             )
 
-                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                            await MESSAGE_EVENT_BUFFER.write(
+                                metadata["chat_id"],
+                                Chats.upsert_message_to_chat_by_id_and_message_id,
                                 metadata["chat_id"],
                                 metadata["message_id"],
                                 {
@@ -1208,7 +1209,12 @@ async def process_chat_response(
                             if not title:
                                 title = messages[0].get("content", user_message)
 
-                            Chats.update_chat_title_by_id(metadata["chat_id"], title)
+                            await MESSAGE_EVENT_BUFFER.write(
+                                metadata["chat_id"],
+                                Chats.update_chat_title_by_id,
+                                metadata["chat_id"],
+                                title,
+                            )
 
                             await event_emitter(
                                 {
@@ -1219,7 +1225,12 @@ async def process_chat_response(
                     elif len(messages) == 2:
                         title = messages[0].get("content", user_message)
 
-                        Chats.update_chat_title_by_id(metadata["chat_id"], title)
+                        await MESSAGE_EVENT_BUFFER.write(
+                            metadata["chat_id"],
+                            Chats.update_chat_title_by_id,
+                            metadata["chat_id"],
+                            title,
+                        )
 
                         await event_emitter(
                             {
@@ -1298,7 +1309,9 @@ async def process_chat_response(
 
                 if "error" in response_data:
                     error = response_data["error"].get("detail", response_data["error"])
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MESSAGE_EVENT_BUFFER.write(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1314,7 +1327,9 @@ async def process_chat_response(
                         )
 
                 if "selected_model_id" in response_data:
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MESSAGE_EVENT_BUFFER.write(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1348,7 +1363,9 @@ async def process_chat_response(
                         )
 
                         # Save message in the database
-                        Chats.upsert_message_to_chat_by_id_and_message_id(
+                        await MESSAGE_EVENT_BUFFER.write(
+                            metadata["chat_id"],
+                            Chats.upsert_message_to_chat_by_id_and_message_id,
                             metadata["chat_id"],
                             metadata["message_id"],
                             {
@@ -1358,7 +1375,7 @@ async def process_chat_response(
                         )
 
                         # Send a webhook notification if the user is not active
-                        if not get_active_status_by_user_id(user.id):
+                        if not await get_active_status_by_user_id(user.id):
                             webhook_url = Users.get_user_webhook_url_by_id(user.id)
                             if webhook_url:
                                 await post_webhook(
@@ -1441,153 +1458,11 @@ async def process_chat_response(
         task_id = str(uuid4())  # Create a unique task ID.
         model_id = form_data.get("model", "")
 
-        def split_content_and_whitespace(content):
-            content_stripped = content.rstrip()
-            original_whitespace = (
-                content[len(content_stripped) :]
-                if len(content) > len(content_stripped)
-                else ""
-            )
-            return content_stripped, original_whitespace
-
-        def is_opening_code_block(content):
-            backtick_segments = content.split("```")
-            # Even number of segments means the last backticks are opening a new block
-            return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
-
         # Handle as a background task
         async def response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        block_content = block["content"].strip()
-                        if block_content:
-                            content = f"{content}{block_content}\n"
-                    elif block["type"] == "tool_calls":
-                        attributes = block.get("attributes", {})
-
-                        tool_calls = block.get("content", [])
-                        results = block.get("results", [])
-
-                        if content and not content.endswith("\n"):
-                            content += "\n"
-
-                        if results:
-
-                            tool_calls_display_content = ""
-                            for tool_call in tool_calls:
-
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_result = None
-                                tool_result_files = None
-                                for result in results:
-                                    if tool_call_id == result.get("tool_call_id", ""):
-                                        tool_result = result.get("content", None)
-                                        tool_result_files = result.get("files", None)
-                                        break
-
-                                if tool_result:
-                                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
-                                else:
-                                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
-
-                            if not raw:
-                                content = f"{content}{tool_calls_display_content}"
-                        else:
-                            tool_calls_display_content = ""
-
-                            for tool_call in tool_calls:
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
-
-                            if not raw:
-                                content = f"{content}{tool_calls_display_content}"
-
-                    elif block["type"] == "reasoning":
-                        reasoning_display_content = "\n".join(
-                            (f"> {line}" if not line.startswith(">") else line)
-                            for line in block["content"].splitlines()
-                        )
-
-                        reasoning_duration = block.get("duration", None)
-
-                        start_tag = block.get("start_tag", "")
-                        end_tag = block.get("end_tag", "")
-
-                        if content and not content.endswith("\n"):
-                            content += "\n"
-
-                        if reasoning_duration is not None:
-                            if raw:
-                                content = (
-                                    f'{content}{start_tag}{block["content"]}{end_tag}\n'
-                                )
-                            else:
-                                content = f'{content}<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
-                        else:
-                            if raw:
-                                content = (
-                                    f'{content}{start_tag}{block["content"]}{end_tag}\n'
-                                )
-                            else:
-                                content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
-
-                    elif block["type"] == "code_interpreter":
-                        attributes = block.get("attributes", {})
-                        output = block.get("output", None)
-                        lang = attributes.get("lang", "")
-
-                        content_stripped, original_whitespace = (
-                            split_content_and_whitespace(content)
-                        )
-                        if is_opening_code_block(content_stripped):
-                            # Remove trailing backticks that would open a new block
-                            content = (
-                                content_stripped.rstrip("`").rstrip()
-                                + original_whitespace
-                            )
-                        else:
-                            # Keep content as is - either closing backticks or no backticks
-                            content = content_stripped + original_whitespace
-
-                        if content and not content.endswith("\n"):
-                            content += "\n"
-
-                        if output:
-                            output = html.escape(json.dumps(output))
-
-                            if raw:
-                                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
-                            else:
-                                content = f'{content}<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
-                            else:
-                                content = f'{content}<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-
-                    else:
-                        block_content = str(block["content"]).strip()
-                        if block_content:
-                            content = f"{content}{block['type']}: {block_content}\n"
-
-                return content.strip()
+            serialize_content_blocks_incremental = (
+                IncrementalContentSerializer().serialize
+            )
 
             def convert_content_blocks_to_messages(content_blocks, raw=False):
                 messages = []
@@ -1861,7 +1736,9 @@ async def process_chat_response(
                     )
 
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MESSAGE_EVENT_BUFFER.write(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1931,7 +1808,9 @@ async def process_chat_response(
 
                                 if "selected_model_id" in data:
                                     model_id = data["selected_model_id"]
-                                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                                    await MESSAGE_EVENT_BUFFER.write(
+                                        metadata["chat_id"],
+                                        Chats.upsert_message_to_chat_by_id_and_message_id,
                                         metadata["chat_id"],
                                         metadata["message_id"],
                                         {
@@ -2059,7 +1938,7 @@ async def process_chat_response(
                                         reasoning_block["content"] += reasoning_content
 
                                         data = {
-                                            "content": serialize_content_blocks(
+                                            "content": serialize_content_blocks_incremental(
                                                 content_blocks
                                             )
                                         }
@@ -2134,19 +2013,19 @@ async def process_chat_response(
                                                 break
 
                                         if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                                            # Save message in the database, the
+                                            # writes are debounced and flushed
+                                            # on completion
+                                            await MESSAGE_EVENT_BUFFER.replace_content(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
-                                                {
-                                                    "content": serialize_content_blocks(
-                                                        content_blocks
-                                                    ),
-                                                },
+                                                serialize_content_blocks_incremental(
+                                                    content_blocks
+                                                ),
                                             )
                                         else:
                                             data = {
-                                                "content": serialize_content_blocks(
+                                                "content": serialize_content_blocks_incremental(
                                                     content_blocks
                                                 ),
                                             }
@@ -2582,9 +2461,14 @@ async def process_chat_response(
                     "title": title,
                 }
 
+                # Buffered events must not land after the final content
+                await flush_message_events(metadata["chat_id"], metadata["message_id"])
+
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MESSAGE_EVENT_BUFFER.write(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -2593,7 +2477,7 @@ async def process_chat_response(
                     )
 
                 # Send a webhook notification if the user is not active
-                if not get_active_status_by_user_id(user.id):
+                if not await get_active_status_by_user_id(user.id):
                     webhook_url = Users.get_user_webhook_url_by_id(user.id)
                     if webhook_url:
                         await post_webhook(
@@ -2622,7 +2506,9 @@ async def process_chat_response(
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MESSAGE_EVENT_BUFFER.write(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -0,0 +1,166 @@
+import asyncio
+import copy
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from open_webui.env import MODELS_REFRESH_INTERVAL, SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class ModelSource:
+    def __init__(self, provider: str, url: str):
+        self.provider = provider
+        self.url = url
+        self.fetch: Optional[Callable[[], Awaitable]] = None
+
+        self.response = None
+        self.updated_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.error_at: Optional[float] = None
+
+        self.invalidated = False
+        self.used_at = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+    def to_dict(self, now: float, refresh_interval: float) -> dict:
+        age = now - self.updated_at if self.updated_at is not None else None
+        return {
+            "provider": self.provider,
+            "url": self.url,
+            "age": age,
+            "stale": age is None or age > refresh_interval or self.invalidated,
+            "refreshing": self.task is not None and not self.task.done(),
+            "duration": self.duration,
+            "error": self.error,
+            "error_age": now - self.error_at if self.error_at is not None else None,
+        }
+
+
+class ModelRegistry:
+    """
+    Last good model list response of each connection.
+
+    Requests are served from these snapshots, a snapshot older than
+    `refresh_interval` is refreshed in the background meanwhile, so a slow or
+    unreachable connection neither blocks the requests nor takes its models
+    away. Only the very first fetch of a connection, explicit refreshes and
+    invalidations (e.g. after pulling a model) are waited for.
+
+    `run` refreshes the snapshots still in use on the same interval, and
+    drops the ones of connections nobody asked for in a while (e.g. removed
+    from the config).
+    """
+
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self.expire_after = max(600.0, 10 * refresh_interval)
+        self._sources = {}
+
+    async def get(
+        self,
+        provider: str,
+        url: str,
+        fetch: Callable[[], Awaitable],
+        key: tuple = (),
+        refresh: bool = False,
+    ):
+        """
+        Model list response of `url`, a copy the caller may modify. `fetch`
+        gets a fresh one, returning None on failure. Connections sharing an
+        url but not their credentials are told apart by `key`.
+        """
+        source_key = (provider, url, *key)
+        source = self._sources.get(source_key)
+        if source is None:
+            source = ModelSource(provider, url)
+            self._sources[source_key] = source
+
+        source.fetch = fetch
+        source.used_at = time.monotonic()
+
+        if (
+            refresh
+            or source.invalidated
+            or (source.updated_at is None and source.error_at is None)
+        ):
+            await self.refresh(source)
+        elif self.is_stale(source):
+            self.schedule(source)
+
+        return copy.deepcopy(source.response)
+
+    def is_stale(self, source: ModelSource) -> bool:
+        now = time.monotonic()
+        if (
+            source.error_at is not None
+            and now - source.error_at < self.refresh_interval
+        ):
+            # Failing connections are retried on the interval, not per request
+            return False
+        return (
+            source.updated_at is None or now - source.updated_at > self.refresh_interval
+        )
+
+    def schedule(self, source: ModelSource) -> asyncio.Task:
+        # A single fetch per connection at a time, shared by its waiters
+        if source.task is None or source.task.done():
+            source.task = asyncio.create_task(self._fetch(source))
+        return source.task
+
+    async def refresh(self, source: ModelSource):
+        await asyncio.shield(self.schedule(source))
+
+    async def _fetch(self, source: ModelSource):
+        source.invalidated = False
+        started_at = time.monotonic()
+        try:
+            response = await source.fetch()
+            if response is None:
+                raise Exception("no response")
+        except Exception as e:
+            log.warning(f"Failed to refresh the models of {source.url}: {e}")
+            source.error = str(e)
+            source.error_at = time.monotonic()
+            return
+
+        source.response = response
+        source.updated_at = time.monotonic()
+        source.duration = source.updated_at - started_at
+        source.error = None
+        source.error_at = None
+
+    def invalidate(self, provider: Optional[str] = None):
+        """Make the next requests wait for fresh model lists."""
+        for source in self._sources.values():
+            if provider is None or source.provider == provider:
+                source.invalidated = True
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                now = time.monotonic()
+                for source_key, source in list(self._sources.items()):
+                    if now - source.used_at > self.expire_after:
+                        del self._sources[source_key]
+                    elif self.is_stale(source):
+                        self.schedule(source)
+            except Exception as e:
+                log.exception(f"Error refreshing the model registry: {e}")
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "refresh_interval": self.refresh_interval,
+            "sources": [
+                source.to_dict(now, self.refresh_interval)
+                for source in self._sources.values()
+            ],
+        }
+
+
+MODEL_REGISTRY = ModelRegistry(refresh_interval=MODELS_REFRESH_INTERVAL)
@@ -34,8 +34,10 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
-async def fetch_ollama_models(request: Request, user: UserModel = None):
-    raw_ollama_models = await ollama.get_all_models(request, user=user)
+async def fetch_ollama_models(
+    request: Request, user: UserModel = None, refresh: bool = False
+):
+    raw_ollama_models = await ollama.get_all_models(request, user=user, refresh=refresh)
     return [
         {
             "id": model["model"],
@@ -51,19 +53,27 @@ async def fetch_ollama_models(request: Request, user: UserModel = None):
     ]
 
 
-async def fetch_openai_models(request: Request, user: UserModel = None):
-    openai_response = await openai.get_all_models(request, user=user)
+async def fetch_openai_models(
+    request: Request, user: UserModel = None, refresh: bool = False
+):
+    openai_response = await openai.get_all_models(request, user=user, refresh=refresh)
     return openai_response["data"]
 
 
-async def get_all_base_models(request: Request, user: UserModel = None):
+async def get_all_base_models(
+    request: Request, user: UserModel = None, refresh: bool = False
+):
+    """
+    Models of all connections, built from the model registry snapshots.
+    `refresh` waits for fresh model lists instead.
+    """
     openai_task = (
-        fetch_openai_models(request, user)
+        fetch_openai_models(request, user, refresh)
         if request.app.state.config.ENABLE_OPENAI_API
         else asyncio.sleep(0, result=[])
     )
     ollama_task = (
-        fetch_ollama_models(request, user)
+        fetch_ollama_models(request, user, refresh)
         if request.app.state.config.ENABLE_OLLAMA_API
         else asyncio.sleep(0, result=[])
     )
@@ -84,7 +94,7 @@ async def get_all_models(request, refresh: bool = False, user: UserModel = None)
     ):
         base_models = request.app.state.BASE_MODELS
     else:
-        base_models = await get_all_base_models(request, user=user)
+        base_models = await get_all_base_models(request, user=user, refresh=refresh)
         request.app.state.BASE_MODELS = base_models
 
     # deep copy the base models to avoid modifying the original list
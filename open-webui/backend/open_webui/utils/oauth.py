@@ -50,6 +50,7 @@ from open_webui.env import (
 from open_webui.utils.misc import parse_duration
 from open_webui.utils.auth import get_password_hash, create_token
 from open_webui.utils.webhook import post_webhook
+from open_webui.utils.access_control import invalidate_principals
 
 from open_webui.env import SRC_LOG_LEVELS, GLOBAL_LOG_LEVEL
 
@@ -262,6 +263,7 @@ class OAuthManager:
                 Groups.update_group_by_id(
                     id=group_model.id, form_data=update_form, overwrite=False
                 )
+                invalidate_principals()
 
         # Add user to new groups
         for group_model in all_available_groups:
@@ -293,6 +295,7 @@ class OAuthManager:
                 Groups.update_group_by_id(
                     id=group_model.id, form_data=update_form, overwrite=False
                 )
+                invalidate_principals()
 
     async def _process_picture_url(
         self, picture_url: str, access_token: str = None
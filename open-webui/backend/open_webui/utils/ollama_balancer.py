@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+
+import aiohttp
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_SESSION_SSL,
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN,
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD,
+    OLLAMA_LOADED_MODELS_REFRESH_INTERVAL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.http_client import get_http_session
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
+
+
+class OllamaNode:
+    # Weight of the latest sample in the moving averages
+    ALPHA = 0.2
+
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.ttft: Optional[float] = None
+        self.error_rate = 0.0
+
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        self.probing = False
+
+        self.loaded_models: Optional[set] = None
+        self.loaded_models_at = 0.0
+        self.refreshing = False
+
+    def is_available(self, now: float) -> bool:
+        """Whether the circuit breaker lets a request through."""
+        if self.open_until <= 0:
+            return True
+        # Half open: a single probe request once the cooldown is over
+        return now >= self.open_until and not self.probing
+
+    def record_ttft(self, ttft: float):
+        self.ttft = (
+            ttft
+            if self.ttft is None
+            else self.ALPHA * ttft + (1 - self.ALPHA) * self.ttft
+        )
+
+    def to_dict(self, now: float) -> dict:
+        if self.open_until <= 0:
+            state = "closed"
+        elif now < self.open_until:
+            state = "open"
+        else:
+            state = "half_open"
+
+        return {
+            "state": state,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ttft": self.ttft,
+            "error_rate": self.error_rate,
+            "consecutive_failures": self.consecutive_failures,
+            "open_for": max(0.0, self.open_until - now),
+            "loaded_models": (
+                sorted(self.loaded_models) if self.loaded_models is not None else None
+            ),
+        }
+
+
+class OllamaBalancer:
+    """
+    Picks the Ollama backend of a request among the ones serving the model.
+
+    Each backend is scored by its expected wait: (in flight requests + 1)
+    times its moving average time to first token, raised for backends which
+    have not loaded the model (per /api/ps) or which recently failed. The
+    lowest score wins, ties are broken at random.
+
+    A backend failing `failure_threshold` times in a row is ejected for
+    `cooldown` seconds. It then gets a single probe request, and is either
+    restored or ejected again for twice as long.
+    """
+
+    # Score multiplier of a backend which would need to load the model first
+    MODEL_NOT_LOADED_PENALTY = 4.0
+    MAX_COOLDOWN = 300.0
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        loaded_models_refresh_interval: float = 10.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.loaded_models_refresh_interval = loaded_models_refresh_interval
+        self._nodes = {}
+
+    def get_node(self, url: str) -> OllamaNode:
+        url = url.rstrip("/")
+        if url not in self._nodes:
+            self._nodes[url] = OllamaNode(url)
+        return self._nodes[url]
+
+    ####################
+    # Selection
+    ####################
+
+    def get_score(self, node: OllamaNode, model: Optional[str], ttft: float) -> float:
+        score = (node.in_flight + 1) * (node.ttft if node.ttft is not None else ttft)
+        if model and node.loaded_models is not None and model not in node.loaded_models:
+            score *= self.MODEL_NOT_LOADED_PENALTY
+        return score / max(0.05, 1.0 - node.error_rate)
+
+    def select(
+        self, backends: List[Tuple[int, str, Optional[str]]], model: Optional[str]
+    ) -> int:
+        """
+        Index of the backend to use among `backends`, a list of
+        (url index, url, key).
+        """
+        if len(backends) == 1:
+            return backends[0][0]
+
+        now = time.monotonic()
+        nodes = [(backend, self.get_node(backend[1])) for backend in backends]
+        for (_, url, key), node in nodes:
+            self._refresh_loaded_models(node, key, now)
+
+        candidates = [
+            (backend, node) for backend, node in nodes if node.is_available(now)
+        ]
+        if not candidates:
+            # Everything is ejected, try the one coming back first
+            backend, node = min(nodes, key=lambda item: item[1].open_until)
+            return backend[0]
+
+        # Backends without samples yet are assumed as fast as the average one
+        samples = [node.ttft for _, node in nodes if node.ttft is not None]
+        ttft = sum(samples) / len(samples) if samples else 1.0
+
+        scores = [
+            (self.get_score(node, model, ttft), random.random(), backend[0])
+            for backend, node in candidates
+        ]
+        return min(scores)[2]
+
+    ####################
+    # Tracking
+    ####################
+
+    def request_started(self, url: str) -> float:
+        node = self.get_node(url)
+        node.in_flight += 1
+        node.requests += 1
+        if node.open_until > 0:
+            node.probing = True
+        return time.monotonic()
+
+    def first_token(self, url: str, started_at: float):
+        self.get_node(url).record_ttft(time.monotonic() - started_at)
+
+    def request_released(self, url: str):
+        """Ends a request without an outcome, e.g. one whose stream was never read."""
+        node = self.get_node(url)
+        node.in_flight = max(0, node.in_flight - 1)
+        # A probe without outcome leaves the backend half open for the next one
+        node.probing = False
+
+    def request_finished(self, url: str, success: bool = True):
+        node = self.get_node(url)
+        node.in_flight = max(0, node.in_flight - 1)
+        node.error_rate = (1 - node.ALPHA) * node.error_rate + (
+            0.0 if success else node.ALPHA
+        )
+
+        if success:
+            node.consecutive_failures = 0
+            node.open_until = 0.0
+            node.cooldown = 0.0
+            node.probing = False
+            return
+
+        node.failures += 1
+        node.consecutive_failures += 1
+        if node.probing or node.consecutive_failures >= self.failure_threshold:
+            node.cooldown = min(
+                self.MAX_COOLDOWN,
+                node.cooldown * 2 if node.cooldown else self.cooldown,
+            )
+            node.open_until = time.monotonic() + node.cooldown
+            node.probing = False
+            log.warning(f"Ejecting Ollama backend {url} for {node.cooldown}s")
+
+    ####################
+    # Loaded models
+    ####################
+
+    def _refresh_loaded_models(self, node: OllamaNode, key: Optional[str], now: float):
+        if (
+            node.refreshing
+            or now - node.loaded_models_at < self.loaded_models_refresh_interval
+        ):
+            return
+        node.refreshing = True
+        try:
+            asyncio.get_running_loop().create_task(self._fetch_loaded_models(node, key))
+        except RuntimeError:
+            node.refreshing = False
+
+    async def _fetch_loaded_models(self, node: OllamaNode, key: Optional[str]):
+        try:
+            async with get_http_session(node.url).get(
+                f"{node.url}/api/ps",
+                headers={**({"Authorization": f"Bearer {key}"} if key else {})},
+                timeout=aiohttp.ClientTimeout(total=5),
+                ssl=AIOHTTP_CLIENT_SESSION_SSL,
+            ) as r:
+                r.raise_for_status()
+                data = await r.json()
+            node.loaded_models = {
+                model.get("model") or model.get("name")
+                for model in data.get("models", [])
+            }
+        except Exception as e:
+            log.debug(f"Failed to get the loaded models of {node.url}: {e}")
+            node.loaded_models = None
+        finally:
+            node.loaded_models_at = time.monotonic()
+            node.refreshing = False
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "failure_threshold": self.failure_threshold,
+            "cooldown": self.cooldown,
+            "backends": {url: node.to_dict(now) for url, node in self._nodes.items()},
+        }
+
+
+class TrackedStream:
+    """
+    Streamed response of a request tracked by the balancer, which gets its
+    time to first token and outcome. A client disconnecting is not the
+    backend's fault. `finish` must also be called once the response is done,
+    as a stream that was never read never reports anything by itself.
+    """
+
+    def __init__(
+        self,
+        balancer: OllamaBalancer,
+        url: str,
+        stream: AsyncIterator[bytes],
+        started_at: float,
+    ):
+        self.balancer = balancer
+        self.url = url
+        self.stream = stream
+        self.started_at = started_at
+        self.finished = False
+
+    async def __aiter__(self):
+        success = True
+        try:
+            first = True
+            async for chunk in self.stream:
+                if first:
+                    self.balancer.first_token(self.url, self.started_at)
+                    first = False
+                yield chunk
+        except Exception:
+            success = False
+            raise
+        finally:
+            self.finish(success)
+
+    def finish(self, success: Optional[bool] = None):
+        """Reports the outcome once, None releases the request without one."""
+        if self.finished:
+            return
+        self.finished = True
+        if success is None:
+            self.balancer.request_released(self.url)
+        else:
+            self.balancer.request_finished(self.url, success)
+
+
+OLLAMA_BALANCER = OllamaBalancer(
+    failure_threshold=OLLAMA_CIRCUIT_BREAKER_THRESHOLD,
+    cooldown=OLLAMA_CIRCUIT_BREAKER_COOLDOWN,
+    loaded_models_refresh_interval=OLLAMA_LOADED_MODELS_REFRESH_INTERVAL,
+)
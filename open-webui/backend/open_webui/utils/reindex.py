@@ -0,0 +1,506 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import Request
+from starlette.datastructures import Headers
+
+from open_webui.models.files import Files
+from open_webui.models.knowledge import Knowledges
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
+from open_webui.routers.retrieval import process_file, ProcessFileForm
+
+from open_webui.config import (
+    RAG_REINDEX_WORKERS,
+    RAG_REINDEX_FILES_PER_MINUTE,
+    RAG_REINDEX_CHECKPOINT_PATH,
+)
+from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+    UVICORN_WORKERS,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Minimum number of seconds between two checkpoint writes while files complete
+CHECKPOINT_INTERVAL = 2
+
+# Seconds the worker running the job holds its lease without renewing it
+LEASE_TIMEOUT = 60
+
+
+class KnowledgeReindexJob:
+    """
+    Background job re-embedding the files of every knowledge base.
+
+    Files are processed by a pool of `workers` threads, throttled to
+    `files_per_minute` when set. Progress is checkpointed to `path`, so a job
+    interrupted by a crash, restart or stop request picks up the remaining
+    files the next time it is started instead of starting over.
+
+    With a Redis connection the checkpoint is kept in Redis instead, and the
+    worker running the job holds a lease on it, so that status and stop
+    requests reaching any worker see and control the same job. Without Redis
+    the job only runs when there is a single worker.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        workers: int = 4,
+        files_per_minute: int = 0,
+        redis=None,
+        redis_key_prefix: str = "open-webui",
+        single_process: bool = True,
+    ):
+        self.path = path
+        self.workers = max(1, workers)
+        self.files_per_minute = max(0, files_per_minute)
+        self.redis = redis
+        self.single_process = single_process
+        self.state_key = f"{redis_key_prefix}:knowledge_reindex:state"
+        self.lease_key = f"{redis_key_prefix}:knowledge_reindex:lease"
+        self.stop_key = f"{redis_key_prefix}:knowledge_reindex:stop"
+        self.lease_id = str(uuid4())
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # Bounds concurrent files to `workers`, including the seeding thread
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._thread: Optional[threading.Thread] = None
+        self._next_start = 0.0
+        self._last_save = 0.0
+
+        # Progress of the current run, used for the ETA
+        self._run_started_at: Optional[float] = None
+        self._run_processed = 0
+
+        self.state = self._load()
+
+    ####################
+    # Checkpoint
+    ####################
+
+    def _load(self) -> Optional[dict]:
+        try:
+            if self.redis is not None:
+                state = self.redis.get(self.state_key)
+                return json.loads(state) if state else None
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f"Ignoring unreadable reindex checkpoint {self.path}: {e}")
+            return None
+
+    def _save(self, force: bool = False) -> None:
+        # Callers hold self._lock
+        now = time.time()
+        if not force and now - self._last_save < CHECKPOINT_INTERVAL:
+            return
+        self._last_save = now
+        self.state["updated_at"] = int(now)
+
+        try:
+            if self.redis is not None:
+                self.redis.set(self.state_key, json.dumps(self.state))
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            log.exception(f"Failed to write reindex checkpoint {self.path}: {e}")
+
+    ####################
+    # Job control
+    ####################
+
+    def is_running(self) -> bool:
+        """Whether the job runs in this process."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def is_running_elsewhere(self) -> bool:
+        """Whether another worker holds the lease of the job."""
+        if self.redis is None or self.is_running():
+            return False
+        return bool(self.redis.exists(self.lease_key))
+
+    def _acquire_lease(self) -> bool:
+        if self.redis is None:
+            return True
+        return bool(
+            self.redis.set(self.lease_key, self.lease_id, nx=True, ex=LEASE_TIMEOUT)
+        )
+
+    def _release_lease(self) -> None:
+        if self.redis is None:
+            return
+        try:
+            if self.redis.get(self.lease_key) == self.lease_id:
+                self.redis.delete(self.lease_key)
+        except Exception as e:
+            log.error(f"Failed to release the reindex lease: {e}")
+
+    def _heartbeat(self, done: threading.Event) -> None:
+        """Renew the lease and pick up stop requests made on other workers."""
+        while not done.wait(LEASE_TIMEOUT / 4):
+            try:
+                self.redis.set(self.lease_key, self.lease_id, xx=True, ex=LEASE_TIMEOUT)
+                if self.redis.get(self.stop_key):
+                    self._stop.set()
+            except Exception as e:
+                log.error(f"Failed to renew the reindex lease: {e}")
+
+    def start(self, request: Request, user) -> bool:
+        """
+        Start reindexing in the background, resuming an unfinished job if there
+        is one. Returns False if a job is already running.
+        """
+        if self.redis is None and not self.single_process:
+            raise ValueError(
+                "Reindexing with several workers requires Redis (REDIS_URL) to coordinate them"
+            )
+
+        with self._lock:
+            if self.is_running() or not self._acquire_lease():
+                return False
+
+            try:
+                # Another worker may have run the job since this one loaded it
+                self.state = self._load()
+                if self.state and self.state.get("status") not in (
+                    "completed",
+                    "partial",
+                ):
+                    log.info(f"Resuming reindex job {self.state['id']}")
+                else:
+                    self.state = self._plan()
+            except Exception:
+                self._release_lease()
+                raise
+
+            if self.redis is not None:
+                self.redis.delete(self.stop_key)
+
+            self.state["status"] = "running"
+            self._stop.clear()
+            self._run_started_at = time.time()
+            self._run_processed = 0
+            self._save(force=True)
+
+            # Only the app is kept, the request ends before the job does
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(request.app, user),
+                name="knowledge-reindex",
+                daemon=True,
+            )
+            self._thread.start()
+        return True
+
+    def stop(self) -> bool:
+        """Stop after the files in flight; the job resumes on the next start."""
+        if self.is_running():
+            self._stop.set()
+            return True
+        if self.is_running_elsewhere():
+            # Picked up by the heartbeat of the worker running the job
+            self.redis.set(self.stop_key, "1", ex=LEASE_TIMEOUT)
+            return True
+        return False
+
+    def status(self) -> dict:
+        with self._lock:
+            running_elsewhere = self.is_running_elsewhere()
+            if self.redis is not None and not self.is_running():
+                self.state = self._load()
+            if not self.state:
+                return {"status": "idle"}
+
+            job_status = self.state["status"]
+            if job_status == "running" and not (self.is_running() or running_elsewhere):
+                # The worker running the job died without checkpointing
+                job_status = "interrupted"
+
+            total = sum(len(kb["file_ids"]) for kb in self.state["knowledge_bases"])
+            processed = sum(len(ids) for ids in self.state["done"].values())
+            failed = sum(len(errors) for errors in self.state["failed"].values())
+            pending = max(total - processed - failed, 0)
+
+            elapsed, eta = None, None
+            if self.is_running() and self._run_started_at:
+                elapsed = time.time() - self._run_started_at
+                if self._run_processed:
+                    eta = pending / (self._run_processed / elapsed)
+
+            return {
+                "id": self.state["id"],
+                "status": job_status,
+                "knowledge_bases": len(self.state["knowledge_bases"]),
+                "total_files": total,
+                "processed_files": processed,
+                "failed_files": failed,
+                "pending_files": pending,
+                "elapsed_seconds": elapsed,
+                "eta_seconds": eta,
+                "started_at": self.state["started_at"],
+                "updated_at": self.state.get("updated_at"),
+                "deleted_knowledge_bases": self.state["deleted_knowledge_bases"],
+                "failed": self.state["failed"],
+                "failed_knowledge_bases": self.state.get("failed_knowledge_bases", {}),
+            }
+
+    ####################
+    # Worker
+    ####################
+
+    def _plan(self) -> dict:
+        knowledge_bases = []
+        deleted_knowledge_bases = []
+
+        for knowledge_base in Knowledges.get_knowledge_bases():
+            # -- Robust error handling for missing or invalid data
+            if not knowledge_base.data or not isinstance(knowledge_base.data, dict):
+                log.warning(
+                    f"Knowledge base {knowledge_base.id} has no data or invalid data ({knowledge_base.data!r}). Deleting."
+                )
+                try:
+                    Knowledges.delete_knowledge_by_id(id=knowledge_base.id)
+                    deleted_knowledge_bases.append(knowledge_base.id)
+                except Exception as e:
+                    log.error(
+                        f"Failed to delete invalid knowledge base {knowledge_base.id}: {e}"
+                    )
+                continue
+
+            files = Files.get_files_by_ids(knowledge_base.data.get("file_ids", []))
+            knowledge_bases.append(
+                {"id": knowledge_base.id, "file_ids": [file.id for file in files]}
+            )
+
+        return {
+            "id": str(uuid4()),
+            "status": "pending",
+            "started_at": int(time.time()),
+            "knowledge_bases": knowledge_bases,
+            # Knowledge bases whose collection has been emptied already
+            "cleared": [],
+            "done": {},
+            "failed": {},
+            # Knowledge bases skipped because their collection could not be emptied
+            "failed_knowledge_bases": {},
+            "deleted_knowledge_bases": deleted_knowledge_bases,
+        }
+
+    def _throttle(self) -> None:
+        if not self.files_per_minute:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + 60 / self.files_per_minute
+        if start > now:
+            self._stop.wait(start - now)
+
+    @staticmethod
+    def _get_request(app) -> Request:
+        # Internal request, process_file only reads the app state from it
+        return Request(
+            {
+                "type": "http",
+                "asgi.version": "3.0",
+                "asgi.spec_version": "2.0",
+                "method": "POST",
+                "path": "/internal/reindex",
+                "query_string": b"",
+                "headers": Headers({}).raw,
+                "client": ("127.0.0.1", 12345),
+                "server": ("127.0.0.1", 80),
+                "scheme": "http",
+                "app": app,
+            }
+        )
+
+    def _process_file(
+        self, request: Request, user, knowledge_id: str, file_id: str
+    ) -> None:
+        self._throttle()
+        if self._stop.is_set():
+            return
+
+        error = None
+        try:
+            with self._slots:
+                process_file(
+                    request,
+                    ProcessFileForm(file_id=file_id, collection_name=knowledge_id),
+                    user=user,
+                )
+        except Exception as e:
+            detail = getattr(e, "detail", str(e))
+            # Inserted by a run that was interrupted before its checkpoint
+            if detail != ERROR_MESSAGES.DUPLICATE_CONTENT:
+                log.error(
+                    f"Error processing file {file_id} for knowledge base {knowledge_id}: {detail}"
+                )
+                error = str(detail)
+
+        with self._lock:
+            if error:
+                self.state["failed"].setdefault(knowledge_id, {})[file_id] = error
+            else:
+                self.state["done"].setdefault(knowledge_id, []).append(file_id)
+                self.state["failed"].get(knowledge_id, {}).pop(file_id, None)
+            self._run_processed += 1
+            self._save()
+
+    def _run(self, app, user) -> None:
+        log.info(
+            f"Reindexing {len(self.state['knowledge_bases'])} knowledge bases with {self.workers} workers"
+        )
+
+        request = self._get_request(app)
+        heartbeat_done = threading.Event()
+        if self.redis is not None:
+            threading.Thread(
+                target=self._heartbeat,
+                args=(heartbeat_done,),
+                name="knowledge-reindex-heartbeat",
+                daemon=True,
+            ).start()
+
+        status = "completed"
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="knowledge-reindex"
+            ) as executor:
+                futures = []
+                for knowledge_base in self.state["knowledge_bases"]:
+                    if self._stop.is_set():
+                        break
+
+                    knowledge_id = knowledge_base["id"]
+                    done = set(self.state["done"].get(knowledge_id, []))
+                    remaining = [
+                        file_id
+                        for file_id in knowledge_base["file_ids"]
+                        if file_id not in done
+                    ]
+
+                    if knowledge_id not in self.state["cleared"]:
+                        try:
+                            if VECTOR_DB_CLIENT.has_collection(
+                                collection_name=knowledge_id
+                            ):
+                                VECTOR_DB_CLIENT.delete_collection(
+                                    collection_name=knowledge_id
+                                )
+                            BM25_INDEX.delete_collection(collection_name=knowledge_id)
+                        except Exception as e:
+                            log.error(
+                                f"Error deleting collection {knowledge_id}: {str(e)}"
+                            )
+                            with self._lock:
+                                self.state.setdefault("failed_knowledge_bases", {})[
+                                    knowledge_id
+                                ] = str(e)
+                                self._save(force=True)
+                            continue  # Skip, don't raise
+
+                        with self._lock:
+                            self.state["cleared"].append(knowledge_id)
+                            self.state.get("failed_knowledge_bases", {}).pop(
+                                knowledge_id, None
+                            )
+                            self._save(force=True)
+
+                    # Seed the collection with one file first, so that workers
+                    # never race each other to create it
+                    while (
+                        remaining
+                        and not self._stop.is_set()
+                        and not VECTOR_DB_CLIENT.has_collection(
+                            collection_name=knowledge_id
+                        )
+                    ):
+                        self._process_file(
+                            request, user, knowledge_id, remaining.pop(0)
+                        )
+
+                    futures.extend(
+                        executor.submit(
+                            self._process_file, request, user, knowledge_id, file_id
+                        )
+                        for file_id in remaining
+                    )
+
+                wait(futures)
+
+            if self._stop.is_set():
+                status = "stopped"
+            elif self.state.get("failed_knowledge_bases") or any(
+                self.state["failed"].values()
+            ):
+                # Started afresh next time, like a completed job
+                status = "partial"
+        except Exception as e:
+            log.exception(f"Reindexing failed: {e}")
+            status = "failed"
+
+        with self._lock:
+            self.state["status"] = status
+            self._save(force=True)
+        heartbeat_done.set()
+        self._release_lease()
+
+        summary = self.status()
+        log.info(
+            f"Reindexing {status}: {summary['processed_files']} files processed, {summary['failed_files']} failed, "
+            f"{len(summary['failed_knowledge_bases'])} knowledge bases skipped, "
+            f"deleted {len(summary['deleted_knowledge_bases'])} invalid knowledge bases: {summary['deleted_knowledge_bases']}"
+        )
+
+
+def get_reindex_redis():
+    if not REDIS_URL:
+        return None
+    try:
+        return get_redis_connection(
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+            redis_cluster=REDIS_CLUSTER,
+            decode_responses=True,
+        )
+    except Exception as e:
+        log.error(f"Failed to connect the reindex job to Redis: {e}")
+        return None
+
+
+KNOWLEDGE_REINDEX_JOB = KnowledgeReindexJob(
+    RAG_REINDEX_CHECKPOINT_PATH,
+    workers=RAG_REINDEX_WORKERS,
+    files_per_minute=RAG_REINDEX_FILES_PER_MINUTE,
+    redis=get_reindex_redis(),
+    redis_key_prefix=REDIS_KEY_PREFIX,
+    single_process=UVICORN_WORKERS <= 1,
+)